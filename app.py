@@ -6,12 +6,15 @@ Main user interface for the PDF tutor
 import streamlit as st
 import os
 import sys
+import json
+import atexit
+import time
+import uuid
+import hashlib
+import tempfile
 from pathlib import Path
 import logging
 from dotenv import load_dotenv
-import fitz  # PyMuPDF - no external dependencies needed!
-from PIL import Image
-from io import BytesIO
 
 # Load environment variables from .env file
 load_dotenv()
@@ -19,8 +22,18 @@ load_dotenv()
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from pdf_processor import PDFProcessor
+from pdf_processor import PDFProcessor, open_pdf
 from rag_pipeline import RAGPipeline
+from embedding_cache import EmbeddingCache
+from embedding_pool import EmbeddingPool
+from index_snapshot import SnapshotDirectory
+from ingestion_jobs import IngestionJob
+from model_registry import DEFAULT_EMBEDDING_MODEL, get_embedding_model, warm_up
+from page_renderer import PageCache, PageRenderer
+from query_cache import AnswerCache, LRUCache
+from rate_limiter import RateLimiter
+from session_governor import SessionGovernor
+from telemetry import InMemoryExporter, JSONLinesExporter, PrometheusExporter, tracer
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -72,7 +85,7 @@ st.markdown("""
 
 # Initialize session state
 if "pdf_processor" not in st.session_state:
-    st.session_state.pdf_processor = PDFProcessor()
+    st.session_state.pdf_processor = PDFProcessor(backend="pymupdf")
 
 if "rag_pipeline" not in st.session_state:
     st.session_state.rag_pipeline = None
@@ -86,8 +99,11 @@ if "pdf_loaded" not in st.session_state:
 if "pdf_path" not in st.session_state:
     st.session_state.pdf_path = None
 
-if "pdf_images" not in st.session_state:
-    st.session_state.pdf_images = None
+if "pdf_document" not in st.session_state:
+    st.session_state.pdf_document = None
+
+if "page_renderer" not in st.session_state:
+    st.session_state.page_renderer = None
 
 if "current_page" not in st.session_state:
     st.session_state.current_page = 0
@@ -98,6 +114,54 @@ if "last_answer" not in st.session_state:
 if "last_retrieved" not in st.session_state:
     st.session_state.last_retrieved = None
 
+if "last_generation_stats" not in st.session_state:
+    st.session_state.last_generation_stats = None
+
+if "last_context_stats" not in st.session_state:
+    st.session_state.last_context_stats = None
+
+if "last_trace_id" not in st.session_state:
+    st.session_state.last_trace_id = None
+
+if "ingest_job" not in st.session_state:
+    st.session_state.ingest_job = None
+
+# Content hash of each uploaded file (by uploader file id), so reruns never re-hash
+if "upload_hashes" not in st.session_state:
+    st.session_state.upload_hashes = {}
+
+# Content hash of the PDF open in the viewer
+if "pdf_hash" not in st.session_state:
+    st.session_state.pdf_hash = None
+
+# Document id of the PDF open in the viewer, to match cited sources against
+if "viewer_doc" not in st.session_state:
+    st.session_state.viewer_doc = None
+
+# Content hash each document was indexed from, by document id
+if "indexed_hashes" not in st.session_state:
+    st.session_state.indexed_hashes = {}
+
+# Content hash of the PDF the current ingestion job is indexing
+if "ingest_hash" not in st.session_state:
+    st.session_state.ingest_hash = None
+
+# Corpus version last saved as a snapshot (or loaded from one)
+if "saved_corpus" not in st.session_state:
+    st.session_state.saved_corpus = None
+
+if "last_rerun" not in st.session_state:
+    st.session_state.last_rerun = None
+
+# Identifies this session to the server-wide memory governor
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
+# Streamlit reruns this script on every interaction; time each run
+rerun_started = time.perf_counter()
+upload_work = "none"
+upload_ms = 0.0
+
 # Load system prompt
 @st.cache_resource
 def load_system_prompt():
@@ -112,6 +176,175 @@ def load_system_prompt():
 
 system_prompt = load_system_prompt()
 
+# Load the embedding model in the background once per server process, while
+# the first visitor is still picking a file (set EMBEDDING_WARMUP=0 to disable)
+@st.cache_resource
+def start_model_warm_up():
+    """Warm up the shared embedding model"""
+    if os.getenv("EMBEDDING_WARMUP", "1") == "1":
+        warm_up([DEFAULT_EMBEDDING_MODEL], background=True)
+
+start_model_warm_up()
+
+# Shared by every session so re-uploaded or revised PDFs reuse their embeddings;
+# opened with the first pipeline, since its dimension comes from the model
+@st.cache_resource
+def load_embedding_cache():
+    """Open the persistent embedding cache"""
+    dim = get_embedding_model(DEFAULT_EMBEDDING_MODEL).get_sentence_embedding_dimension()
+    return EmbeddingCache("data/embedding_cache", DEFAULT_EMBEDDING_MODEL, dim=dim)
+
+# On many-core hosts without a GPU, set EMBEDDING_PROCESSES to embed large
+# PDFs across worker processes (EMBEDDING_THREADS torch threads each)
+EMBEDDING_PROCESSES = int(os.getenv("EMBEDDING_PROCESSES", "0"))
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "1"))
+
+@st.cache_resource
+def load_embedding_pool():
+    """Create the process-wide embedding pool, if configured (workers start on first large PDF)"""
+    if EMBEDDING_PROCESSES < 2:
+        return None
+    return EmbeddingPool(DEFAULT_EMBEDDING_MODEL, EMBEDDING_PROCESSES, EMBEDDING_THREADS)
+
+embedding_pool = load_embedding_pool()
+
+# Rendered pages for every session share one byte-bounded cache
+PAGE_CACHE_MB = int(os.getenv("PAGE_CACHE_MB", "256"))
+PAGE_PREFETCH = int(os.getenv("PAGE_PREFETCH", "2"))
+
+@st.cache_resource
+def load_page_cache():
+    """Create the process-wide page image cache"""
+    return PageCache(max_bytes=PAGE_CACHE_MB * 1024 * 1024)
+
+page_cache = load_page_cache()
+
+# Students in one class ask the same questions, so query embeddings and
+# answers are cached across sessions. Set ANSWER_CACHE_SIMILARITY (e.g. 0.95)
+# to also reuse answers to reworded questions over the same sources.
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+ANSWER_CACHE_SIMILARITY = os.getenv("ANSWER_CACHE_SIMILARITY")
+
+@st.cache_resource
+def load_query_caches():
+    """Create the process-wide query-embedding and answer caches"""
+    query_cache = LRUCache(max_entries=4096)
+    answer_cache = AnswerCache(
+        max_entries=ANSWER_CACHE_SIZE,
+        ttl=ANSWER_CACHE_TTL,
+        semantic_threshold=float(ANSWER_CACHE_SIMILARITY) if ANSWER_CACHE_SIMILARITY else None
+    )
+    return query_cache, answer_cache
+
+query_cache, answer_cache = load_query_caches()
+
+# Every session spends the same Groq quota; set these to the account's limits
+# so the app waits its turn instead of getting rate-limit errors
+GROQ_REQUESTS_PER_MINUTE = float(os.getenv("GROQ_REQUESTS_PER_MINUTE", "0"))
+GROQ_TOKENS_PER_MINUTE = float(os.getenv("GROQ_TOKENS_PER_MINUTE", "0"))
+
+@st.cache_resource
+def load_rate_limiter():
+    """Create the process-wide Groq rate limiter, if limits are configured"""
+    if not (GROQ_REQUESTS_PER_MINUTE or GROQ_TOKENS_PER_MINUTE):
+        return None
+    return RateLimiter(GROQ_REQUESTS_PER_MINUTE or None, GROQ_TOKENS_PER_MINUTE or None)
+
+rate_limiter = load_rate_limiter()
+
+# "hybrid" finds exact terms (course codes, formula names) that embeddings blur;
+# "lexical" skips the embedding model at query time altogether
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "dense")
+
+# "int8" or "binary" keeps compressed vectors in memory per session and the
+# full-precision ones in a temporary file, read only to rescore top matches
+VECTOR_INDEX = os.getenv("VECTOR_INDEX", "exact")
+
+# Stage timings for the debug panel, plus a JSON-lines log when TRACE_FILE is set
+TRACE_FILE = os.getenv("TRACE_FILE")
+
+@st.cache_resource
+def load_telemetry():
+    """Register the process-wide span exporters"""
+    memory_exporter = InMemoryExporter()
+    metrics_exporter = PrometheusExporter()
+    tracer.add_exporter(memory_exporter)
+    tracer.add_exporter(metrics_exporter)
+    if TRACE_FILE:
+        tracer.add_exporter(JSONLinesExporter(TRACE_FILE))
+    return memory_exporter, metrics_exporter
+
+memory_exporter, metrics_exporter = load_telemetry()
+
+# Processed corpora are saved here under a tag naming their documents, so
+# processing the same PDFs again (after a restart, in a new tab or on another
+# replica sharing the directory) reloads them instead ("" disables). A
+# snapshot is only ever found by the hashes of the files it was made from.
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "data/index_snapshots")
+SNAPSHOT_KEEP = int(os.getenv("SNAPSHOT_KEEP", "20"))
+
+def create_pipeline():
+    """RAG pipeline wired to the process-wide caches, pool and limits"""
+    return RAGPipeline(
+        embedding_cache=load_embedding_cache(),
+        embedding_pool=embedding_pool,
+        query_cache=query_cache,
+        answer_cache=answer_cache,
+        rate_limiter=rate_limiter,
+        retrieval_mode=RETRIEVAL_MODE,
+        index_type=VECTOR_INDEX
+    )
+
+def chunking_params():
+    """Chunking settings a snapshot must have been made with"""
+    processor = st.session_state.pdf_processor
+    return {"chunk_size": processor.chunk_size, "chunk_overlap": processor.chunk_overlap}
+
+def corpus_tag(hashes):
+    """Snapshot tag for a corpus of {document id: content hash}, under this model and chunking"""
+    key = json.dumps([DEFAULT_EMBEDDING_MODEL, chunking_params(), sorted(hashes.items())])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+# Every session's index and page images count against one budget; past it,
+# or after SESSION_IDLE_MINUTES without activity, idle sessions are spilled
+# to disk and reloaded when they come back (SESSION_MEMORY_MB=0 disables)
+SESSION_MEMORY_MB = int(os.getenv("SESSION_MEMORY_MB", "2048"))
+SESSION_IDLE_MINUTES = float(os.getenv("SESSION_IDLE_MINUTES", "0"))
+SESSION_SPILL_DIR = os.getenv("SESSION_SPILL_DIR")
+
+@st.cache_resource
+def load_session_governor():
+    """Create the process-wide session memory governor, if enabled"""
+    if SESSION_MEMORY_MB <= 0:
+        return None
+    governor = SessionGovernor(
+        SESSION_MEMORY_MB * 1024 * 1024,
+        page_cache=page_cache,
+        spill_dir=SESSION_SPILL_DIR,
+        idle_seconds=60 * SESSION_IDLE_MINUTES or None
+    )
+    # Streamlit never tears cached resources down, so the spill directory goes at exit
+    atexit.register(governor.close)
+    return governor
+
+session_governor = load_session_governor()
+
+# Reload this session's index if it was spilled while idle, before anything uses it
+if session_governor is not None:
+    ingest_job = st.session_state.ingest_job
+    session_governor.touch(
+        st.session_state.session_id,
+        st.session_state.rag_pipeline,
+        document_key=st.session_state.pdf_hash,
+        pinned=ingest_job is not None and ingest_job.running
+    )
+
+# Record what a finished job indexed, even if its file has left the uploader since,
+# so the corpus can still be saved and found again by content hash
+if st.session_state.ingest_job is not None and st.session_state.ingest_job.state == "done":
+    st.session_state.indexed_hashes[st.session_state.ingest_job.doc_id] = st.session_state.ingest_hash
+
 # Main app layout
 st.title("📚 AI Study Assistant")
 st.markdown("Your Personal AI Tutor for Course PDFs")
@@ -127,59 +360,226 @@ with st.sidebar:
     )
     
     if uploaded_file is not None:
-        # Save uploaded file
-        pdf_path = f"data/uploaded_pdfs/{uploaded_file.name}"
-        os.makedirs("data/uploaded_pdfs", exist_ok=True)
+        # Everything derived from the upload is keyed by its content hash, so a
+        # rerun with the same file (any widget interaction) does no file work
+        upload_started = time.perf_counter()
+        pdf_hash = st.session_state.upload_hashes.get(uploaded_file.file_id)
+        if pdf_hash is None:
+            pdf_hash = hashlib.sha256(uploaded_file.getbuffer()).hexdigest()
+            st.session_state.upload_hashes[uploaded_file.file_id] = pdf_hash
+            upload_work = "hashed"
+        else:
+            upload_work = "cached"
         
-        with open(pdf_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
+        # Save uploaded file once per distinct content
+        pdf_path = f"data/uploaded_pdfs/{pdf_hash[:16]}.pdf"
+        if not os.path.exists(pdf_path):
+            os.makedirs("data/uploaded_pdfs", exist_ok=True)
+            # Write a uniquely named file then rename, so a concurrent session
+            # never reads a partial file or writes into the same temporary one
+            fd, staging = tempfile.mkstemp(suffix=".tmp", dir="data/uploaded_pdfs")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(uploaded_file.getbuffer())
+                os.replace(staging, pdf_path)
+            finally:
+                if os.path.exists(staging):
+                    os.remove(staging)
+            upload_work = "written"
         
         st.session_state.pdf_path = pdf_path
+        st.session_state.viewer_doc = uploaded_file.name
         st.success(f"✅ Successfully uploaded: **{uploaded_file.name}**")
         
-        # Convert PDF to images using PyMuPDF (no poppler needed!)
-        with st.spinner("Converting PDF to images..."):
+        # Open the PDF for viewing; pages are rendered on demand (no poppler needed!)
+        if st.session_state.pdf_hash != pdf_hash:
             try:
-                pdf_document = fitz.open(pdf_path)
-                images = []
-                for page_num in range(len(pdf_document)):
-                    page = pdf_document[page_num]
-                    pix = page.get_pixmap(matrix=fitz.Matrix(1.5, 1.5))  # 1.5x zoom for better quality
-                    images.append(pix.tobytes("ppm"))
-                st.session_state.pdf_images = images
+                # One PyMuPDF handle serves the viewer and indexing
+                if st.session_state.page_renderer is not None:
+                    st.session_state.page_renderer.close()
+                ingest_job = st.session_state.ingest_job
+                if st.session_state.pdf_document is not None and not (
+                        ingest_job is not None and ingest_job.running
+                        and ingest_job.document is st.session_state.pdf_document):
+                    # A job still reading the old handle lets it go when it ends
+                    st.session_state.pdf_document.close()
+                st.session_state.page_renderer = None
+                st.session_state.pdf_document = None
+                pdf_document = open_pdf(pdf_path, "pymupdf")
+                st.session_state.pdf_document = pdf_document
+                st.session_state.page_renderer = PageRenderer(
+                    pdf_document,
+                    page_cache,
+                    zoom=1.5,  # 1.5x zoom for better quality
+                    prefetch_window=PAGE_PREFETCH,
+                    document_key=pdf_hash
+                )
+                st.session_state.pdf_hash = pdf_hash
                 st.session_state.current_page = 0  # Reset to first page
-                pdf_document.close()
-                st.success(f"✅ Ready for viewing · {len(st.session_state.pdf_images)} pages loaded")
+                if upload_work == "cached":
+                    upload_work = "opened"
             except Exception as e:
-                st.error(f"Error converting PDF: {str(e)}")
+                st.error(f"Error opening PDF: {str(e)}")
+        if st.session_state.pdf_document is not None:
+            st.success(f"✅ Ready for viewing · {len(st.session_state.pdf_document)} pages")
+        upload_ms = 1000 * (time.perf_counter() - upload_started)
+        tracer.record_span("upload", upload_ms / 1000, work=upload_work)
         
         # Process PDF button
         st.markdown('<div style="margin-top: 15px;"></div>', unsafe_allow_html=True)
-        if st.button("🚀 Process PDF for Q&A", use_container_width=True, type="primary", help="Extract text and create search embeddings"):
-            with st.spinner("Processing PDF..."):
-                try:
-                    # Extract and chunk text
-                    st.session_state.chunks = st.session_state.pdf_processor.process_pdf(pdf_path)
-                    
-                    # Initialize RAG pipeline
-                    st.session_state.rag_pipeline = RAGPipeline()
-                    
-                    # Ingest documents
-                    with st.spinner("Creating embeddings (this may take a minute)..."):
-                        st.session_state.rag_pipeline.ingest_documents(st.session_state.chunks)
-                    
-                    st.session_state.pdf_loaded = True
-                    st.success(f"✅ PDF processed! · {len(st.session_state.chunks)} sections extracted")
-                    st.info(f"Ready! Start asking questions about your PDF on the left →")
+        ingest_job = st.session_state.ingest_job
+        indexing = ingest_job is not None and ingest_job.running
+        # The same content under the same name is only indexed once
+        already_indexed = (
+            st.session_state.rag_pipeline is not None
+            and st.session_state.indexed_hashes.get(uploaded_file.name) == pdf_hash
+            and uploaded_file.name in st.session_state.rag_pipeline.store.documents
+        )
+        if already_indexed and not indexing:
+            st.caption("✅ This PDF is already indexed")
+        if st.button("🚀 Process PDF for Q&A", use_container_width=True, type="primary", help="Extract text and create search embeddings", disabled=indexing or already_indexed):
+            try:
+                # One pipeline per session; each processed PDF is added to its corpus
+                if st.session_state.rag_pipeline is None:
+                    st.session_state.rag_pipeline = create_pipeline()
+                pipeline = st.session_state.rag_pipeline
+                
+                # The same PDFs were processed before: reload that corpus, memory-mapped
+                hashes = {
+                    doc_id: content_hash for doc_id, content_hash in st.session_state.indexed_hashes.items()
+                    if doc_id in pipeline.store.documents
+                }
+                hashes[uploaded_file.name] = pdf_hash
+                tag = corpus_tag(hashes)
+                if SNAPSHOT_DIR and SnapshotDirectory(SNAPSHOT_DIR).tagged(tag):
+                    try:
+                        pipeline.load_snapshot(SNAPSHOT_DIR, tag=tag, chunking=chunking_params())
+                    except (FileNotFoundError, ValueError, OSError) as e:
+                        logger.warning(f"Ignoring index snapshot: {str(e)}")
+                    else:
+                        st.session_state.indexed_hashes = hashes
+                        st.session_state.saved_corpus = pipeline.store.version
+                        st.session_state.ingest_job = None
+                        st.session_state.pdf_loaded = True
+                        st.rerun()
                 
-                except Exception as e:
-                    st.error(f"❌ Error processing PDF: {str(e)}")
-                    logger.error(f"Error: {str(e)}")
+                # Index in the background; re-processing the same file replaces its earlier version
+                st.session_state.ingest_job = IngestionJob(
+                    st.session_state.rag_pipeline,
+                    st.session_state.pdf_processor,
+                    pdf_path,
+                    doc_id=uploaded_file.name,
+                    name=uploaded_file.name,
+                    document=st.session_state.pdf_document if st.session_state.pdf_hash == pdf_hash else None
+                ).start()
+                st.session_state.ingest_hash = pdf_hash
+                # Questions can be asked as soon as the first sections are indexed
+                st.session_state.pdf_loaded = True
+                st.rerun()
+            
+            except Exception as e:
+                st.error(f"❌ Error processing PDF: {str(e)}")
+                logger.error(f"Error: {str(e)}")
+    
+    # Live progress of the background indexing job, refreshed without rerunning the page
+    @st.fragment(run_every=1.0)
+    def show_ingest_progress():
+        job = st.session_state.ingest_job
+        if not job.running:
+            # Rerun the whole app once so the final status and document list update
+            st.rerun()
+        progress = job.progress()
+        st.progress(
+            progress["fraction"],
+            text=f"Indexing... page {progress['pages_done']}/{progress['pages_total']} · "
+                 f"{progress['chunks_indexed']} sections searchable"
+        )
+        if st.button("⏹️ Cancel", key="cancel_ingest", use_container_width=True):
+            job.cancel()
+    
+    ingest_job = st.session_state.ingest_job
+    if ingest_job is not None:
+        if ingest_job.running:
+            show_ingest_progress()
+            st.caption("You can already ask about the pages indexed so far.")
+        else:
+            st.session_state.last_trace_id = ingest_job.trace_id
+            progress = ingest_job.progress()
+            if ingest_job.state == "done":
+                st.success(
+                    f"✅ PDF processed! · {progress['chunks_indexed']} sections extracted "
+                    f"in {progress['elapsed']:.1f}s"
+                )
+                st.info(f"Ready! Start asking questions about your PDF on the left →")
+            elif ingest_job.state == "cancelled":
+                st.info("Indexing cancelled.")
+            else:
+                st.error(f"❌ Error processing PDF: {ingest_job.error}")
+            if ingest_job.state != "done" and len(st.session_state.rag_pipeline.store) == 0:
+                st.session_state.pdf_loaded = False
+    
+    # Documents in this session's corpus
+    if st.session_state.rag_pipeline is not None:
+        documents = st.session_state.rag_pipeline.list_documents()
+        if documents:
+            st.markdown("---")
+            st.subheader("📚 Your Documents")
+            for doc in documents:
+                col_name, col_remove = st.columns([4, 1])
+                col_name.caption(f"**{doc['name']}** · {doc['num_chunks']} sections")
+                # The document being indexed is removed by cancelling its job instead
+                if ingest_job is not None and ingest_job.running and ingest_job.doc_id == doc["id"]:
+                    continue
+                if col_remove.button("✖", key=f"remove_{doc['id']}", help="Remove from Q&A"):
+                    st.session_state.rag_pipeline.remove_document(doc["id"])
+                    st.rerun()
+        
+        # Save the corpus whenever it changed and no document is mid-indexing,
+        # tagged with its documents' content hashes (unknown ones are not saved)
+        pipeline = st.session_state.rag_pipeline
+        hashes = {doc_id: st.session_state.indexed_hashes.get(doc_id) for doc_id in pipeline.store.documents}
+        if (SNAPSHOT_DIR and hashes and None not in hashes.values()
+                and pipeline.store.version != st.session_state.saved_corpus
+                and not (ingest_job is not None and ingest_job.running)):
+            try:
+                pipeline.save_snapshot(SNAPSHOT_DIR, chunking=chunking_params(), tag=corpus_tag(hashes))
+                SnapshotDirectory(SNAPSHOT_DIR).prune(keep=SNAPSHOT_KEEP)
+            except Exception as e:
+                logger.error(f"Error saving index snapshot: {str(e)}")
+            # Not retried on every rerun after a failure; the next change tries again
+            st.session_state.saved_corpus = pipeline.store.version
+    
+    # Stage-by-stage timing of the last request
+    st.markdown("---")
+    show_debug_panel = st.checkbox(
+        "🔍 Show timing breakdown",
+        value=os.getenv("DEBUG_PANEL") == "1",
+        help="Where the time went in the last upload or question"
+    )
+    if show_debug_panel and st.session_state.last_rerun is not None:
+        last_rerun = st.session_state.last_rerun
+        st.caption(
+            f"⏱️ Previous rerun {last_rerun['ms']:.0f} ms · "
+            f"upload {last_rerun['upload_ms']:.1f} ms ({last_rerun['upload_work']})"
+        )
+    if show_debug_panel and session_governor is not None:
+        usage = session_governor.usage()
+        resident = sum(not session["evicted"] for session in usage["sessions"])
+        st.caption(
+            f"🧠 Server memory {usage['total_bytes'] / 2**20:.0f} / {usage['max_bytes'] / 2**20:.0f} MiB · "
+            f"{resident} of {len(usage['sessions'])} sessions resident · "
+            f"{usage['evictions']} evicted, {usage['restores']} restored"
+        )
     
     # Display API key warning
     if not os.getenv("GROQ_API_KEY"):
         st.error("⚠️ API Key Required - Get your FREE Groq API key at https://console.groq.com and add it to Streamlit Secrets")
 
+def go_to_page(page: int) -> None:
+    """Show a page in the viewer; the slider re-reads current_page once its own state is dropped"""
+    st.session_state.current_page = page
+    st.session_state.pop("page_slider", None)
+
 # Main content
 if st.session_state.pdf_loaded and st.session_state.rag_pipeline:
     st.markdown("---")
@@ -206,47 +606,98 @@ if st.session_state.pdf_loaded and st.session_state.rag_pipeline:
         with col_btn2:
             retrieval_slider = st.slider("Sources:", 1, 5, 3, help="Number of PDF sections to reference")
         
-        # Answer display
+        # Restrict the search to some documents when several are loaded
+        documents = st.session_state.rag_pipeline.list_documents()
+        selected_docs = None
+        if len(documents) > 1:
+            names = {doc["id"]: doc["name"] for doc in documents}
+            selected_docs = st.multiselect(
+                "Search in:",
+                options=list(names),
+                default=list(names),
+                format_func=names.get,
+                help="Only use these documents as sources"
+            )
+        
+        # Answer display, streamed token by token as the LLM produces it
+        answer_streamed = False
         if submit_button and question:
-            with st.spinner("Generating answer..."):
-                try:
-                    answer, retrieved = st.session_state.rag_pipeline.answer_question(
-                        question,
-                        system_prompt,
-                        top_k=retrieval_slider
-                    )
+            try:
+                with tracer.span("question_request", top_k=retrieval_slider) as request_span:
+                    with st.spinner("Searching your PDF..."):
+                        answer_stream, retrieved = st.session_state.rag_pipeline.answer_question_stream(
+                            question,
+                            system_prompt,
+                            top_k=retrieval_slider,
+                            doc_ids=selected_docs
+                        )
+                    
+                    st.markdown("---")
+                    st.subheader("✨ Answer")
+                    answer_placeholder = st.empty()
+                    fragments = []
+                    for fragment in answer_stream:
+                        fragments.append(fragment)
+                        answer_placeholder.markdown("".join(fragments) + "▌")
+                    answer = "".join(fragments)
+                    answer_placeholder.markdown(answer)
+                    answer_streamed = True
                     
                     # Store answer in session state
                     st.session_state.last_answer = answer
                     st.session_state.last_retrieved = retrieved
-                    
-                except Exception as e:
-                    st.error(f"❌ Error generating answer: {str(e)}")
-                    logger.error(f"Error: {str(e)}")
+                    st.session_state.last_generation_stats = dict(st.session_state.rag_pipeline.last_generation_stats)
+                    st.session_state.last_context_stats = dict(st.session_state.rag_pipeline.last_context_stats)
+                    st.session_state.last_trace_id = request_span.trace_id
+                
+            except Exception as e:
+                st.error(f"❌ Error generating answer: {str(e)}")
+                logger.error(f"Error: {str(e)}")
         
         elif submit_button and not question:
             st.warning("⚠️ Please enter a question first!")
         
         # Display stored answer if exists
         if st.session_state.last_answer:
-            st.markdown("---")
-            st.subheader("✨ Answer")
-            st.write(st.session_state.last_answer)
+            if not answer_streamed:
+                st.markdown("---")
+                st.subheader("✨ Answer")
+                st.write(st.session_state.last_answer)
+            
+            stats = st.session_state.last_generation_stats
+            if stats and stats.get("cached"):
+                st.caption(f"⚡ Answered from cache · {answer_cache.hit_rate:.0%} of questions served from cache")
+            elif stats:
+                st.caption(
+                    f"⏱️ First words in {stats['time_to_first_token']:.1f}s · "
+                    f"{stats['tokens_per_second']:.0f} tokens/s · {stats['total_time']:.1f}s total"
+                )
+            context_stats = st.session_state.last_context_stats
+            if context_stats and context_stats["tokens_saved"] > 0:
+                st.caption(
+                    f"✂️ Context sent: ~{context_stats['output_tokens']} tokens · "
+                    f"{context_stats['tokens_saved']} duplicate or over-budget tokens left out"
+                )
             
             # Display retrieved chunks
             if st.session_state.last_retrieved:
                 with st.expander(f"📖 Source Material ({len(st.session_state.last_retrieved)} sections referenced)", expanded=False):
-                    for i, (chunk, score) in enumerate(st.session_state.last_retrieved, 1):
-                        st.markdown(f"**Section {i}** · Relevance: {score:.0%}")
+                    for i, hit in enumerate(st.session_state.last_retrieved, 1):
+                        chunk, score = hit
+                        page = getattr(hit, "page", -1)
+                        st.markdown(f"**Section {i}** · Relevance: {score:.0%}" + (f" · Page {page + 1}" if page >= 0 else ""))
                         st.info(chunk[:400] + "..." if len(chunk) > 400 else chunk)
+                        # Sources from the PDF in the viewer can be opened at their page
+                        if page >= 0 and hit.doc_id == st.session_state.viewer_doc and st.session_state.page_renderer is not None:
+                            st.button(f"📄 Go to page {page + 1}", key=f"goto_{i}", on_click=go_to_page, args=(page,))
                         st.divider()
     
     # RIGHT COLUMN: PDF Viewer
     with col_right:
         st.subheader("📄 PDF Document")
         
-        if st.session_state.pdf_images:
-            total_pages = len(st.session_state.pdf_images)
+        if st.session_state.page_renderer is not None:
+            total_pages = len(st.session_state.page_renderer)
             
             # Page navigation with slider (works better than buttons)
             st.session_state.current_page = st.slider(
@@ -262,13 +713,33 @@ if st.session_state.pdf_loaded and st.session_state.rag_pipeline:
             # Display page info
             st.caption(f"Page {st.session_state.current_page + 1} of {total_pages}")
             
-            # Display the PDF image
-            if st.session_state.current_page < len(st.session_state.pdf_images):
-                image_data = st.session_state.pdf_images[st.session_state.current_page]
-                img = Image.open(BytesIO(image_data))
-                st.image(img, use_column_width=True)
+            # Render only the page being shown; neighbours are prefetched in the background
+            if st.session_state.current_page < total_pages:
+                image_data = st.session_state.page_renderer.get_page(st.session_state.current_page)
+                st.image(image_data, use_column_width=True)
         else:
             st.info("📄 PDF preview will appear here after upload")
+    
+    # Debug panel: spans of the last request, nested under their parent stage
+    if show_debug_panel and st.session_state.last_trace_id:
+        spans = memory_exporter.trace(st.session_state.last_trace_id)
+        if spans:
+            depths = {}
+            rows = []
+            for span in spans:
+                depths[span.span_id] = depths.get(span.parent_id, -1) + 1
+                rows.append({
+                    "stage": "\u2003" * depths[span.span_id] + span.name,
+                    "ms": round(1000 * span.duration, 1),
+                    "details": ", ".join(
+                        f"{key}={round(value, 3) if isinstance(value, float) else value}"
+                        for key, value in span.attributes.items() if value is not None
+                    ),
+                })
+            with st.expander(f"🔍 Last request: {spans[0].name} · {1000 * spans[0].duration:.0f} ms", expanded=True):
+                st.dataframe(rows, use_container_width=True, hide_index=True)
+            with st.expander("📈 Metrics (Prometheus format)"):
+                st.code(metrics_exporter.render(), language="text")
 
 
 else:
@@ -299,3 +770,9 @@ else:
 # Footer
 st.markdown("---")
 st.markdown("💡 Powered by Groq LLM + RAG Architecture  \n🎓 AI Study Assistant v1.0 | Made for students, by AI")
+
+# Script time of this rerun; reruns that end in st.rerun() are not counted
+rerun_seconds = time.perf_counter() - rerun_started
+tracer.record_span("rerun", rerun_seconds, upload=upload_work)
+tracer.increment("reruns", upload=upload_work)
+st.session_state.last_rerun = {"ms": 1000 * rerun_seconds, "upload_ms": upload_ms, "upload_work": upload_work}
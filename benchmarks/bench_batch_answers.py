@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Batch Answering Benchmark
+Serial answer_question loop vs concurrent answer_questions against a fake
+Groq client, with and without a client-side rate limit
+
+Usage:
+    python benchmarks/bench_batch_answers.py --questions 40 --workers 8 --rpm 300
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rag_pipeline import RAGPipeline
+from rate_limiter import RateLimiter
+from benchmarks.fake_llm import FakeGroq
+from benchmarks.synthetic import make_chunks
+
+
+def make_pipeline(chunks, args) -> RAGPipeline:
+    pipeline = RAGPipeline(api_key="benchmark")
+    pipeline.client = FakeGroq(args.first_token_delay, args.token_delay, args.answer_tokens)
+    pipeline.ingest_documents(chunks)
+    return pipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=40)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rpm", type=float, default=300, help="Requests per minute for the rate-limited run")
+    parser.add_argument("--tpm", type=float, default=None, help="Tokens per minute for the rate-limited run")
+    parser.add_argument("--first-token-delay", type=float, default=0.3)
+    parser.add_argument("--token-delay", type=float, default=0.002)
+    parser.add_argument("--answer-tokens", type=int, default=200)
+    args = parser.parse_args()
+    logging.getLogger("rag_pipeline").setLevel(logging.WARNING)
+
+    chunks = make_chunks(args.chunks)
+    questions = [f"Question {i}: explain topic {i % 17} and its consequences" for i in range(args.questions)]
+    system_prompt = "You are a tutor."
+
+    pipeline = make_pipeline(chunks, args)
+    start = time.perf_counter()
+    serial = [pipeline.answer_question(question, system_prompt)[0] for question in questions]
+    serial_time = time.perf_counter() - start
+
+    pipeline = make_pipeline(chunks, args)
+    start = time.perf_counter()
+    batch = pipeline.answer_questions(questions, system_prompt, max_workers=args.workers)
+    batch_time = time.perf_counter() - start
+
+    pipeline = make_pipeline(chunks, args)
+    pipeline.rate_limiter = RateLimiter(requests_per_minute=args.rpm, tokens_per_minute=args.tpm)
+    # Start from an empty minute so the limit, not the initial burst, sets the pace
+    pipeline.rate_limiter.requests.level = 0
+    start = time.perf_counter()
+    limited = pipeline.answer_questions(questions, system_prompt, max_workers=args.workers)
+    limited_time = time.perf_counter() - start
+
+    print(f"{'mode':<28}{'total s':>10}{'questions/s':>13}")
+    print(f"{'serial answer_question':<28}{serial_time:>10.2f}{len(questions) / serial_time:>13.1f}")
+    print(f"{f'answer_questions x{args.workers}':<28}{batch_time:>10.2f}{len(questions) / batch_time:>13.1f}")
+    print(f"{f'  limited to {args.rpm:.0f} rpm':<28}{limited_time:>10.2f}{len(questions) / limited_time:>13.1f}")
+    same = [r["answer"] for r in batch] == serial == [r["answer"] for r in limited]
+    errors = sum(r["error"] is not None for r in batch + limited)
+    print(f"Same answers in the same order: {same}, errors: {errors}")
+
+
+if __name__ == "__main__":
+    main()
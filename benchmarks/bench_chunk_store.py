@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Chunk Store Benchmark
+Memory held by chunk texts as a list of strings versus ChunkStore spans,
+and the cost of reading a chunk back
+
+Usage:
+    python benchmarks/bench_chunk_store.py --pages 2000 --chunk-size 500 --chunk-overlap 100
+"""
+
+import argparse
+import logging
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from chunk_store import ChunkStore
+from pdf_processor import PDFProcessor
+from benchmarks.synthetic import make_text
+
+
+def retained_mib(build) -> tuple:
+    """(result, MiB still allocated once build() returns)"""
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--words-per-page", type=int, default=400)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--chunk-overlap", type=int, default=100)
+    parser.add_argument("--reads", type=int, default=100_000)
+    args = parser.parse_args()
+    logging.getLogger("pdf_processor").setLevel(logging.WARNING)
+
+    processor = PDFProcessor(chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+
+    def pages():
+        return (make_text(args.words_per_page, seed=i) for i in range(args.pages))
+
+    chunk_list, list_mib = retained_mib(lambda: list(processor.iter_chunks(pages())))
+
+    def build_store():
+        store = ChunkStore()
+        for _, spans in processor.iter_chunk_batches(pages(), 256):
+            store.append_spans(0, spans)
+        return store
+
+    store, store_mib = retained_mib(build_store)
+    assert store.get_many(range(len(store))) == chunk_list
+
+    rows = np.random.default_rng(0).integers(0, len(store), size=args.reads).tolist()
+    start = time.perf_counter()
+    for row in rows:
+        chunk_list[row]
+    list_us = 1e6 * (time.perf_counter() - start) / len(rows)
+    start = time.perf_counter()
+    for row in rows:
+        store[row]
+    store_us = 1e6 * (time.perf_counter() - start) / len(rows)
+    start = time.perf_counter()
+    store.get_many(rows)
+    bulk_us = 1e6 * (time.perf_counter() - start) / len(rows)
+
+    text_chars = sum(len(segment) for segment in store.documents[0].segments)
+    print(f"{args.pages} pages, {text_chars / 1e6:.1f}M characters, {len(store)} chunks "
+          f"({args.chunk_size} chars, {args.chunk_overlap} overlap)")
+    print(f"{'layout':<16}{'MiB':>8}{'B/chunk':>9}{'us/read':>9}")
+    print(f"{'list of str':<16}{list_mib:>8.1f}{list_mib * 2**20 / len(store):>9.0f}{list_us:>9.2f}")
+    print(f"{'ChunkStore':<16}{store_mib:>8.1f}{store_mib * 2**20 / len(store):>9.0f}{store_us:>9.2f}")
+    print(f"ChunkStore.get_many: {bulk_us:.2f} us/read")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Context Packing Benchmark
+Prompt tokens and LLM time with retrieved chunks joined verbatim vs packed
+(overlaps merged, token budget applied), against a fake Groq client
+
+Usage:
+    python benchmarks/bench_context_packing.py --pages 50 --top-k 5 --budget 3000
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pdf_processor import PDFProcessor
+from rag_pipeline import RAGPipeline
+from benchmarks.fake_llm import FakeGroq
+from benchmarks.synthetic import make_pdf
+
+
+class CountingGroq(FakeGroq):
+    """FakeGroq that also records prompt sizes"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prompt_chars = 0
+        self.chat.completions.create = self._counting_create
+
+    def _counting_create(self, messages, **kwargs):
+        self.prompt_chars += sum(len(m["content"]) for m in messages)
+        return self._create(messages=messages, **kwargs)
+
+
+def run(pipeline: RAGPipeline, questions, top_k: int):
+    client = CountingGroq(first_token_delay=0.05, token_delay=0.0, answer_tokens=50)
+    pipeline.client = client
+    saved = 0
+    start = time.perf_counter()
+    for question in questions:
+        pipeline.answer_question(question, "You are a tutor.", top_k=top_k)
+        saved += pipeline.last_context_stats.get("tokens_saved", 0)
+    return time.perf_counter() - start, client.prompt_chars // 4, saved
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--questions", type=int, default=30)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--budget", type=int, default=3000, help="Context token budget when packing")
+    args = parser.parse_args()
+    for name in ("rag_pipeline", "pdf_processor", "vector_store"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        chunks = PDFProcessor(backend="pymupdf").process_pdf(make_pdf(os.path.join(tmp, "bench.pdf"), args.pages))
+    # Questions quoting the text two neighbouring chunks share, so both rank highly
+    # (as adjacent chunks do for real questions about one passage)
+    questions = [chunks[(i * 7) % (len(chunks) - 1)][-100:] for i in range(args.questions)]
+
+    print(f"{'context':<12}{'prompt tokens':>15}{'tokens saved':>14}{'seconds':>10}")
+    for label, budget, pack in (("verbatim", None, False), ("packed", args.budget, True)):
+        pipeline = RAGPipeline(api_key="benchmark", context_token_budget=budget)
+        pipeline.ingest_documents(chunks)
+        if not pack:
+            # Baseline: the chunks exactly as retrieved
+            pipeline._pack_context = lambda retrieved: [chunk for chunk, _ in retrieved]
+        elapsed, prompt_tokens, saved = run(pipeline, questions, args.top_k)
+        print(f"{label:<12}{prompt_tokens:>15}{saved:>14}{elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
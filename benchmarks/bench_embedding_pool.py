@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Embedding Pool Benchmark
+Chunks/second of single-process encoding against EmbeddingPool at
+several process counts, with pool start-up (one model load per worker)
+timed separately
+
+Usage:
+    python benchmarks/bench_embedding_pool.py --chunks 20000 --processes 4 8 16 --threads 2
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from embedding_pool import EmbeddingPool
+from model_registry import DEFAULT_EMBEDDING_MODEL, get_embedding_model
+from benchmarks.synthetic import make_chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=20_000)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--processes", type=int, nargs="+", default=[2, 4, 8])
+    parser.add_argument("--threads", type=int, default=1, help="Torch threads per worker")
+    parser.add_argument("--shard-size", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+    for name in ("embedding_pool", "model_registry"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    texts = make_chunks(args.chunks, args.chunk_size)
+    model = get_embedding_model(DEFAULT_EMBEDDING_MODEL)
+    model.encode(["warm-up"], show_progress_bar=False)
+
+    start = time.perf_counter()
+    model.encode(texts, batch_size=args.batch_size, normalize_embeddings=True, show_progress_bar=False)
+    single_s = time.perf_counter() - start
+
+    print(f"{args.chunks} chunks of ~{args.chunk_size} characters")
+    print(f"{'mode':<22}{'start-up s':>11}{'encode s':>10}{'chunks/s':>10}{'speedup':>9}")
+    print(f"{'single process':<22}{'-':>11}{single_s:>10.2f}{args.chunks / single_s:>10.0f}{1.0:>8.1f}x")
+
+    for processes in args.processes:
+        with EmbeddingPool(DEFAULT_EMBEDDING_MODEL, processes, args.threads, min_chunks=0,
+                           shard_size=args.shard_size, batch_size=args.batch_size) as pool:
+            # One shard per worker starts every process and loads its model
+            start = time.perf_counter()
+            pool.encode(texts[:args.shard_size * processes])
+            startup_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            pool.encode(texts)
+            encode_s = time.perf_counter() - start
+        label = f"pool {processes}x{args.threads}"
+        print(f"{label:<22}{startup_s:>11.2f}{encode_s:>10.2f}{args.chunks / encode_s:>10.0f}"
+              f"{single_s / encode_s:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
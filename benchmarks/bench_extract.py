@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+PDF Extraction Benchmark
+Per-page text extraction throughput of each PDFProcessor backend
+
+Usage:
+    python benchmarks/bench_extract.py --pages 50 200
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pdf_processor import BACKENDS, PDFProcessor
+from benchmarks.synthetic import make_pdf
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--words-per-page", type=int, default=400)
+    parser.add_argument("--workers", type=int, default=1, help="Extraction processes (0 = all cores)")
+    args = parser.parse_args()
+    logging.getLogger("pdf_processor").setLevel(logging.WARNING)
+    
+    print(f"{'pages':>7}{'backend':>10}{'seconds':>10}{'pages/sec':>12}{'chars':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_pages in args.pages:
+            pdf_path = make_pdf(os.path.join(tmp, f"synthetic_{num_pages}.pdf"), num_pages, args.words_per_page)
+            for backend in BACKENDS:
+                processor = PDFProcessor(backend=backend, workers=args.workers)
+                start = time.perf_counter()
+                text = processor.extract_text_from_pdf(pdf_path)
+                elapsed = time.perf_counter() - start
+                print(f"{num_pages:>7}{backend:>10}{elapsed:>10.2f}{num_pages / elapsed:>12.1f}{len(text):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Hybrid Retrieval Benchmark
+Recall@k and query latency of dense, lexical (BM25) and hybrid search
+
+The synthetic corpus has topic clusters of pseudo-word text with matching
+clustered embeddings, and every chunk carries a unique course code. Two
+query sets are scored:
+
+    code     "what does <code> cover" with an embedding near the topic only;
+             embeddings cannot tell the chunks of a topic apart, keywords can
+    passage  a few topic words with an embedding close to one chunk;
+             keywords match the whole topic, embeddings single out the chunk
+
+Usage:
+    python benchmarks/bench_hybrid.py --chunks 10000 100000 --top-k 5
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from vector_index import normalize_rows
+from vector_store import RETRIEVAL_MODES, VectorStore
+
+
+def make_corpus(num_chunks: int, dim: int, num_topics: int, words_per_chunk: int,
+                rng: np.random.Generator) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray, List[List[str]]]:
+    """
+    Chunks of topic text, each tagged with a unique course code
+
+    Returns:
+        Tuple of (texts, vectors, topic per chunk, topic centres, words per topic)
+    """
+    syllables = ["ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "ze", "pu", "dra", "fen", "gor", "hul"]
+    vocabulary = sorted({"".join(rng.choice(syllables, size=3)) for _ in range(20_000)})
+    # Zipf-like word popularity, so some words are common across topics
+    popularity = 1 / np.arange(1, len(vocabulary) + 1)
+    popularity /= popularity.sum()
+    topic_words = [list(rng.choice(vocabulary, size=30, replace=False, p=popularity)) for _ in range(num_topics)]
+
+    centres = normalize_rows(rng.standard_normal((num_topics, dim)))
+    topics = rng.integers(0, num_topics, size=num_chunks)
+    offsets = rng.standard_normal((num_chunks, dim)).astype(np.float32) * (1.2 / np.sqrt(dim))
+    vectors = normalize_rows(centres[topics] + offsets)
+
+    texts = []
+    for i, topic in enumerate(topics):
+        words = rng.choice(topic_words[topic], size=words_per_chunk)
+        texts.append(f"{course_code(i)} " + " ".join(words))
+    return texts, vectors, topics, centres, topic_words
+
+
+def course_code(i: int) -> str:
+    return f"BIO-{i:06d}"
+
+
+def make_queries(num_queries: int, texts: List[str], vectors: np.ndarray, topics: np.ndarray,
+                 centres: np.ndarray, topic_words: List[List[str]],
+                 rng: np.random.Generator) -> Dict[str, Tuple[List[str], np.ndarray, np.ndarray]]:
+    """Query sets as {name: (query texts, query vectors, target chunk per query)}"""
+    dim = vectors.shape[1]
+    targets = rng.choice(len(texts), size=num_queries, replace=False)
+
+    code_texts = [f"What does {course_code(t)} cover?" for t in targets]
+    code_vectors = normalize_rows(
+        centres[topics[targets]] + rng.standard_normal((num_queries, dim)) * (1.0 / np.sqrt(dim))
+    )
+
+    passage_texts = [" ".join(rng.choice(topic_words[topics[t]], size=4)) for t in targets]
+    passage_vectors = normalize_rows(
+        vectors[targets] + rng.standard_normal((num_queries, dim)) * (0.3 / np.sqrt(dim))
+    )
+    return {
+        "code": (code_texts, code_vectors, targets),
+        "passage": (passage_texts, passage_vectors, targets),
+    }
+
+
+def run(store: VectorStore, texts: List[str], query_texts: List[str], query_vectors: np.ndarray,
+        targets: np.ndarray, top_k: int, mode: str) -> Tuple[float, float]:
+    """(recall@k, mean ms/query) for single-query searches in one mode"""
+    hits = 0
+    start = time.perf_counter()
+    for text, vector, target in zip(query_texts, query_vectors, targets):
+        results = store.search(vector[np.newaxis, :], top_k, query_texts=[text], mode=mode)[0]
+        hits += any(chunk == texts[target] for chunk, _ in results)
+    elapsed = time.perf_counter() - start
+    return hits / len(targets), 1000 * elapsed / len(targets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--topics", type=int, default=1_000)
+    parser.add_argument("--words-per-chunk", type=int, default=60)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--candidates", type=int, default=100, help="BM25 matches rescored in hybrid mode")
+    args = parser.parse_args()
+    logging.getLogger("vector_store").setLevel(logging.WARNING)
+
+    print(f"{'chunks':>8}  {'queries':<9}{'mode':<9}{'recall@' + str(args.top_k):>10}{'ms/query':>10}")
+    for num_chunks in args.chunks:
+        rng = np.random.default_rng(0)
+        texts, vectors, topics, centres, topic_words = make_corpus(
+            num_chunks, args.dim, args.topics, args.words_per_chunk, rng
+        )
+        store = VectorStore(args.dim, hybrid_candidates=args.candidates)
+        start = time.perf_counter()
+        store.add("corpus", texts, vectors)
+        ingest_s = time.perf_counter() - start
+
+        query_sets = make_queries(args.queries, texts, vectors, topics, centres, topic_words, rng)
+        for name, (query_texts, query_vectors, targets) in query_sets.items():
+            for mode in RETRIEVAL_MODES:
+                recall, ms = run(store, texts, query_texts, query_vectors, targets, args.top_k, mode)
+                print(f"{num_chunks:>8}  {name:<9}{mode:<9}{recall:>10.3f}{ms:>10.3f}")
+        print(f"{num_chunks:>8}  ingest {ingest_s:.2f}s, BM25 postings {store.lexical.nbytes / 2**20:.1f} MiB, "
+              f"vectors {store.index.vectors.nbytes / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
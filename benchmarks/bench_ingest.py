@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Ingestion Benchmark
+Compares per-chunk embedding against batched matrix ingestion
+
+Usage:
+    python benchmarks/bench_ingest.py --chunks 2000 --batch-sizes 16 64 256
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rag_pipeline import RAGPipeline
+from benchmarks.synthetic import make_chunks
+
+
+def bench_per_chunk(pipeline: RAGPipeline, chunks) -> float:
+    """Original ingestion path: one encode call and one list per chunk"""
+    start = time.perf_counter()
+    embeddings = []
+    for chunk in chunks:
+        embeddings.append(pipeline.get_embedding(chunk))
+    return time.perf_counter() - start
+
+
+def bench_batched(pipeline: RAGPipeline, chunks, batch_size: int) -> float:
+    """Batched ingestion into a float32 matrix"""
+    start = time.perf_counter()
+    pipeline.ingest_documents(chunks, batch_size=batch_size)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=1000, help="Number of synthetic chunks")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Characters per chunk")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[16, 64, 256])
+    args = parser.parse_args()
+    logging.getLogger("rag_pipeline").setLevel(logging.WARNING)
+    
+    chunks = make_chunks(args.chunks, args.chunk_size)
+    pipeline = RAGPipeline(api_key="benchmark")
+    
+    # Warm up the model so load and first-call costs are not measured
+    pipeline.embed_texts(chunks[:8])
+    
+    print(f"{'mode':<20}{'seconds':>10}{'chunks/sec':>14}{'MB':>10}")
+    
+    elapsed = bench_per_chunk(pipeline, chunks)
+    list_mb = args.chunks * (pipeline.embedding_dim * 32 + 56) / 1e6  # float objects + list header
+    print(f"{'per-chunk (list)':<20}{elapsed:>10.2f}{args.chunks / elapsed:>14.1f}{list_mb:>10.1f}")
+    
+    for batch_size in args.batch_sizes:
+        elapsed = bench_batched(pipeline, chunks, batch_size)
+        print(f"{f'batched ({batch_size})':<20}{elapsed:>10.2f}{args.chunks / elapsed:>14.1f}"
+              f"{pipeline.embeddings.nbytes / 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Background Ingestion Benchmark
+How soon a PDF becomes searchable with IngestionJob compared to blocking
+process_pdf + add_document, and what the background pipeline costs in total
+
+Usage:
+    python benchmarks/bench_ingest_job.py --pages 50 300
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ingestion_jobs import IngestionJob
+from pdf_processor import PDFProcessor
+from rag_pipeline import RAGPipeline
+from benchmarks.synthetic import make_pdf
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 300])
+    parser.add_argument("--words-per-page", type=int, default=400)
+    parser.add_argument("--backend", default="pymupdf", help="PDF extraction backend")
+    args = parser.parse_args()
+    for name in ("rag_pipeline", "pdf_processor", "vector_store", "ingestion_jobs"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    processor = PDFProcessor(backend=args.backend)
+    # Load the embedding model before timing anything
+    RAGPipeline(api_key="benchmark").embed_queries(["warm-up"])
+
+    print(f"{'pages':>6}{'blocking s':>12}{'first search s':>16}{'job total s':>13}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_pages in args.pages:
+            pdf_path = make_pdf(os.path.join(tmp, f"synthetic-{num_pages}.pdf"), num_pages, args.words_per_page)
+
+            pipeline = RAGPipeline(api_key="benchmark")
+            start = time.perf_counter()
+            pipeline.add_document(processor.process_pdf(pdf_path), doc_id="book")
+            blocking_s = time.perf_counter() - start
+
+            pipeline = RAGPipeline(api_key="benchmark")
+            start = time.perf_counter()
+            job = IngestionJob(pipeline, processor, pdf_path, doc_id="book").start()
+            while job.running and len(pipeline.store) == 0:
+                time.sleep(0.001)
+            first_s = time.perf_counter() - start
+            job.wait()
+            total_s = time.perf_counter() - start
+            if job.state != "done":
+                raise RuntimeError(f"Job {job.state}: {job.error}")
+
+            print(f"{num_pages:>6}{blocking_s:>12.2f}{first_s:>16.2f}{total_s:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
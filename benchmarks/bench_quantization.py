@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Quantization Benchmark
+Memory, recall@k and query latency of int8 and binary vector storage
+against the exact float32 index
+
+Usage:
+    python benchmarks/bench_quantization.py --chunks 200000 --rescore-factor 4 10 40
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from vector_index import create_index
+from benchmarks.eval_ann import clustered_vectors, mean_query_ms, recall_at_k
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--topics", type=int, default=2_000, help="Topic clusters in the synthetic corpus")
+    parser.add_argument("--noise", type=float, default=1.2)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--rescore-factor", type=int, nargs="+", default=[4, 10, 40],
+                        help="Candidates rescored per result from the on-disk float vectors")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = clustered_vectors(args.chunks + args.queries, args.dim, args.topics, args.noise, rng)
+    vectors, queries = vectors[:args.chunks], vectors[args.chunks:]
+
+    exact = create_index("exact", args.dim)
+    exact.build(vectors, normalized=True)
+    _, truth = exact.search(queries, args.top_k, normalized=True)
+
+    print(f"{args.chunks} chunks, {args.queries} queries, recall@{args.top_k}")
+    print(f"{'index':<20}{'B/vector':>10}{'MiB per 1M':>12}{'recall':>9}{'ms/query':>10}")
+
+    def report(label: str, index) -> None:
+        _, found = index.search(queries, args.top_k, normalized=True)
+        ms = mean_query_ms(index, queries, args.top_k)
+        per_vector = index.nbytes / len(index)
+        print(f"{label:<20}{per_vector:>10.0f}{per_vector * 1e6 / 2**20:>12.0f}"
+              f"{recall_at_k(truth, found):>9.3f}{ms:>10.3f}")
+
+    report("exact float32", exact)
+    with tempfile.TemporaryDirectory() as vector_dir:
+        for index_type in ("int8", "binary"):
+            index = create_index(index_type, args.dim, rescore=False, vector_dir=vector_dir)
+            index.build(vectors, normalized=True)
+            report(index_type, index)
+            index.rescore = True
+            for factor in args.rescore_factor:
+                index.rescore_factor = factor
+                report(f"{index_type} rescore x{factor}", index)
+            index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Query Cache Benchmark
+Latency and LLM calls for a class asking repeated and reworded questions,
+with and without the answer cache
+
+Usage:
+    python benchmarks/bench_query_cache.py --questions 200 --semantic-threshold 0.9
+"""
+
+import argparse
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from query_cache import AnswerCache, LRUCache
+from rag_pipeline import RAGPipeline
+from benchmarks.fake_llm import FakeGroq
+from benchmarks.synthetic import make_chunks
+
+TOPICS = [
+    "photosynthesis", "cell respiration", "mitosis", "the krebs cycle", "enzyme kinetics",
+    "dna replication", "protein synthesis", "natural selection", "osmosis", "the nervous system",
+]
+TEMPLATES = [
+    "What is {}?",
+    "what is {} ?",
+    "Can you explain {}?",
+    "Explain {} in simple terms",
+]
+
+
+def make_questions(count: int, seed: int = 0):
+    """Questions drawn from a few topics, phrased a few ways, as a class would ask them"""
+    rng = random.Random(seed)
+    return [rng.choice(TEMPLATES).format(rng.choice(TOPICS)) for _ in range(count)]
+
+
+def run(pipeline: RAGPipeline, questions):
+    client = FakeGroq(first_token_delay=0.05, token_delay=0.001, answer_tokens=100)
+    pipeline.client = client
+    start = time.perf_counter()
+    for question in questions:
+        pipeline.answer_question(question, "You are a tutor.")
+    return time.perf_counter() - start, client.calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--semantic-threshold", type=float, default=0.9)
+    args = parser.parse_args()
+    logging.getLogger("rag_pipeline").setLevel(logging.WARNING)
+
+    questions = make_questions(args.questions)
+    chunks = make_chunks(args.chunks)
+    configs = [
+        ("no cache", None),
+        ("exact", AnswerCache()),
+        ("semantic", AnswerCache(semantic_threshold=args.semantic_threshold)),
+    ]
+
+    print(f"{'answer cache':<14}{'total s':>10}{'ms/question':>13}{'LLM calls':>11}{'hit rate':>10}{'query emb hit':>15}")
+    for label, answer_cache in configs:
+        pipeline = RAGPipeline(api_key="benchmark", query_cache=LRUCache(), answer_cache=answer_cache)
+        pipeline.ingest_documents(chunks)
+        elapsed, calls = run(pipeline, questions)
+        hit_rate = f"{answer_cache.hit_rate:.0%}" if answer_cache is not None else "-"
+        print(
+            f"{label:<14}{elapsed:>10.2f}{1000 * elapsed / len(questions):>13.1f}{calls:>11}"
+            f"{hit_rate:>10}{pipeline.query_cache.hit_rate:>15.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Search Latency Benchmark
+Compares the original cosine_similarity + argsort path against VectorIndex
+
+Usage:
+    python benchmarks/bench_search.py --sizes 1000 10000 100000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from vector_index import VectorIndex
+
+
+def legacy_search(embeddings: list, query: np.ndarray, top_k: int) -> np.ndarray:
+    """Original per-query path from retrieve_relevant_chunks"""
+    embeddings_array = np.array(embeddings)
+    similarities = cosine_similarity(query.reshape(1, -1), embeddings_array)[0]
+    return np.argsort(similarities)[::-1][:top_k]
+
+
+def time_ms(fn, repeats: int) -> float:
+    """Median wall time of fn() in milliseconds"""
+    fn()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return 1000 * float(np.median(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--batch", type=int, default=32, help="Queries per batched search call")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((args.batch, args.dim)).astype(np.float32)
+    
+    print(f"{'chunks':>8}{'legacy ms':>12}{'index ms':>12}{'speedup':>10}{'batch ms/q':>13}")
+    for size in args.sizes:
+        vectors = rng.standard_normal((size, args.dim)).astype(np.float32)
+        index = VectorIndex(args.dim)
+        index.build(vectors)
+        
+        # The original code kept a list of Python float lists
+        legacy_store = vectors.tolist()
+        legacy = time_ms(lambda: legacy_search(legacy_store, queries[0], args.top_k), max(3, args.repeats // 4))
+        del legacy_store
+        
+        single = time_ms(lambda: index.search(queries[0], args.top_k), args.repeats)
+        batched = time_ms(lambda: index.search(queries, args.top_k), args.repeats) / args.batch
+        print(f"{size:>8}{legacy:>12.2f}{single:>12.3f}{legacy / single:>9.0f}x{batched:>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Session Governor Benchmark
+Memory held by many sessions with and without a budget, and the cost of
+evicting a session to disk and restoring it
+
+Each simulated session holds its own corpus of --chunks chunks (vectors,
+BM25 postings and chunk texts) and is touched once, oldest first, the way
+a lecture hall of students opens the app one after another.
+
+Usage:
+    python benchmarks/bench_sessions.py --sessions 40 --chunks 5000 --budget-mb 64
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rag_pipeline import RAGPipeline
+from session_governor import SessionGovernor
+from vector_index import normalize_rows
+
+
+def make_session(i: int, chunks: int, words: list) -> RAGPipeline:
+    """A pipeline holding its own corpus (random vectors stand in for embeddings)"""
+    rng = np.random.default_rng(i)
+    pipeline = RAGPipeline(api_key="benchmark")
+    texts = [f"session {i} " + " ".join(rng.choice(words, size=60)) for _ in range(chunks)]
+    vectors = normalize_rows(rng.standard_normal((chunks, pipeline.embedding_dim)).astype(np.float32))
+    pipeline.store.add(f"doc{i}", texts, vectors)
+    return pipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=40)
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--budget-mb", type=int, default=64)
+    args = parser.parse_args()
+    for name in ("rag_pipeline", "vector_store", "index_snapshot", "session_governor"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    words = [f"term{i}" for i in range(5_000)]
+    governor = SessionGovernor(args.budget_mb * 2**20, min_idle_seconds=0)
+    sessions = []
+    evict_seconds = []
+    unbounded = 0
+    for i in range(args.sessions):
+        session = make_session(i, args.chunks, words)
+        sessions.append(session)
+        unbounded += session.store.nbytes
+        evictions = governor.evictions
+        start = time.perf_counter()
+        governor.touch(str(i), session)
+        if governor.evictions > evictions:
+            evict_seconds.append((time.perf_counter() - start) / (governor.evictions - evictions))
+
+    usage = governor.usage()
+    resident = sum(not s["evicted"] for s in usage["sessions"])
+
+    # The first session comes back: its corpus is reloaded before it is used
+    dim = sessions[0].embedding_dim
+    query = normalize_rows(np.random.default_rng(1).standard_normal((1, dim)).astype(np.float32))
+    governor.max_bytes = 2**62
+    start = time.perf_counter()
+    governor.touch("0", sessions[0])
+    restore_s = time.perf_counter() - start
+    start = time.perf_counter()
+    sessions[0].store.search(query, 5)
+    first_search_s = time.perf_counter() - start
+
+    print(f"{args.sessions} sessions x {args.chunks} chunks x {dim} dims")
+    print(f"{'':<22}{'MiB':>8}")
+    print(f"{'no governor':<22}{unbounded / 2**20:>8.0f}")
+    print(f"{'budget ' + str(args.budget_mb) + ' MiB':<22}{usage['total_bytes'] / 2**20:>8.0f}"
+          f"   ({resident} resident, {usage['evictions']} evicted)")
+    if evict_seconds:
+        print(f"evict: {1000 * np.median(evict_seconds):.0f} ms per session (median)")
+    print(f"restore: {1000 * restore_s:.0f} ms, first search after restore {1000 * first_search_s:.1f} ms")
+    governor.close()
+
+
+if __name__ == "__main__":
+    main()
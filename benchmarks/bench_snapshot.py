@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Index Snapshot Benchmark
+Save time, reload time and per-process memory of on-disk index snapshots
+
+Compares three ways a restarted server gets its corpus back (embedding
+cost excluded, so "rebuild" is a lower bound for re-processing the PDF):
+
+    rebuild  add the chunk texts and vectors to an empty store
+    read     load the snapshot into private memory
+    mmap     memory-map the snapshot (the default)
+
+Then loads the snapshot in several processes at once and reports how much
+of each one's resident memory is private versus shared file pages.
+
+Usage:
+    python benchmarks/bench_snapshot.py --chunks 100000 --processes 3
+"""
+
+import argparse
+import logging
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from index_snapshot import SnapshotDirectory
+from vector_index import normalize_rows
+from vector_store import VectorStore
+
+
+def memory_status() -> dict:
+    """RssAnon / RssFile of this process in MiB (Linux)"""
+    status = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(("RssAnon", "RssFile")):
+                name, value, _ = line.split()
+                status[name.rstrip(":")] = int(value) / 1024
+    return status
+
+
+def child(directory: str, query: np.ndarray, ready, results) -> None:
+    logging.getLogger("vector_store").setLevel(logging.WARNING)
+    before = memory_status()
+    store = VectorStore.load(directory)
+    # Touch every vector and posting, as real queries eventually would
+    store.search(query[np.newaxis, :], 5, query_texts=["lecture 7 entropy"], mode="hybrid")
+    store.search(query[np.newaxis, :], 5)
+    after = memory_status()
+    results.put({key: after[key] - before[key] for key in after})
+    ready.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--processes", type=int, default=3)
+    args = parser.parse_args()
+    for name in ("vector_store", "index_snapshot"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    rng = np.random.default_rng(0)
+    words = [f"term{i}" for i in range(5_000)]
+    texts = [f"lecture {i % 40} " + " ".join(rng.choice(words, size=60)) for i in range(args.chunks)]
+    vectors = normalize_rows(rng.standard_normal((args.chunks, args.dim)))
+
+    start = time.perf_counter()
+    store = VectorStore(args.dim)
+    store.add("corpus", texts, vectors)
+    rebuild_s = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as root:
+        snapshots = SnapshotDirectory(root)
+        start = time.perf_counter()
+        path = snapshots.write("bench", {}, store.save)
+        save_s = time.perf_counter() - start
+        size = sum(f.stat().st_size for f in Path(path).iterdir()) / 2**20
+
+        start = time.perf_counter()
+        VectorStore.load(path, mmap=False)
+        read_s = time.perf_counter() - start
+        start = time.perf_counter()
+        VectorStore.load(path)
+        mmap_s = time.perf_counter() - start
+
+        print(f"{args.chunks} chunks x {args.dim} dims, snapshot {size:.0f} MiB, saved in {save_s:.2f}s")
+        print(f"{'reload':<10}{'seconds':>9}")
+        for label, seconds in (("rebuild", rebuild_s), ("read", read_s), ("mmap", mmap_s)):
+            print(f"{label:<10}{seconds:>9.3f}")
+
+        context = multiprocessing.get_context("spawn")
+        ready, results = context.Event(), context.Queue()
+        query = vectors[0]
+        workers = [context.Process(target=child, args=(path, query, ready, results)) for _ in range(args.processes)]
+        for worker in workers:
+            worker.start()
+        usage = [results.get() for _ in workers]
+        ready.set()
+        for worker in workers:
+            worker.join()
+
+        print(f"\n{args.processes} processes serving the snapshot, MiB added per process by load + search")
+        print(f"{'process':<10}{'private':>9}{'shared file':>13}")
+        for i, rss in enumerate(usage):
+            print(f"{i:<10}{rss['RssAnon']:>9.0f}{rss['RssFile']:>13.0f}")
+        print(f"vectors alone: {vectors.nbytes / 2**20:.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Streaming Benchmark
+Perceived latency of blocking vs streamed answers against a fake Groq client
+
+Usage:
+    python benchmarks/bench_streaming.py --first-token-delay 0.3 --token-delay 0.01
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from rag_pipeline import RAGPipeline
+from benchmarks.fake_llm import FakeGroq
+from benchmarks.synthetic import make_chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--first-token-delay", type=float, default=0.3)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    parser.add_argument("--answer-tokens", type=int, default=300)
+    args = parser.parse_args()
+    logging.getLogger("rag_pipeline").setLevel(logging.WARNING)
+    
+    pipeline = RAGPipeline(api_key="benchmark")
+    pipeline.client = FakeGroq(args.first_token_delay, args.token_delay, args.answer_tokens)
+    pipeline.ingest_documents(make_chunks(200))
+    question = "What is the role of chlorophyll in photosynthesis?"
+    
+    start = time.perf_counter()
+    answer, _ = pipeline.answer_question(question, "You are a tutor.")
+    blocking = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    stream, _ = pipeline.answer_question_stream(question, "You are a tutor.")
+    first_visible = None
+    streamed = ""
+    for fragment in stream:
+        if first_visible is None:
+            first_visible = time.perf_counter() - start
+        streamed += fragment
+    total = time.perf_counter() - start
+    stats = pipeline.last_generation_stats
+    
+    print(f"{'mode':<12}{'first text s':>14}{'complete s':>12}{'tokens/s':>10}")
+    print(f"{'blocking':<12}{blocking:>14.2f}{blocking:>12.2f}{'-':>10}")
+    print(f"{'streaming':<12}{first_visible:>14.2f}{total:>12.2f}{stats['tokens_per_second']:>10.1f}")
+    print(f"LLM time to first token: {stats['time_to_first_token']:.2f}s, same answer: {streamed == answer}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Cold-Start Timing
+Import time of each module and first-render time of app.py, each measured
+in a fresh interpreter so nothing is already cached in sys.modules
+
+Usage:
+    python benchmarks/cold_start.py
+    python benchmarks/cold_start.py --json cold_start.json --budget-ms 1500
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+MODULES = [
+    "telemetry",
+    "vector_index",
+    "chunk_store",
+    "lexical_index",
+    "vector_store",
+    "embedding_cache",
+    "embedding_pool",
+    "index_snapshot",
+    "ingestion_jobs",
+    "page_renderer",
+    "query_cache",
+    "rate_limiter",
+    "session_governor",
+    "context_packer",
+    "model_registry",
+    "pdf_processor",
+    "rag_pipeline",
+]
+
+# Libraries the welcome screen must not pay for
+HEAVY_MODULES = ["torch", "sentence_transformers", "sklearn", "groq", "fitz", "PyPDF2", "PIL"]
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": 1000 * elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+RENDER_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+harness_ms = 1000 * (time.perf_counter() - start)
+start = time.perf_counter()
+app = AppTest.from_file("app.py", default_timeout=120).run()
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "ms": 1000 * elapsed,
+    "harness_ms": harness_ms,
+    "errors": [str(e.value) for e in app.exception],
+    "heavy": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def run_probe(code: str, env: dict) -> dict:
+    """Run a probe in a fresh interpreter and parse its JSON result line"""
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=3, help="Fresh interpreters per measurement (best is kept)")
+    parser.add_argument("--json", help="Also write results to this file")
+    parser.add_argument("--budget-ms", type=float, help="Exit non-zero if any measurement exceeds this")
+    parser.add_argument("--skip-render", action="store_true", help="Only time module imports")
+    parser.add_argument("--warm-up", action="store_true", help="Leave the background model warm-up enabled")
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=str(PROJECT_ROOT))
+    if not args.warm_up:
+        env["EMBEDDING_WARMUP"] = "0"
+
+    results = {}
+    for module in MODULES:
+        runs = [run_probe(IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES), env) for _ in range(args.repeats)]
+        results[f"import {module}"] = min(runs, key=lambda r: r["ms"])
+
+    if not args.skip_render:
+        runs = [run_probe(RENDER_PROBE.format(heavy=HEAVY_MODULES), env) for _ in range(args.repeats)]
+        results["first render app.py"] = min(runs, key=lambda r: r["ms"])
+
+    print(f"{'measurement':<30}{'ms':>10}  heavy modules loaded")
+    for name, result in results.items():
+        print(f"{name:<30}{result['ms']:>10.1f}  {', '.join(result['heavy']) or '-'}")
+        for error in result.get("errors", []):
+            print(f"{'':<30}  error: {error}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.budget_ms is not None:
+        over = [name for name, result in results.items() if result["ms"] > args.budget_ms]
+        if over:
+            print(f"Over the {args.budget_ms:.0f} ms budget: {', '.join(over)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+ANN Evaluation
+Recall@k and query latency of IVFIndex settings against the exact VectorIndex
+
+Usage:
+    python benchmarks/eval_ann.py --chunks 200000 --n-lists 256 1024 --n-probe 1 4 16 64
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from vector_index import IVFIndex, VectorIndex, normalize_rows
+
+
+def clustered_vectors(n: int, dim: int, n_topics: int, noise: float, rng: np.random.Generator) -> np.ndarray:
+    """Unit vectors drawn around random topic centres, like embeddings of a course library"""
+    centres = normalize_rows(rng.standard_normal((n_topics, dim)))
+    topics = rng.integers(0, n_topics, size=n)
+    offsets = rng.standard_normal((n, dim)).astype(np.float32) * (noise / np.sqrt(dim))
+    return normalize_rows(centres[topics] + offsets)
+
+
+def mean_query_ms(index, queries: np.ndarray, top_k: int, **kwargs) -> float:
+    """Mean single-query latency in milliseconds"""
+    start = time.perf_counter()
+    for query in queries:
+        index.search(query, top_k, normalized=True, **kwargs)
+    return 1000 * (time.perf_counter() - start) / len(queries)
+
+
+def recall_at_k(truth: np.ndarray, found: np.ndarray) -> float:
+    """Fraction of the exact top-k found by the approximate search"""
+    hits = sum(len(np.intersect1d(t, f)) for t, f in zip(truth, found))
+    return hits / truth.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--topics", type=int, default=2_000, help="Topic clusters in the synthetic corpus")
+    parser.add_argument("--noise", type=float, default=1.2,
+                        help="Off-topic noise norm; 1.2 gives same-topic cosine similarity around 0.4")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--n-lists", type=int, nargs="+", default=[512, 2048])
+    parser.add_argument("--n-probe", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64])
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    vectors = clustered_vectors(args.chunks + args.queries, args.dim, args.topics, args.noise, rng)
+    vectors, queries = vectors[:args.chunks], vectors[args.chunks:]
+    
+    exact = VectorIndex(args.dim)
+    exact.build(vectors, normalized=True)
+    _, truth = exact.search(queries, args.top_k, normalized=True)
+    exact_ms = mean_query_ms(exact, queries, args.top_k)
+    
+    print(f"{args.chunks} chunks, {args.queries} queries, recall@{args.top_k}")
+    print(f"{'index':<22}{'build s':>9}{'recall':>9}{'ms/query':>10}{'speedup':>9}")
+    print(f"{'exact':<22}{'-':>9}{1.0:>9.3f}{exact_ms:>10.3f}{1.0:>8.1f}x")
+    
+    for n_lists in args.n_lists:
+        ivf = IVFIndex(args.dim, n_lists=n_lists)
+        start = time.perf_counter()
+        ivf.build(vectors, normalized=True)
+        build_s = time.perf_counter() - start
+        
+        for n_probe in args.n_probe:
+            if n_probe > n_lists:
+                continue
+            _, found = ivf.search(queries, args.top_k, normalized=True, n_probe=n_probe)
+            ms = mean_query_ms(ivf, queries, args.top_k, n_probe=n_probe)
+            label = f"ivf lists={n_lists} probe={n_probe}"
+            print(f"{label:<22}{build_s:>9.1f}{recall_at_k(truth, found):>9.3f}{ms:>10.3f}{exact_ms / ms:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Fake Groq Client
+Local stand-in for groq.Groq that produces answers with realistic timing
+"""
+
+import time
+from types import SimpleNamespace
+from typing import Iterator, List
+
+
+class FakeGroq:
+    """
+    Mimics client.chat.completions.create, blocking and streaming
+
+    The answer is built from the words of the prompt, so it varies with
+    the question. Streaming waits first_token_delay before the first chunk
+    and token_delay between chunks; the blocking call waits for the sum.
+    """
+
+    def __init__(self, first_token_delay: float = 0.3, token_delay: float = 0.01, answer_tokens: int = 200):
+        """
+        Args:
+            first_token_delay: Seconds before the first token (queueing + prompt processing)
+            token_delay: Seconds between tokens
+            answer_tokens: Tokens per answer (capped by max_tokens)
+        """
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.answer_tokens = answer_tokens
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _tokens(self, messages: List[dict], max_tokens: int) -> List[str]:
+        words = messages[-1]["content"].split() or ["answer"]
+        count = min(self.answer_tokens, max_tokens)
+        return [words[i % len(words)] + " " for i in range(count)]
+
+    def _create(self, model: str, messages: List[dict], temperature: float = 0.7,
+                max_tokens: int = 1000, stream: bool = False, **kwargs):
+        self.calls += 1
+        tokens = self._tokens(messages, max_tokens)
+        if stream:
+            return self._stream(tokens)
+
+        time.sleep(self.first_token_delay + self.token_delay * (len(tokens) - 1))
+        prompt_tokens = sum(len(m["content"].split()) for m in messages)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="".join(tokens)))],
+            usage=SimpleNamespace(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=len(tokens),
+                total_tokens=prompt_tokens + len(tokens)
+            )
+        )
+
+    def _stream(self, tokens: List[str]) -> Iterator[SimpleNamespace]:
+        time.sleep(self.first_token_delay)
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(self.token_delay)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=token))])
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=None))])
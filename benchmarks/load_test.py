@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Query Service Load Test
+Latency percentiles and throughput of the HTTP query service under
+concurrent clients
+
+Each client keeps one keep-alive connection and sends its next question as
+soon as the previous one is answered; every question is different, so the
+query-embedding cache does not help. With --url an already running service
+is tested (it must have documents indexed). Otherwise a service is started
+in a child process over a synthetic corpus, once without batching
+(max batch 1) and once with micro-batching, with a fake LLM for /answer.
+
+Usage:
+    python benchmarks/load_test.py --concurrency 32 --requests 2000
+    python benchmarks/load_test.py --endpoint answer --concurrency 32 --requests 500
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic import make_chunks, make_text
+
+
+def serve(chunks: int, max_wait_ms: float, max_batch: int, ports) -> None:
+    """Child process: a query service over a synthetic corpus"""
+    for name in ("rag_pipeline", "vector_store", "query_service", "telemetry"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    from benchmarks.fake_llm import FakeGroq
+    from pdf_processor import PDFProcessor
+    from query_service import QueryService
+    from rag_pipeline import RAGPipeline
+
+    pipeline = RAGPipeline(api_key="benchmark")
+    pipeline.client = FakeGroq(first_token_delay=0.2, token_delay=0.002, answer_tokens=100)
+    pipeline.add_document(make_chunks(chunks), doc_id="course")
+    service = QueryService(pipeline, PDFProcessor(), "You are a tutor.", max_wait=max_wait_ms / 1000,
+                           max_batch=max_batch, answer_workers=64)
+
+    async def run():
+        ports.put(await service.start("127.0.0.1", 0))
+        await service.serve_forever()
+
+    asyncio.run(run())
+
+
+async def request(reader, writer, host: str, method: str, path: str, body: bytes = b"") -> Dict:
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    payload = json.loads(await reader.readexactly(length))
+    if status != 200:
+        raise RuntimeError(f"HTTP {status}: {payload.get('error')}")
+    return payload
+
+
+async def load(url: str, endpoint: str, concurrency: int, requests: int, top_k: int, seed: int) -> Dict:
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def client():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+        for i in counter:
+            body = json.dumps({"query": make_text(10, seed=seed + i), "top_k": top_k}).encode("utf-8")
+            start = time.perf_counter()
+            try:
+                await request(reader, writer, host, "POST", f"/{endpoint}", body)
+                latencies.append(time.perf_counter() - start)
+            except RuntimeError:
+                errors += 1
+        writer.close()
+
+    reader, writer = await asyncio.open_connection(host, port)
+    before = await request(reader, writer, host, "GET", "/health")
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    after = await request(reader, writer, host, "GET", "/health")
+    writer.close()
+
+    batches = after["batches"] - before["batches"]
+    latencies_ms = 1000 * np.array(latencies or [0.0])
+    return {
+        "throughput": len(latencies) / elapsed,
+        "p50": float(np.percentile(latencies_ms, 50)),
+        "p99": float(np.percentile(latencies_ms, 99)),
+        "errors": errors,
+        "batch": (after["batched_queries"] - before["batched_queries"]) / batches if batches else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Test a running service instead of starting one")
+    parser.add_argument("--endpoint", choices=["retrieve", "answer"], default="retrieve")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--chunks", type=int, default=20_000, help="Synthetic corpus size for the started service")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--max-batch", type=int, default=64)
+    args = parser.parse_args()
+
+    if args.url:
+        runs = [("service", args.url, None)]
+    else:
+        context = multiprocessing.get_context("spawn")
+        runs = []
+        for label, max_wait_ms, max_batch in (
+            ("unbatched", 0.0, 1),
+            (f"batched {args.max_wait_ms:g} ms", args.max_wait_ms, args.max_batch),
+        ):
+            ports = context.Queue()
+            server = context.Process(target=serve, args=(args.chunks, max_wait_ms, max_batch, ports), daemon=True)
+            server.start()
+            runs.append((label, f"http://127.0.0.1:{ports.get(timeout=600)}", server))
+
+    print(f"POST /{args.endpoint}, {args.concurrency} concurrent clients, {args.requests} requests")
+    print(f"{'service':<18}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'batch':>7}{'errors':>8}")
+    for i, (label, url, server) in enumerate(runs):
+        # Warm up, then measure with questions not seen during warm-up
+        asyncio.run(load(url, args.endpoint, args.concurrency, 4 * args.concurrency, args.top_k, seed=10**6))
+        result = asyncio.run(load(url, args.endpoint, args.concurrency, args.requests, args.top_k, seed=2 * 10**6))
+        print(f"{label:<18}{result['throughput']:>9.0f}{result['p50']:>9.1f}{result['p99']:>9.1f}"
+              f"{result['batch']:>7.1f}{result['errors']:>8}")
+        if server is not None:
+            server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+End-to-End Benchmark Suite
+Times every hot path on synthetic PDFs with a fake Groq client, fully
+offline, and writes JSON results that can be compared between commits
+
+Stages: extract, chunk, ingest, retrieve, answer and render (the page
+rasterization behind the app's viewer).
+
+Usage:
+    python benchmarks/run_suite.py --pages 10 100 --json results.json
+    python benchmarks/run_suite.py --json new.json --compare results.json --tolerance 0.2
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from page_renderer import PageCache, PageRenderer
+from pdf_processor import PDFProcessor, open_pdf
+from rag_pipeline import RAGPipeline
+from benchmarks.fake_llm import FakeGroq
+from benchmarks.synthetic import make_pdf, make_text
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+SYSTEM_PROMPT = "You are a helpful AI tutor."
+
+
+def best_of(repeats: int, run: Callable[[], None]) -> float:
+    """Fastest of several runs in seconds (the least noisy estimate on a shared machine)"""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def per_item(run: Callable[[int], None], count: int) -> Dict[str, float]:
+    """Run run(i) for each item and summarize per-item latency in milliseconds"""
+    latencies = []
+    for i in range(count):
+        start = time.perf_counter()
+        run(i)
+        latencies.append(1000 * (time.perf_counter() - start))
+    latencies.sort()
+    return {
+        "seconds": sum(latencies) / 1000,
+        "mean_ms": statistics.fmean(latencies),
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+    }
+
+
+def bench_document(pdf_path: str, num_pages: int, args) -> List[Dict]:
+    """Time each stage on one synthetic PDF"""
+    results = []
+
+    def record(stage: str, items: int, **metrics):
+        metrics.setdefault("per_item_ms", 1000 * metrics["seconds"] / max(1, items))
+        results.append({"pages": num_pages, "stage": stage, "items": items, **metrics})
+        print(f"{num_pages:>6}  {stage:<10}{items:>8}{metrics['seconds']:>10.3f}{metrics['per_item_ms']:>12.3f}")
+
+    processor = PDFProcessor(backend=args.backend)
+    text = processor.extract_text_from_pdf(pdf_path)
+    record("extract", num_pages, seconds=best_of(args.repeats, lambda: processor.extract_text_from_pdf(pdf_path)))
+
+    chunks = processor.chunk_text(text)
+    record("chunk", len(chunks), seconds=best_of(args.repeats, lambda: processor.chunk_text(text)))
+
+    pipeline = RAGPipeline(api_key="benchmark")
+    pipeline.client = FakeGroq(args.first_token_delay, args.token_delay, args.answer_tokens)
+    record("ingest", len(chunks), seconds=best_of(args.repeats, lambda: pipeline.ingest_documents(chunks)))
+
+    queries = [make_text(12, seed=10_000 + i) for i in range(args.queries)]
+    # Fresh query-embedding cache so every query is encoded, as a new question would be
+    pipeline.query_cache.clear()
+    record("retrieve", len(queries), **per_item(lambda i: pipeline.retrieve_relevant_chunks(queries[i]), len(queries)))
+
+    pipeline.query_cache.clear()
+    record("answer", len(queries), **per_item(lambda i: pipeline.answer_question(queries[i], SYSTEM_PROMPT), len(queries)))
+
+    pages = min(num_pages, args.render_pages)
+    with open_pdf(pdf_path, "pymupdf") as document:
+        renderer = PageRenderer(document, PageCache(), prefetch_window=0)
+        record("render", pages, **per_item(renderer.get_page, pages))
+        record("render_hit", pages, **per_item(renderer.get_page, pages))
+        renderer.close()
+
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: List[Dict], baseline_path: str, tolerance: float, floor_ms: float) -> List[str]:
+    """
+    Print per-stage ratios against a baseline file and return the regressed stages
+
+    Per-query stages are compared on their median, which is less noisy than
+    the mean; stages faster than floor_ms per item are reported but never fail.
+    """
+    with open(baseline_path) as f:
+        baseline = {(r["pages"], r["stage"]): r for r in json.load(f)["results"]}
+
+    regressions = []
+    print(f"\n{'pages':>6}  {'stage':<10}{'baseline ms':>13}{'now ms':>10}{'ratio':>8}")
+    for result in results:
+        before = baseline.get((result["pages"], result["stage"]))
+        if before is None:
+            continue
+        metric = "p50_ms" if "p50_ms" in result and "p50_ms" in before else "per_item_ms"
+        ratio = result[metric] / before[metric] if before[metric] else 1.0
+        flag = "  REGRESSION" if ratio > 1 + tolerance and before[metric] >= floor_ms else ""
+        print(f"{result['pages']:>6}  {result['stage']:<10}{before[metric]:>13.3f}"
+              f"{result[metric]:>10.3f}{ratio:>8.2f}{flag}")
+        if flag:
+            regressions.append(f"{result['stage']}@{result['pages']}p")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100], help="Page counts of the synthetic PDFs")
+    parser.add_argument("--words-per-page", type=int, default=400)
+    parser.add_argument("--backend", default="pymupdf", help="PDF extraction backend")
+    parser.add_argument("--queries", type=int, default=20, help="Questions asked per document")
+    parser.add_argument("--render-pages", type=int, default=10, help="Pages rasterized per document")
+    parser.add_argument("--repeats", type=int, default=3, help="Runs of the whole-document stages (best is kept)")
+    parser.add_argument("--first-token-delay", type=float, default=0.0, help="Fake LLM latency (0 times only our code)")
+    parser.add_argument("--token-delay", type=float, default=0.0)
+    parser.add_argument("--answer-tokens", type=int, default=200)
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before --compare fails")
+    parser.add_argument("--floor-ms", type=float, default=0.05, help="Stages faster than this per item never fail")
+    args = parser.parse_args()
+    for name in ("rag_pipeline", "pdf_processor", "vector_store"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    # Load the embedding model before timing anything
+    RAGPipeline(api_key="benchmark").embed_queries(["warm-up"])
+
+    print(f"{'pages':>6}  {'stage':<10}{'items':>8}{'seconds':>10}{'ms/item':>12}")
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for num_pages in args.pages:
+            pdf_path = make_pdf(os.path.join(tmp, f"synthetic-{num_pages}.pdf"), num_pages, args.words_per_page)
+            results.extend(bench_document(pdf_path, num_pages, args))
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance, args.floor_ms)
+        if regressions:
+            print(f"Slower than baseline by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
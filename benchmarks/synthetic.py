@@ -0,0 +1,83 @@
+"""
+Synthetic Corpus Helpers
+Deterministic fake course text for offline benchmarks
+"""
+
+import random
+from typing import List
+
+VOCABULARY = (
+    "photosynthesis chlorophyll energy glucose membrane enzyme protein cell "
+    "nucleus mitochondria gradient transport diffusion osmosis equilibrium "
+    "reaction catalyst molecule atom electron orbital bond covalent ionic "
+    "derivative integral limit matrix vector eigenvalue theorem proof lemma "
+    "algorithm complexity recursion graph tree hash array pointer memory "
+    "market demand supply elasticity inflation interest capital labour "
+    "the a of and to in is that for as with by on this which are be"
+).split()
+
+
+def make_text(num_words: int, seed: int = 0) -> str:
+    """
+    Generate pseudo-random course text
+    
+    Args:
+        num_words: Number of words to generate
+        seed: Random seed for reproducibility
+        
+    Returns:
+        Generated text with a sentence break every 12 words
+    """
+    rng = random.Random(seed)
+    words = []
+    for i in range(num_words):
+        words.append(rng.choice(VOCABULARY))
+        if (i + 1) % 12 == 0:
+            words[-1] += "."
+    return " ".join(words)
+
+
+def make_chunks(num_chunks: int, chunk_size: int = 500, seed: int = 0) -> List[str]:
+    """
+    Generate synthetic chunks of roughly chunk_size characters
+    
+    Args:
+        num_chunks: Number of chunks to generate
+        chunk_size: Approximate characters per chunk
+        seed: Random seed for reproducibility
+        
+    Returns:
+        List of text chunks
+    """
+    # ~7 characters per word including the separator
+    words_per_chunk = max(1, chunk_size // 7)
+    return [make_text(words_per_chunk, seed=seed + i) for i in range(num_chunks)]
+
+
+def make_pdf(path: str, num_pages: int, words_per_page: int = 400, seed: int = 0) -> str:
+    """
+    Write a text-only PDF of generated course pages
+    
+    Args:
+        path: Output file path
+        num_pages: Number of pages
+        words_per_page: Words of body text per page
+        seed: Random seed for reproducibility
+        
+    Returns:
+        The output path
+    """
+    import fitz
+    
+    document = fitz.open()
+    for page_num in range(num_pages):
+        page = document.new_page()
+        page.insert_text((72, 60), f"Chapter {page_num // 20 + 1} - Page {page_num + 1}", fontsize=14)
+        page.insert_textbox(
+            fitz.Rect(72, 80, page.rect.width - 72, page.rect.height - 60),
+            make_text(words_per_page, seed=seed + page_num),
+            fontsize=9
+        )
+    document.save(path)
+    document.close()
+    return path
@@ -0,0 +1,309 @@
+"""
+Chunk Store Module
+Chunks as spans of per-document text, with the page each one is on
+"""
+
+import os
+from typing import Dict, Iterable, List, NamedTuple, Optional
+import numpy as np
+
+
+def _grow(array: np.ndarray, size: int) -> np.ndarray:
+    """Return array with capacity for at least `size` items, doubling when full"""
+    if size <= len(array):
+        return array
+    grown = np.zeros(max(size, 2 * len(array), 1024), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class ChunkSpans(NamedTuple):
+    """Where a batch of chunks sits in its document's text"""
+    # Document offsets of each chunk's first and one-past-last character
+    starts: np.ndarray
+    ends: np.ndarray
+    # Page texts (each with its trailing newline) that follow the pages
+    # already stored for the document; the spans may point into them
+    pages: List[str]
+
+
+class ChunkHit(tuple):
+    """
+    A (text, score) search result that also records where the chunk came from
+
+    Unpacks and compares like the plain pair, so callers that only want
+    text and score are unaffected. doc_id and page (0-based, -1 when the
+    document was added without pages) are attributes.
+    """
+
+    def __new__(cls, text: str, score: float, doc_id: Optional[str] = None, page: int = -1):
+        hit = super().__new__(cls, (text, score))
+        hit.doc_id = doc_id
+        hit.page = page
+        return hit
+
+    def __getnewargs__(self):
+        return self[0], self[1], self.doc_id, self.page
+
+    @property
+    def text(self) -> str:
+        return self[0]
+
+    @property
+    def score(self) -> float:
+        return self[1]
+
+
+class DocumentText:
+    """
+    One document's text, stored once as the segments it arrived in
+
+    For PDFs each segment is a page (its text plus the newline the chunker
+    joins pages with), so a document grows page by page while it is
+    indexed without copying what is already stored. Offsets address the
+    concatenation of all segments.
+    """
+
+    def __init__(self):
+        self.segments: List[str] = []
+        self._pages = np.zeros(0, dtype=np.int32)
+        # _starts[i] is the offset of segment i; _starts[len(segments)] the total length
+        self._starts = np.zeros(1, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return int(self._starts[len(self.segments)])
+
+    def append(self, text: str, page: int = -1) -> int:
+        """
+        Append a segment
+
+        Args:
+            text: Segment text
+            page: Page number of the segment (-1 if not a page)
+
+        Returns:
+            Offset of the segment in the document
+        """
+        n = len(self.segments)
+        self._starts = _grow(self._starts, n + 2)
+        self._pages = _grow(self._pages, n + 1)
+        start = int(self._starts[n])
+        self._starts[n + 1] = start + len(text)
+        self._pages[n] = page
+        self.segments.append(text)
+        return start
+
+    def slice(self, start: int, end: int) -> str:
+        """Text between two document offsets; only segments it spans are touched"""
+        if end <= start:
+            return ""
+        starts = self._starts
+        i = int(np.searchsorted(starts[:len(self.segments) + 1], start, side="right")) - 1
+        offset = int(starts[i])
+        if end <= starts[i + 1]:
+            return self.segments[i][start - offset:end - offset]
+        parts = []
+        while start < end:
+            offset = int(starts[i])
+            parts.append(self.segments[i][start - offset:end - offset])
+            start = int(starts[i + 1])
+            i += 1
+        return "".join(parts)
+
+    def slice_many(self, starts: np.ndarray, ends: np.ndarray) -> List[str]:
+        """slice() for many spans, locating their segments in one vectorized search"""
+        n = len(self.segments)
+        first = (np.searchsorted(self._starts[:n + 1], starts, side="right") - 1).tolist()
+        bounds = self._starts[:n + 1].tolist()
+        texts = []
+        for i, start, end in zip(first, starts.tolist(), ends.tolist()):
+            if end <= start:
+                texts.append("")
+            elif end <= bounds[i + 1]:
+                texts.append(self.segments[i][start - bounds[i]:end - bounds[i]])
+            else:
+                parts = []
+                while start < end:
+                    parts.append(self.segments[i][start - bounds[i]:end - bounds[i]])
+                    start = bounds[i + 1]
+                    i += 1
+                texts.append("".join(parts))
+        return texts
+
+    def pages_at(self, offsets: np.ndarray) -> np.ndarray:
+        """Page number of the segment holding each offset"""
+        n = len(self.segments)
+        if n == 0:
+            return np.full(len(offsets), -1, dtype=np.int32)
+        segments = np.searchsorted(self._starts[:n + 1], offsets, side="right") - 1
+        return self._pages[np.clip(segments, 0, n - 1)]
+
+
+class ChunkStore:
+    """
+    Chunk texts as (document, start, length, page) rows
+
+    The text itself lives once per document in a DocumentText, so the
+    overlap neighbouring chunks share is not stored twice and there is no
+    Python string per chunk; a chunk's string is sliced out when it is
+    read. Row ids are assigned in append order, like the vector index.
+    """
+
+    def __init__(self):
+        self.documents: Dict[int, DocumentText] = {}
+        self._docs = np.zeros(0, dtype=np.int32)
+        self._starts = np.zeros(0, dtype=np.int64)
+        self._lengths = np.zeros(0, dtype=np.int32)
+        self._pages = np.zeros(0, dtype=np.int32)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, row: int) -> str:
+        start = int(self._starts[row])
+        return self.documents[int(self._docs[row])].slice(start, start + int(self._lengths[row]))
+
+    def get_many(self, rows: Iterable[int]) -> List[str]:
+        """Texts of many rows, in the given order"""
+        rows = np.fromiter(rows, dtype=np.int64)
+        docs = self._docs[rows]
+        starts = self._starts[rows]
+        ends = starts + self._lengths[rows]
+        texts: List[str] = [""] * len(rows)
+        for number in np.unique(docs).tolist():
+            positions = np.flatnonzero(docs == number)
+            sliced = self.documents[number].slice_many(starts[positions], ends[positions])
+            for position, text in zip(positions.tolist(), sliced):
+                texts[position] = text
+        return texts
+
+    @property
+    def doc_numbers(self) -> np.ndarray:
+        """Document number of each row (a view)"""
+        return self._docs[:self._size]
+
+    @property
+    def pages(self) -> np.ndarray:
+        """Page of each row, -1 if unknown (a view)"""
+        return self._pages[:self._size]
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory of the row arrays and the document text"""
+        text = sum(len(segment) for doc in self.documents.values() for segment in doc.segments)
+        return text + self._docs.nbytes + self._starts.nbytes + self._lengths.nbytes + self._pages.nbytes
+
+    def document(self, number: int) -> DocumentText:
+        """Text of a document, created empty on first use"""
+        doc = self.documents.get(number)
+        if doc is None:
+            doc = self.documents[number] = DocumentText()
+        return doc
+
+    def append_spans(self, number: int, spans: ChunkSpans) -> np.ndarray:
+        """
+        Append chunks that are spans of a document's text
+
+        Args:
+            number: Document number
+            spans: Chunk offsets plus any new page texts they point into
+
+        Returns:
+            Row ids assigned to the chunks
+        """
+        doc = self.document(number)
+        for page in spans.pages:
+            doc.append(page, page=len(doc.segments))
+        starts = np.asarray(spans.starts, dtype=np.int64)
+        lengths = np.asarray(spans.ends, dtype=np.int64) - starts
+        # A chunk straddling a page break is filed under the page with most of its text
+        return self._append_rows(number, starts, lengths, doc.pages_at(starts + lengths // 2))
+
+    def append_texts(self, number: int, texts: List[str]) -> np.ndarray:
+        """
+        Append standalone chunk texts (no page information)
+
+        Args:
+            number: Document number
+            texts: Chunk texts
+
+        Returns:
+            Row ids assigned to the chunks
+        """
+        doc = self.document(number)
+        starts = np.array([doc.append(text) for text in texts], dtype=np.int64)
+        lengths = np.array([len(text) for text in texts], dtype=np.int64)
+        return self._append_rows(number, starts, lengths, np.full(len(texts), -1, dtype=np.int32))
+
+    def _append_rows(self, number: int, starts: np.ndarray, lengths: np.ndarray, pages: np.ndarray) -> np.ndarray:
+        start, end = self._size, self._size + len(starts)
+        self._docs = _grow(self._docs, end)
+        self._starts = _grow(self._starts, end)
+        self._lengths = _grow(self._lengths, end)
+        self._pages = _grow(self._pages, end)
+        self._docs[start:end] = number
+        self._starts[start:end] = starts
+        self._lengths[start:end] = lengths
+        self._pages[start:end] = pages
+        self._size = end
+        return np.arange(start, end)
+
+    def take(self, rows: np.ndarray, keep_documents: Iterable[int] = ()) -> "ChunkStore":
+        """
+        A store of just the given rows, renumbered 0..len(rows)-1
+
+        Document texts are shared, not copied. Texts of documents that no
+        row refers to any more are dropped unless listed in keep_documents
+        (e.g. a document still being indexed, whose next chunks point into
+        pages already stored).
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        taken = ChunkStore()
+        taken._docs = self._docs[rows].copy()
+        taken._starts = self._starts[rows].copy()
+        taken._lengths = self._lengths[rows].copy()
+        taken._pages = self._pages[rows].copy()
+        taken._size = len(rows)
+        numbers = set(np.unique(taken._docs).tolist()) | set(keep_documents)
+        taken.documents = {number: self.documents[number] for number in numbers if number in self.documents}
+        return taken
+
+    def save(self, directory: str) -> None:
+        """
+        Write the rows and document texts as .npy arrays plus one UTF-8 file
+
+        Args:
+            directory: Existing directory; files are named chunk_* and segment_*
+        """
+        encoded, docs, pages = [], [], []
+        for number, doc in self.documents.items():
+            encoded.extend(segment.encode("utf-8") for segment in doc.segments)
+            docs.extend([number] * len(doc.segments))
+            pages.append(doc._pages[:len(doc.segments)])
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(segment) for segment in encoded], out=offsets[1:])
+        with open(os.path.join(directory, "segments.bin"), "wb") as f:
+            f.write(b"".join(encoded))
+        np.save(os.path.join(directory, "segment_offsets.npy"), offsets)
+        np.save(os.path.join(directory, "segment_docs.npy"), np.array(docs, dtype=np.int32))
+        np.save(os.path.join(directory, "segment_pages.npy"), np.concatenate(pages) if pages else np.zeros(0, dtype=np.int32))
+        for name in ("docs", "starts", "lengths", "pages"):
+            np.save(os.path.join(directory, f"chunk_{name}.npy"), getattr(self, f"_{name}")[:self._size])
+
+    @classmethod
+    def load(cls, directory: str) -> "ChunkStore":
+        """Read a store written by save()"""
+        store = cls()
+        for name in ("docs", "starts", "lengths", "pages"):
+            setattr(store, f"_{name}", np.load(os.path.join(directory, f"chunk_{name}.npy")))
+        store._size = len(store._docs)
+
+        offsets = np.load(os.path.join(directory, "segment_offsets.npy")).tolist()
+        docs = np.load(os.path.join(directory, "segment_docs.npy")).tolist()
+        pages = np.load(os.path.join(directory, "segment_pages.npy")).tolist()
+        with open(os.path.join(directory, "segments.bin"), "rb") as f:
+            blob = f.read()
+        for i, (number, page) in enumerate(zip(docs, pages)):
+            store.document(number).append(blob[offsets[i]:offsets[i + 1]].decode("utf-8"), page)
+        return store
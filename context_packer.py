@@ -0,0 +1,117 @@
+"""
+Context Packing Module
+Merges overlapping retrieved chunks and fits them into a token budget
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Shortest shared edge treated as chunker overlap rather than a coincidence
+MIN_OVERLAP_CHARS = 30
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate LLM tokens in text (about four characters per token for English)"""
+    return (len(text) + 3) // 4
+
+
+def edge_overlap(left: str, right: str, min_overlap: int = MIN_OVERLAP_CHARS) -> int:
+    """
+    Length of the longest suffix of left that is also a prefix of right
+
+    Args:
+        left: Text that may end with the shared part
+        right: Text that may start with it
+        min_overlap: Shorter matches are ignored (returns 0)
+
+    Returns:
+        Number of shared characters, or 0
+    """
+    for length in range(min(len(left), len(right)), min_overlap - 1, -1):
+        if left.endswith(right[:length]):
+            return length
+    return 0
+
+
+def _merge(span: str, chunk: str, min_overlap: int) -> Optional[str]:
+    """span and chunk as one contiguous text, or None if they do not overlap"""
+    if chunk in span:
+        return span
+    if span in chunk:
+        return chunk
+    overlap = edge_overlap(span, chunk, min_overlap)
+    if overlap:
+        return span + chunk[overlap:]
+    overlap = edge_overlap(chunk, span, min_overlap)
+    if overlap:
+        return chunk + span[overlap:]
+    return None
+
+
+def pack_context(chunks: List[str], token_budget: Optional[int] = None,
+                 min_overlap: int = MIN_OVERLAP_CHARS) -> Tuple[List[str], Dict[str, int]]:
+    """
+    Turn retrieved chunks into non-overlapping context passages
+
+    Chunks are taken in the given (score) order. A chunk that overlaps or
+    sits inside a passage already chosen is merged into it, so text shared
+    by adjacent chunks is sent once; merging can also join two passages
+    the chunk bridges. A chunk whose new text would exceed the budget is
+    skipped and lower-scored chunks are still tried.
+
+    Args:
+        chunks: Retrieved chunk texts, best first
+        token_budget: Maximum estimated tokens of context (None = unlimited)
+        min_overlap: Shortest shared edge, in characters, that counts as overlap
+
+    Returns:
+        Tuple of (passages in order of their best chunk, stats) where stats
+        has input_tokens (chunks joined verbatim), output_tokens,
+        tokens_saved, chunks_merged and chunks_dropped
+    """
+    passages: List[str] = []
+    used = 0
+    merged = dropped = 0
+
+    for chunk in chunks:
+        for i, passage in enumerate(passages):
+            combined = _merge(passage, chunk, min_overlap)
+            if combined is None:
+                continue
+            cost = estimate_tokens(combined) - estimate_tokens(passage)
+            if token_budget is not None and used + cost > token_budget:
+                dropped += 1
+                break
+            # The grown passage may now overlap a later one; fold those in too
+            rest = []
+            for other in passages[i + 1:]:
+                joined = _merge(combined, other, min_overlap)
+                if joined is None:
+                    rest.append(other)
+                else:
+                    combined = joined
+            passages[i + 1:] = rest
+            passages[i] = combined
+            used = sum(estimate_tokens(p) for p in passages)
+            merged += 1
+            break
+        else:
+            cost = estimate_tokens(chunk)
+            if token_budget is not None and used + cost > token_budget:
+                dropped += 1
+                continue
+            passages.append(chunk)
+            used += cost
+
+    input_tokens = sum(estimate_tokens(chunk) for chunk in chunks)
+    stats = {
+        "input_tokens": input_tokens,
+        "output_tokens": used,
+        "tokens_saved": input_tokens - used,
+        "chunks_merged": merged,
+        "chunks_dropped": dropped,
+    }
+    return passages, stats
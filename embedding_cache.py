@@ -0,0 +1,249 @@
+"""
+Embedding Cache Module
+Disk-backed, content-hash keyed cache of chunk embeddings
+"""
+
+import os
+import re
+import hashlib
+import sqlite3
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so re-extracted or re-wrapped text hashes the same"""
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def text_key(text: str) -> str:
+    """SHA-256 hex digest of the normalized text"""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Persistent LRU cache of embeddings keyed by (model name, text hash)
+
+    Vectors live in a memory-mapped float32 file, one row per slot, so a
+    lookup only touches the rows it needs. A small SQLite table maps each
+    key to its slot and tracks last use for LRU eviction.
+
+    Several processes (e.g. the app and the query service) may share one
+    cache directory: every lookup and store runs in an immediate SQLite
+    transaction, whose write lock also covers the vector file, and the
+    file is only ever grown.
+    """
+
+    def __init__(self, cache_dir: str, model_name: str, dim: int, max_entries: int = 200_000):
+        """
+        Open (or create) the cache for one embedding model
+
+        Args:
+            cache_dir: Root directory for all cached models
+            model_name: Embedding model identifier, part of the cache key
+            dim: Embedding dimension
+            max_entries: Maximum number of vectors kept before LRU eviction
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+
+        self.model_name = model_name
+        self.dim = dim
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", model_name)
+        self.directory = os.path.join(cache_dir, f"{safe_name}-{dim}")
+        os.makedirs(self.directory, exist_ok=True)
+        self._vectors_path = os.path.join(self.directory, "vectors.f32")
+
+        self._lock = threading.Lock()
+        # Transactions are begun explicitly (see _transaction)
+        self._db = sqlite3.connect(
+            os.path.join(self.directory, "index.sqlite"),
+            timeout=30,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, slot INTEGER UNIQUE NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries(last_used)")
+
+        self._vectors = None
+        self._capacity = 0
+        self._sync_capacity()
+
+        logger.info(f"Embedding cache at {self.directory} holds {len(self)} vectors")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def _map(self, rows: int) -> None:
+        """(Re)map the vector file with room for at least `rows` slots"""
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        if rows == 0:
+            self._capacity = 0
+            return
+        mode = "r+" if os.path.exists(self._vectors_path) else "w+"
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode=mode, shape=(rows, self.dim))
+        self._capacity = rows
+
+    def _sync_capacity(self) -> None:
+        """Remap if another process has grown the vector file"""
+        rows = os.path.getsize(self._vectors_path) // (4 * self.dim) if os.path.exists(self._vectors_path) else 0
+        if rows != self._capacity:
+            self._map(rows)
+
+    def _ensure_capacity(self, rows: int) -> None:
+        """Grow the vector file geometrically, never past max_entries (call in a transaction)"""
+        if rows <= self._capacity:
+            return
+        new_capacity = min(self.max_entries, max(rows, 2 * self._capacity, 1024))
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        with open(self._vectors_path, "ab") as f:
+            # Never shrink: another process may have grown the file further
+            if f.tell() < new_capacity * self.dim * 4:
+                f.truncate(new_capacity * self.dim * 4)
+        self._sync_capacity()
+
+    @contextmanager
+    def _transaction(self):
+        """
+        Hold the thread lock and SQLite's write lock
+
+        Other processes sharing the directory wait for the write lock too,
+        so slots are handed out, and vectors read and written, by one
+        process at a time.
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._sync_capacity()
+                yield
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def _lookup_slots(self, keys: List[str]) -> Dict[str, int]:
+        """Map keys to slots, batching below SQLite's bound-parameter limit"""
+        slots = {}
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            slots.update(self._db.execute(
+                f"SELECT key, slot FROM entries WHERE key IN ({placeholders})", batch
+            ).fetchall())
+        return slots
+
+    def _touch(self, keys: List[str]) -> None:
+        """Mark keys as most recently used"""
+        now = time.time_ns()
+        self._db.executemany("UPDATE entries SET last_used = ? WHERE key = ?", [(now, key) for key in keys])
+
+    def get_many(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Look up cached embeddings
+
+        Args:
+            texts: Texts to look up
+
+        Returns:
+            Tuple of (vectors, hit_mask); rows for misses are zero
+        """
+        keys = [text_key(t) for t in texts]
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        hit_mask = np.zeros(len(texts), dtype=bool)
+
+        with self._transaction():
+            slots = self._lookup_slots(list(dict.fromkeys(keys)))
+            if slots:
+                self._touch(list(slots))
+
+            for i, key in enumerate(keys):
+                slot = slots.get(key)
+                if slot is not None and slot < self._capacity:
+                    vectors[i] = self._vectors[slot]
+                    hit_mask[i] = True
+
+            n_hits = int(hit_mask.sum())
+            self.hits += n_hits
+            self.misses += len(texts) - n_hits
+        return vectors, hit_mask
+
+    def put_many(self, texts: List[str], vectors: np.ndarray) -> None:
+        """
+        Store embeddings, evicting least-recently-used entries when full
+
+        Args:
+            texts: Texts the vectors were computed from
+            vectors: Array of shape (len(texts), dim)
+        """
+        if len(texts) != len(vectors):
+            raise ValueError("texts and vectors must have the same length")
+
+        items = dict(zip((text_key(t) for t in texts), np.asarray(vectors, dtype=np.float32)))
+        # Only the last max_entries vectors could survive eviction anyway
+        if len(items) > self.max_entries:
+            items = dict(list(items.items())[-self.max_entries:])
+
+        with self._transaction():
+            existing = self._lookup_slots(list(items))
+            # Touch existing keys first so eviction below never picks them
+            self._touch(list(existing))
+            new_keys = [key for key in items if key not in existing]
+
+            count = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            overflow = len(new_keys) - (self.max_entries - count)
+            recycled = []
+            if overflow > 0:
+                evicted = self._db.execute(
+                    "SELECT key, slot FROM entries ORDER BY last_used LIMIT ?", (overflow,)
+                ).fetchall()
+                self._db.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key, _ in evicted])
+                recycled = [slot for _, slot in evicted]
+                logger.info(f"Evicted {len(evicted)} embeddings from cache")
+
+            # Slots stay dense (0..count-1) because evicted slots are always recycled
+            new_slots = recycled + list(range(count, count + len(new_keys) - len(recycled)))
+            self._ensure_capacity(max(new_slots, default=-1) + 1)
+
+            for key, slot in zip(new_keys, new_slots):
+                self._vectors[slot] = items[key]
+            for key, slot in existing.items():
+                self._vectors[slot] = items[key]
+            if self._vectors is not None:
+                self._vectors.flush()
+
+            now = time.time_ns()
+            self._db.executemany(
+                "INSERT INTO entries (key, slot, last_used) VALUES (?, ?, ?)",
+                [(key, slot, now) for key, slot in zip(new_keys, new_slots)]
+            )
+
+    def close(self) -> None:
+        """Flush vectors and close the index"""
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+                self._vectors = None
+            self._db.close()
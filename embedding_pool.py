@@ -0,0 +1,193 @@
+"""
+Embedding Pool Module
+Multi-process sentence embedding for bulk ingestion on CPU-only hosts
+"""
+
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional
+import numpy as np
+
+from model_registry import DEFAULT_EMBEDDING_MODEL
+from telemetry import tracer
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Model loaded once per worker process by _init_worker
+_worker_model = None
+
+
+def _init_worker(model_name: str, threads: int) -> None:
+    """Pin the worker's math libraries to `threads` threads, then load its model copy"""
+    for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[variable] = str(threads)
+
+    import torch
+
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Only allowed before torch starts parallel work
+        pass
+
+    from model_registry import get_embedding_model
+
+    global _worker_model
+    _worker_model = get_embedding_model(model_name)
+
+
+def _encode_shard(texts: List[str], batch_size: int) -> np.ndarray:
+    vectors = _worker_model.encode(
+        texts,
+        batch_size=batch_size,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False
+    )
+    return np.asarray(vectors, dtype=np.float32)
+
+
+class EmbeddingPool:
+    """
+    Worker processes that each hold a copy of the embedding model
+
+    Texts are split into shards that workers encode in parallel, and the
+    vectors are reassembled in input order. Workers use the "spawn" start
+    method (forking a process that already runs torch threads is unsafe)
+    and start on first use, so the model load is paid once per pool.
+    If a worker dies, the pool is restarted and the unfinished shards
+    are retried; a second crash in one call raises RuntimeError.
+    Sessions may share one pool: starting and replacing the workers is
+    done under a lock, so concurrent calls never start two pools.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_EMBEDDING_MODEL, processes: Optional[int] = None,
+                 threads_per_process: int = 1, min_chunks: int = 2000, shard_size: int = 256,
+                 batch_size: int = 64, max_restarts: int = 1):
+        """
+        Initialize the pool without starting workers
+
+        Args:
+            model_name: sentence-transformers model loaded by every worker
+            processes: Worker count (default: CPU count / threads_per_process)
+            threads_per_process: Torch/BLAS threads per worker
+            min_chunks: Smaller inputs are better encoded in-process (see worthwhile)
+            shard_size: Texts sent to a worker per task
+            batch_size: Texts per model call inside a worker
+            max_restarts: Pool restarts allowed per encode() call after a worker crash
+        """
+        if threads_per_process < 1 or shard_size < 1 or batch_size < 1:
+            raise ValueError("threads_per_process, shard_size and batch_size must be at least 1")
+        self.model_name = model_name
+        self.threads_per_process = threads_per_process
+        self.processes = processes or max(1, (os.cpu_count() or 1) // threads_per_process)
+        self.min_chunks = min_chunks
+        self.shard_size = shard_size
+        self.batch_size = batch_size
+        self.max_restarts = max_restarts
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def worthwhile(self, num_texts: int) -> bool:
+        """
+        Whether num_texts is enough work to beat single-process encoding
+
+        Starting workers costs a model load each, and a handful of shards
+        cannot keep every worker busy, so small inputs stay in-process.
+        """
+        return self.processes > 1 and num_texts >= self.min_chunks
+
+    def _start(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                logger.info(
+                    f"Starting embedding pool: {self.processes} processes x {self.threads_per_process} threads"
+                )
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.model_name, self.threads_per_process)
+                )
+            return self._executor
+
+    def _discard(self, executor: ProcessPoolExecutor) -> None:
+        """Drop a broken pool, unless another call has already replaced it"""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def close(self) -> None:
+        """Stop the workers; the next encode() starts new ones"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "EmbeddingPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def encode(self, texts: List[str],
+               progress_callback: Optional[Callable[[int, int], None]] = None) -> np.ndarray:
+        """
+        Encode texts across the worker processes
+
+        Args:
+            texts: Texts to embed
+            progress_callback: Called as progress_callback(done, total) as shards finish
+
+        Returns:
+            Array of shape (len(texts), dim), rows L2-normalized, in input order
+        """
+        starts = list(range(0, len(texts), self.shard_size))
+        results: Dict[int, np.ndarray] = {}
+        done = 0
+        restarts = 0
+
+        with tracer.span("embed_pool", chunks=len(texts), shards=len(starts), processes=self.processes) as span:
+            while len(results) < len(starts):
+                executor = self._start()
+                futures = {
+                    executor.submit(_encode_shard, texts[start:start + self.shard_size], self.batch_size): i
+                    for i, start in enumerate(starts) if i not in results
+                }
+                try:
+                    pending = set(futures)
+                    while pending:
+                        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            vectors = future.result()
+                            results[futures[future]] = vectors
+                            done += len(vectors)
+                            if progress_callback is not None:
+                                progress_callback(done, len(texts))
+                except BrokenProcessPool:
+                    # A worker died (e.g. killed for memory); every in-flight shard is lost with the pool
+                    self._discard(executor)
+                    tracer.increment("embedding_pool_restarts")
+                    if restarts >= self.max_restarts:
+                        raise RuntimeError(
+                            f"Embedding pool workers crashed {restarts + 1} times; "
+                            f"{len(starts) - len(results)} of {len(starts)} shards not encoded"
+                        )
+                    restarts += 1
+                    logger.warning(f"Embedding worker crashed; restarting pool for {len(starts) - len(results)} shards")
+                except Exception:
+                    for future in futures:
+                        future.cancel()
+                    raise
+            span.set(restarts=restarts)
+
+        if not starts:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.concatenate([results[i] for i in range(len(starts))])
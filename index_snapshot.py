@@ -0,0 +1,170 @@
+"""
+Index Snapshot Module
+Versioned, atomically published on-disk snapshots of a processed index
+"""
+
+import os
+import json
+import time
+import shutil
+import tempfile
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the files inside a snapshot change incompatibly
+SNAPSHOT_FORMAT = 3
+
+MANIFEST_FILE = "manifest.json"
+# Named pointers to versions, one file per tag
+TAGS_DIR = "tags"
+
+
+class SnapshotDirectory:
+    """
+    A directory of immutable index snapshots, one subdirectory per version
+
+    A snapshot is written into a temporary directory and renamed into
+    place once complete, so a reader never sees a half-written snapshot.
+    Versions are content addressed by the caller: writing a version that
+    already exists reuses it, which lets replicas sharing the directory
+    save the same corpus without duplicating it.
+
+    A snapshot can be published under a tag, a named pointer that is
+    swapped atomically, so a caller can find the version for a key it
+    knows (e.g. the documents of a corpus) without knowing the version.
+    There is no default pointer: nothing is found without its tag.
+    """
+
+    def __init__(self, root: str):
+        """
+        Open a snapshot directory; it is created on the first write
+
+        Args:
+            root: Directory holding the snapshots
+        """
+        self.root = root
+
+    def path(self, version: str) -> str:
+        return os.path.join(self.root, version)
+
+    def exists(self, version: str) -> bool:
+        return os.path.exists(os.path.join(self.path(version), MANIFEST_FILE))
+
+    def _tag_path(self, tag: str) -> str:
+        if not tag or os.sep in tag or tag.startswith("."):
+            raise ValueError(f"Invalid snapshot tag '{tag}'")
+        return os.path.join(self.root, TAGS_DIR, tag)
+
+    def tagged(self, tag: str) -> Optional[str]:
+        """Version published under tag, or None when there is none (or it was pruned)"""
+        try:
+            with open(self._tag_path(tag), encoding="utf-8") as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return version if version and self.exists(version) else None
+
+    def versions(self) -> List[str]:
+        """Complete snapshots, oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        found = [name for name in os.listdir(self.root) if not name.startswith(".") and self.exists(name)]
+        return sorted(found, key=lambda name: os.path.getmtime(os.path.join(self.path(name), MANIFEST_FILE)))
+
+    def manifest(self, version: str) -> Dict[str, Any]:
+        """
+        Read a snapshot's manifest
+
+        Raises:
+            FileNotFoundError: If the version does not exist
+            ValueError: If it was written in another snapshot format
+        """
+        with open(os.path.join(self.path(version), MANIFEST_FILE), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(
+                f"Snapshot {version} has format {manifest.get('format')}, expected {SNAPSHOT_FORMAT}"
+            )
+        return manifest
+
+    def write(self, version: str, manifest: Dict[str, Any], write_files: Callable[[str], None],
+              tag: Optional[str] = None) -> str:
+        """
+        Publish a snapshot
+
+        Args:
+            version: Snapshot version (directory name)
+            manifest: Metadata stored as manifest.json; format and version are filled in
+            write_files: Called with the temporary directory to write the snapshot files into
+            tag: Also point this tag at the version
+
+        Returns:
+            Directory of the published snapshot
+        """
+        os.makedirs(self.root, exist_ok=True)
+        if not self.exists(version):
+            staging = tempfile.mkdtemp(prefix=".staging-", dir=self.root)
+            try:
+                write_files(staging)
+                manifest = dict(manifest, format=SNAPSHOT_FORMAT, version=version, created_at=time.time())
+                # The manifest goes last: a directory without one is not a snapshot
+                with open(os.path.join(staging, MANIFEST_FILE), "w", encoding="utf-8") as f:
+                    json.dump(manifest, f, indent=2)
+                try:
+                    os.rename(staging, self.path(version))
+                except OSError:
+                    # Another process published the same version first
+                    if not self.exists(version):
+                        raise
+                    logger.info(f"Snapshot {version} was published concurrently")
+            finally:
+                if os.path.exists(staging):
+                    shutil.rmtree(staging, ignore_errors=True)
+        else:
+            # Touch the manifest so prune() counts a reused snapshot as recent
+            os.utime(os.path.join(self.path(version), MANIFEST_FILE))
+
+        if tag is not None:
+            pointer = self._tag_path(tag)
+            os.makedirs(os.path.dirname(pointer), exist_ok=True)
+            # A uniquely named temporary file, so concurrent writers never share one
+            fd, staging = tempfile.mkstemp(prefix=".staging-", dir=os.path.dirname(pointer))
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(version)
+                os.replace(staging, pointer)
+            finally:
+                if os.path.exists(staging):
+                    os.remove(staging)
+        logger.info(f"Published index snapshot {version}" + (f" as '{tag}'" if tag else ""))
+        return self.path(version)
+
+    def prune(self, keep: int = 3) -> List[str]:
+        """
+        Delete all but the newest `keep` snapshots, and tags left pointing at none
+
+        Processes that still have files of a deleted snapshot mapped keep
+        reading them; the space is freed once they let go.
+
+        Returns:
+            Versions deleted
+        """
+        if keep < 1:
+            raise ValueError("keep must be at least 1")
+        stale = self.versions()[:-keep]
+        for version in stale:
+            shutil.rmtree(self.path(version), ignore_errors=True)
+        tags_dir = os.path.join(self.root, TAGS_DIR)
+        if stale and os.path.isdir(tags_dir):
+            for tag in os.listdir(tags_dir):
+                if not tag.startswith(".") and self.tagged(tag) is None:
+                    try:
+                        os.remove(os.path.join(tags_dir, tag))
+                    except FileNotFoundError:
+                        pass
+        if stale:
+            logger.info(f"Pruned {len(stale)} old index snapshots")
+        return stale
@@ -0,0 +1,247 @@
+"""
+Ingestion Jobs Module
+Background extract -> chunk -> embed pipeline with progress and cancellation
+"""
+
+import time
+import queue
+import threading
+import logging
+from typing import Any, Dict, Iterator, Optional
+import numpy as np
+
+from pdf_processor import PDFProcessor, open_pdf
+from telemetry import Span, tracer
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's output
+_DONE = object()
+
+
+class JobCancelled(Exception):
+    """Raised inside a stage once its job has been cancelled"""
+
+
+class IngestionJob:
+    """
+    Indexes one PDF on background threads
+
+    Extraction, chunking and embedding each run on their own thread,
+    connected by bounded queues, so a slow embedder holds back extraction
+    instead of letting pages pile up in memory. Every embedded batch is
+    appended to the document in the vector store right away, so questions
+    can be answered from early pages while later ones are still indexed.
+
+    A cancelled or failed job removes the partly indexed document.
+    """
+
+    def __init__(self, pipeline, processor: PDFProcessor, pdf_path: str, doc_id: str,
+                 name: Optional[str] = None, batch_size: Optional[int] = None, queue_size: int = 4,
+                 document=None):
+        """
+        Prepare a job without starting it
+
+        Args:
+            pipeline: RAGPipeline whose store receives the chunks
+            processor: PDFProcessor used for extraction and chunking
+            pdf_path: Path to the PDF file
+            doc_id: Document id; an existing document with this id is replaced
+            name: Display name (defaults to doc_id)
+            batch_size: Chunks embedded and indexed per step (defaults to pipeline.batch_size)
+            queue_size: Pages / chunk batches buffered between stages
+            document: Already-open document to read (e.g. the viewer's
+                PyMuPDFDocument, which serializes page access); the job
+                opens the file once itself otherwise and never closes this one
+        """
+        self.pipeline = pipeline
+        self.processor = processor
+        self.pdf_path = pdf_path
+        self.doc_id = doc_id
+        self.name = name or doc_id
+        self.batch_size = batch_size or pipeline.batch_size
+        self.queue_size = queue_size
+        self.document = document
+
+        self.state = "pending"
+        self.error: Optional[str] = None
+        self.trace_id: Optional[str] = None
+        self.pages_total = 0
+        self.pages_done = 0
+        self.chunks_created = 0
+        self.chunks_indexed = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+        self._cancel = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self.state in ("pending", "running")
+
+    def start(self) -> "IngestionJob":
+        """Start the job on a daemon thread and return immediately"""
+        if self._thread is not None:
+            raise RuntimeError("Job already started")
+        self.pipeline.ingestion_jobs.add(self)
+        self._thread = threading.Thread(target=self._run, name=f"ingest-{self.doc_id}", daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self) -> None:
+        """Ask every stage to stop; the partly indexed document is then removed"""
+        self._cancel.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the job ends
+
+        Returns:
+            True if the job has ended
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return not self.running
+
+    def progress(self) -> Dict[str, Any]:
+        """Snapshot of the job for display"""
+        end = self.finished_at or time.time()
+        return {
+            "state": self.state,
+            "error": self.error,
+            "pages_total": self.pages_total,
+            "pages_done": self.pages_done,
+            "chunks_created": self.chunks_created,
+            "chunks_indexed": self.chunks_indexed,
+            "elapsed": end - self.started_at if self.started_at else 0.0,
+            # Pages gate the work still to come, so they are the best estimate of completion
+            "fraction": self.pages_done / self.pages_total if self.pages_total else 0.0,
+        }
+
+    def _put(self, channel: queue.Queue, item) -> None:
+        """Put on a bounded queue without blocking past cancellation"""
+        while True:
+            if self._cancel.is_set():
+                raise JobCancelled()
+            try:
+                channel.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, channel: queue.Queue):
+        while True:
+            if self._cancel.is_set():
+                raise JobCancelled()
+            try:
+                return channel.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+    def _stage(self, name: str, target, parent: Span, *args) -> threading.Thread:
+        """Run one stage on its own thread; an error there cancels the job"""
+        def run():
+            try:
+                with tracer.span(name, parent=parent):
+                    target(*args)
+            except JobCancelled:
+                pass
+            except Exception as e:
+                if self.error is None:
+                    self.error = str(e)
+                logger.error(f"Ingestion of '{self.doc_id}' failed in {name}: {str(e)}")
+                self._cancel.set()
+
+        thread = threading.Thread(target=run, name=f"ingest-{self.doc_id}-{name}", daemon=True)
+        thread.start()
+        return thread
+
+    def _extract(self, pages: queue.Queue) -> None:
+        if self.document is not None:
+            self._extract_from(self.document, pages)
+            return
+        with open_pdf(self.pdf_path, self.processor.backend) as document:
+            self._extract_from(document, pages)
+
+    def _extract_from(self, document, pages: queue.Queue) -> None:
+        # One handle gives the page count and the text
+        self.pages_total = len(document)
+        for page in self.processor.iter_pages(self.pdf_path, document=document):
+            self._put(pages, page)
+            self.pages_done += 1
+        self._put(pages, _DONE)
+        tracer.increment("pages_extracted", self.pages_done)
+
+    def _pages(self, pages: queue.Queue) -> Iterator[str]:
+        while True:
+            page = self._get(pages)
+            if page is _DONE:
+                return
+            yield page
+
+    def _chunk(self, pages: queue.Queue, batches: queue.Queue) -> None:
+        # Batches carry chunk spans and their pages, so the store keeps page numbers
+        for batch in self.processor.iter_chunk_batches(self._pages(pages), self.batch_size):
+            self.chunks_created += len(batch[0])
+            self._put(batches, batch)
+        self._put(batches, _DONE)
+        tracer.increment("chunks_created", self.chunks_created)
+
+    def _run(self) -> None:
+        self.state = "running"
+        self.started_at = time.time()
+        store = self.pipeline.store
+        try:
+            with tracer.span("ingest_job", document=self.name) as span:
+                self.trace_id = span.trace_id
+                if self.doc_id in store.documents:
+                    store.remove(self.doc_id)
+                # Listed right away, so the UI can show the document while it fills up
+                store.extend(self.doc_id, [], np.empty((0, store.dim), dtype=np.float32), name=self.name)
+
+                pages: queue.Queue = queue.Queue(maxsize=self.queue_size)
+                batches: queue.Queue = queue.Queue(maxsize=self.queue_size)
+                stages = [
+                    self._stage("extract", self._extract, span, pages),
+                    self._stage("chunk", self._chunk, span, pages, batches),
+                ]
+                finished = False
+                try:
+                    # Embedding runs on this thread so its spans nest under the job
+                    while True:
+                        batch = self._get(batches)
+                        if batch is _DONE:
+                            break
+                        texts, spans = batch
+                        vectors = self.pipeline.embed_texts(texts)
+                        # Later batches only make sense next to the pages already stored
+                        if self.pipeline.store is not store:
+                            raise RuntimeError("The pipeline's corpus was replaced while indexing")
+                        store.extend(self.doc_id, texts, vectors, spans=spans)
+                        self.chunks_indexed += len(texts)
+                    finished = True
+                except JobCancelled:
+                    pass
+                finally:
+                    if not finished:
+                        self._cancel.set()
+                    for stage in stages:
+                        stage.join()
+                span.set(pages=self.pages_done, chunks=self.chunks_indexed)
+                if not finished:
+                    raise JobCancelled()
+
+            self.state = "done"
+            logger.info(f"Indexed '{self.name}': {self.pages_done} pages, {self.chunks_indexed} chunks")
+        except Exception as e:
+            if self.error is None and not isinstance(e, JobCancelled):
+                self.error = str(e)
+                logger.error(f"Ingestion of '{self.doc_id}' failed: {str(e)}")
+            self.state = "failed" if self.error is not None else "cancelled"
+            if self.doc_id in store.documents:
+                store.remove(self.doc_id)
+        finally:
+            self.finished_at = time.time()
+            self.pipeline.ingestion_jobs.discard(self)
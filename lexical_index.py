@@ -0,0 +1,316 @@
+"""
+Lexical Index Module
+In-memory BM25 inverted index stored as compact posting arrays
+"""
+
+import os
+import re
+import math
+import logging
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Words in any script joined by - _ . or + stay one token (course codes, formula
+# names) and are also indexed by their parts, so "MATH-2410" matches "math-2410" and "2410"
+_TOKEN = re.compile(r"\w+(?:[-_.+]\w+)*")
+_SEPARATORS = re.compile(r"[-_.+]")
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by can do does for from has have how if in into is it its "
+    "of on or so than that the their then there these this to was were what when where "
+    "which who why will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Case-folded terms of a text, without stopwords
+
+    Text is NFKC-normalized first, so accents typed as combining marks and
+    ligatures from PDF extraction ("ﬁ") match their precomposed forms.
+
+    Args:
+        text: Chunk or query text
+
+    Returns:
+        Terms in order, compound terms followed by their parts
+    """
+    terms = []
+    for token in _TOKEN.findall(unicodedata.normalize("NFKC", text).casefold()):
+        if token in STOPWORDS:
+            continue
+        terms.append(token)
+        if not token.isalnum():
+            # \w includes "_", so a part can be empty ("__init__")
+            terms.extend(part for part in _SEPARATORS.split(token) if part and part not in STOPWORDS)
+    return terms
+
+
+def count_terms(texts: Iterable[str]) -> List[Counter]:
+    """Term frequencies per text, computable outside any lock before BM25Index.add_counts"""
+    return [Counter(tokenize(text)) for text in texts]
+
+
+class _Segment:
+    """Postings of a contiguous range of rows, grouped by term id (CSR layout)"""
+
+    __slots__ = ("offsets", "rows", "tfs")
+
+    def __init__(self, term_ids: np.ndarray, rows: np.ndarray, tfs: np.ndarray, vocabulary_size: int):
+        order = np.argsort(term_ids, kind="stable")
+        self.rows = rows[order]
+        self.tfs = tfs[order]
+        self.offsets = np.zeros(vocabulary_size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=vocabulary_size), out=self.offsets[1:])
+
+    def postings(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        if term_id + 1 >= len(self.offsets):
+            return self.rows[:0], self.tfs[:0]
+        start, end = self.offsets[term_id], self.offsets[term_id + 1]
+        return self.rows[start:end], self.tfs[start:end]
+
+    def flat(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(term_ids, rows, tfs) of every posting"""
+        term_ids = np.repeat(np.arange(len(self.offsets) - 1, dtype=np.int32), np.diff(self.offsets))
+        return term_ids, self.rows, self.tfs
+
+
+class BM25Index:
+    """
+    Okapi BM25 over chunk texts, appendable like VectorIndex
+
+    Each add() packs its rows' postings into a segment of three flat
+    arrays (int32 rows, uint16 term frequencies and per-term offsets)
+    instead of per-term Python lists; once there are more than
+    max_segments segments they are merged into one. Row ids match the
+    order texts were added, so they line up with the vector index.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, max_segments: int = 8):
+        """
+        Initialize an empty index
+
+        Args:
+            k1: Term-frequency saturation
+            b: Document-length normalization strength
+            max_segments: Segments kept before they are merged
+        """
+        self.k1 = k1
+        self.b = b
+        self.max_segments = max_segments
+        self.vocabulary: Dict[str, int] = {}
+        self._df = np.zeros(0, dtype=np.int64)
+        self._lengths = np.zeros(0, dtype=np.float32)
+        self._size = 0
+        self._total_length = 0.0
+        self._segments: List[_Segment] = []
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the posting arrays"""
+        return sum(s.offsets.nbytes + s.rows.nbytes + s.tfs.nbytes for s in self._segments) + self._lengths.nbytes
+
+    def build(self, texts: Iterable[str]) -> None:
+        """Replace the index contents"""
+        self.__init__(self.k1, self.b, self.max_segments)
+        self.add(texts)
+
+    def add(self, texts: Iterable[str]) -> np.ndarray:
+        """
+        Index texts as new rows
+
+        Args:
+            texts: Chunk texts
+
+        Returns:
+            Row ids assigned to the texts
+        """
+        return self.add_counts(count_terms(texts))
+
+    def add_counts(self, counts: List[Counter]) -> np.ndarray:
+        """
+        Index pre-tokenized texts as new rows
+
+        Args:
+            counts: Term frequencies per text, from count_terms()
+
+        Returns:
+            Row ids assigned to the texts
+        """
+        term_ids: List[int] = []
+        rows: List[int] = []
+        tfs: List[int] = []
+        vocabulary = self.vocabulary
+
+        start = self._size
+        end = start + len(counts)
+        if end == start:
+            return np.arange(start, end)
+        for row, terms in enumerate(counts, start):
+            for term, count in terms.items():
+                term_ids.append(vocabulary.setdefault(term, len(vocabulary)))
+                rows.append(row)
+                tfs.append(count)
+        lengths = [sum(terms.values()) for terms in counts]
+
+        term_array = np.array(term_ids, dtype=np.int32)
+        df = np.bincount(term_array, minlength=len(vocabulary))
+        df[:len(self._df)] += self._df
+        self._df = df
+
+        if end > len(self._lengths):
+            grown = np.zeros(max(end, 2 * len(self._lengths), 1024), dtype=np.float32)
+            grown[:start] = self._lengths[:start]
+            self._lengths = grown
+        self._lengths[start:end] = lengths
+        self._total_length += sum(lengths)
+        self._size = end
+
+        self._segments.append(_Segment(
+            term_array,
+            np.array(rows, dtype=np.int32),
+            np.minimum(np.array(tfs), np.iinfo(np.uint16).max).astype(np.uint16),
+            len(vocabulary)
+        ))
+        if len(self._segments) > self.max_segments:
+            self._merge_segments()
+        return np.arange(start, end)
+
+    def _merge_segments(self) -> None:
+        parts = [segment.flat() for segment in self._segments]
+        self._segments = [_Segment(
+            np.concatenate([p[0] for p in parts]),
+            np.concatenate([p[1] for p in parts]),
+            np.concatenate([p[2] for p in parts]),
+            len(self.vocabulary)
+        )]
+
+    def save(self, directory: str) -> None:
+        """
+        Write the index as flat .npy arrays plus a term list
+
+        Segments are merged first, so the files hold one CSR segment.
+
+        Args:
+            directory: Existing directory; files are named bm25_*
+        """
+        if len(self._segments) > 1:
+            self._merge_segments()
+        if self._segments:
+            segment = self._segments[0]
+            offsets, rows, tfs = segment.offsets, segment.rows, segment.tfs
+        else:
+            offsets, rows, tfs = np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int32), np.empty(0, dtype=np.uint16)
+        np.save(os.path.join(directory, "bm25_offsets.npy"), offsets)
+        np.save(os.path.join(directory, "bm25_rows.npy"), rows)
+        np.save(os.path.join(directory, "bm25_tfs.npy"), tfs)
+        np.save(os.path.join(directory, "bm25_df.npy"), self._df)
+        np.save(os.path.join(directory, "bm25_lengths.npy"), self._lengths[:self._size])
+        # Tokens never contain whitespace, so one term per line is unambiguous
+        with open(os.path.join(directory, "bm25_terms.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(self.vocabulary))
+
+    @classmethod
+    def load(cls, directory: str, k1: float = 1.2, b: float = 0.75, max_segments: int = 8,
+             mmap: bool = True) -> "BM25Index":
+        """
+        Open an index written by save()
+
+        Args:
+            directory: Directory holding the bm25_* files
+            k1: Term-frequency saturation
+            b: Document-length normalization strength
+            max_segments: Segments kept before they are merged
+            mmap: Map the posting arrays read-only instead of reading them;
+                rows added later go to new in-memory segments
+
+        Returns:
+            The loaded index
+        """
+        mode = "r" if mmap else None
+        index = cls(k1, b, max_segments)
+        with open(os.path.join(directory, "bm25_terms.txt"), encoding="utf-8") as f:
+            terms = f.read()
+        index.vocabulary = {term: i for i, term in enumerate(terms.split("\n"))} if terms else {}
+        index._df = np.load(os.path.join(directory, "bm25_df.npy"))
+        index._lengths = np.load(os.path.join(directory, "bm25_lengths.npy"), mmap_mode=mode)
+        index._size = len(index._lengths)
+        index._total_length = float(index._lengths.sum(dtype=np.float64))
+        rows = np.load(os.path.join(directory, "bm25_rows.npy"), mmap_mode=mode)
+        if len(rows):
+            segment = _Segment.__new__(_Segment)
+            segment.offsets = np.load(os.path.join(directory, "bm25_offsets.npy"), mmap_mode=mode)
+            segment.rows = rows
+            segment.tfs = np.load(os.path.join(directory, "bm25_tfs.npy"), mmap_mode=mode)
+            index._segments.append(segment)
+        return index
+
+    def score(self, query: str, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        BM25 score of every row containing a query term
+
+        Args:
+            query: Query text
+            mask: Optional boolean array over row ids; False rows are skipped
+
+        Returns:
+            Tuple of (rows, scores) for matching rows, in row order
+        """
+        term_ids = {self.vocabulary[t] for t in tokenize(query) if t in self.vocabulary}
+        if not term_ids or not self._size:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        average_length = self._total_length / self._size or 1.0
+        all_rows, all_weights = [], []
+        for term_id in term_ids:
+            df = self._df[term_id]
+            idf = math.log(1 + (self._size - df + 0.5) / (df + 0.5))
+            for segment in self._segments:
+                rows, tfs = segment.postings(term_id)
+                if len(rows):
+                    tf = tfs.astype(np.float32)
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[rows] / average_length)
+                    all_rows.append(rows)
+                    all_weights.append(idf * tf * (self.k1 + 1) / (tf + norm))
+
+        rows = np.concatenate(all_rows)
+        # A dense accumulator over all rows is cheaper than sorting long posting lists
+        totals = np.bincount(rows, weights=np.concatenate(all_weights), minlength=self._size)
+        matched = np.zeros(self._size, dtype=bool)
+        matched[rows] = True
+        if mask is not None:
+            matched &= mask[:self._size]
+        matched_rows = np.flatnonzero(matched)
+        return matched_rows, totals[matched_rows].astype(np.float32)
+
+    def search(self, queries: List[str], top_k: int = 3,
+               mask: Optional[np.ndarray] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Find the top_k rows by BM25 score for each query
+
+        Args:
+            queries: Query texts
+            top_k: Number of results per query
+            mask: Optional boolean array over row ids; False rows are skipped
+
+        Returns:
+            One (rows, scores) pair per query, sorted by descending score;
+            fewer than top_k rows when fewer contain a query term
+        """
+        results = []
+        for query in queries:
+            rows, scores = self.score(query, mask)
+            if len(rows) > top_k:
+                best = np.argpartition(scores, -top_k)[-top_k:]
+                rows, scores = rows[best], scores[best]
+            order = np.argsort(-scores, kind="stable")
+            results.append((rows[order], scores[order]))
+        return results
@@ -0,0 +1,87 @@
+"""
+Model Registry Module
+Process-wide, thread-safe store of loaded embedding models
+"""
+
+import threading
+import logging
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+_models: Dict[str, "SentenceTransformer"] = {}
+_load_locks: Dict[str, threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+
+def get_embedding_model(name: str = DEFAULT_EMBEDDING_MODEL) -> "SentenceTransformer":
+    """
+    Return the shared instance of an embedding model, loading it on first use
+
+    Concurrent callers asking for the same model wait for a single load
+    instead of each loading their own copy; different models load in
+    parallel. sentence-transformers (and torch) is only imported here.
+
+    Args:
+        name: sentence-transformers model name
+
+    Returns:
+        Shared SentenceTransformer instance
+    """
+    model = _models.get(name)
+    if model is not None:
+        return model
+
+    with _registry_lock:
+        load_lock = _load_locks.setdefault(name, threading.Lock())
+
+    with load_lock:
+        model = _models.get(name)
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+
+            logger.info(f"Loading embedding model '{name}'...")
+            model = SentenceTransformer(name)
+            _models[name] = model
+            logger.info(f"Embedding model '{name}' loaded")
+    return model
+
+
+def loaded_models() -> List[str]:
+    """Names of models currently held in memory"""
+    return list(_models)
+
+
+def warm_up(names: Iterable[str] = (DEFAULT_EMBEDDING_MODEL,),
+            background: bool = False) -> Optional[threading.Thread]:
+    """
+    Load models and run one encode so the first real request is fast
+
+    Args:
+        names: Models to warm up
+        background: Load on a daemon thread and return immediately
+
+    Returns:
+        The warm-up thread when background is True, otherwise None
+    """
+    names = list(names)
+
+    def _run():
+        for name in names:
+            try:
+                get_embedding_model(name).encode(["warm-up"], show_progress_bar=False)
+            except Exception as e:
+                logger.error(f"Warm-up of '{name}' failed: {str(e)}")
+
+    if not background:
+        _run()
+        return None
+    thread = threading.Thread(target=_run, name="embedding-warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,186 @@
+"""
+Page Rendering Module
+On-demand PDF page rendering with a byte-bounded LRU image cache
+"""
+
+import os
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Hashable, List, Optional
+
+from telemetry import tracer
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class PageCache:
+    """
+    Thread-safe LRU cache of encoded page images bounded by total bytes
+
+    Shared by every viewer in the process, so memory stays flat no matter
+    how many pages or sessions there are.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Initialize an empty cache
+
+        Args:
+            max_bytes: Total size of cached images before LRU eviction
+        """
+        self.max_bytes = max_bytes
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        """Return the cached image and mark it recently used, or None"""
+        with self._lock:
+            image = self._entries.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def put(self, key: Hashable, image: bytes) -> None:
+        """Insert an image, evicting least-recently-used ones to fit"""
+        if len(image) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes_used -= len(previous)
+            self._entries[key] = image
+            self.bytes_used += len(image)
+            while self.bytes_used > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes_used -= len(evicted)
+
+    def document_bytes(self) -> Dict[Hashable, int]:
+        """Bytes cached per document, for keys that start with a document key as PageRenderer's do"""
+        usage: Dict[Hashable, int] = {}
+        with self._lock:
+            for key, image in self._entries.items():
+                usage[key[0]] = usage.get(key[0], 0) + len(image)
+        return usage
+
+    def discard_document(self, document_key: Hashable) -> int:
+        """
+        Drop every cached page of a document
+
+        Returns:
+            Bytes freed
+        """
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == document_key]
+            freed = sum(len(self._entries.pop(key)) for key in keys)
+            self.bytes_used -= freed
+        return freed
+
+
+class PageRenderer:
+    """
+    Renders the page being viewed and prefetches its neighbours
+
+    The requested page is rendered synchronously; pages within
+    prefetch_window on either side are rendered on a background thread
+    into the shared cache. Pending prefetches for pages the reader has
+    moved away from are cancelled.
+    """
+
+    def __init__(self, document, cache: PageCache, zoom: float = 1.5, image_format: str = "png",
+                 prefetch_window: int = 2, document_key: Optional[Hashable] = None):
+        """
+        Initialize a renderer for one open document
+
+        Args:
+            document: Open PyMuPDFDocument
+            cache: Shared page image cache
+            zoom: Render scale (1.0 = 72 dpi)
+            image_format: "png" (lossless) or "jpeg" (smaller)
+            prefetch_window: Pages before and after the current one to render ahead
+            document_key: Identity of the file's content for cache keys (defaults
+                to path, modification time and size)
+        """
+        self.document = document
+        self.cache = cache
+        self.zoom = zoom
+        self.image_format = image_format
+        self.prefetch_window = prefetch_window
+
+        if document_key is None:
+            # Key cached pages by file identity so a re-upload under the same name is not stale
+            stat = os.stat(document.pdf_path)
+            document_key = (os.path.abspath(document.pdf_path), stat.st_mtime_ns, stat.st_size)
+        self.document_key = document_key
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="page-prefetch")
+        self._pending: List[Future] = []
+
+    def __len__(self) -> int:
+        return len(self.document)
+
+    def _key(self, page_num: int) -> tuple:
+        return (self.document_key, page_num, self.zoom, self.image_format)
+
+    def _render(self, page_num: int) -> bytes:
+        """Render one page into the cache, unless another caller already did"""
+        key = self._key(page_num)
+        image = self.cache.get(key)
+        if image is None:
+            tracer.increment("cache_misses", cache="page")
+            with tracer.span("render_page", page=page_num, zoom=self.zoom, format=self.image_format) as span:
+                image = self.document.render_page(page_num, self.zoom, self.image_format)
+                span.set(bytes=len(image))
+            self.cache.put(key, image)
+            tracer.increment("pages_rendered")
+            tracer.increment("page_bytes_rendered", len(image))
+        else:
+            tracer.increment("cache_hits", cache="page")
+        return image
+
+    def get_page(self, page_num: int) -> bytes:
+        """
+        Return the encoded image of a page, rendering it if needed
+
+        Args:
+            page_num: Zero-based page number
+
+        Returns:
+            Encoded image bytes
+        """
+        image = self._render(page_num)
+        self.prefetch(page_num)
+        return image
+
+    def prefetch(self, page_num: int) -> None:
+        """Queue background renders of the pages around page_num"""
+        for future in self._pending:
+            future.cancel()
+
+        neighbours = []
+        for distance in range(1, self.prefetch_window + 1):
+            neighbours.extend([page_num + distance, page_num - distance])
+        self._pending = [
+            self._executor.submit(self._render, neighbour)
+            for neighbour in neighbours
+            if 0 <= neighbour < len(self) and self._key(neighbour) not in self.cache
+        ]
+
+    def close(self) -> None:
+        """Stop prefetching; the document itself is left open"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -4,49 +4,237 @@ Handles PDF extraction, text processing, and chunking
 """
 
 import os
-import PyPDF2
-from typing import List, Tuple
+import time
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Optional, Tuple
 import logging
+import numpy as np
+
+from chunk_store import ChunkSpans
+from telemetry import tracer
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+class PyPDF2Document:
+    """Text extraction through PyPDF2 (pure Python, slower)"""
+    
+    name = "pypdf2"
+    
+    def __init__(self, pdf_path: str):
+        """
+        Open a PDF for text extraction
+        
+        Args:
+            pdf_path: Path to the PDF file
+        """
+        import PyPDF2
+        
+        self.pdf_path = pdf_path
+        self._file = open(pdf_path, 'rb')
+        self._reader = PyPDF2.PdfReader(self._file)
+    
+    def __len__(self) -> int:
+        return len(self._reader.pages)
+    
+    def page_text(self, page_num: int) -> str:
+        """Extract the text of one page"""
+        return self._reader.pages[page_num].extract_text() or ""
+    
+    def close(self) -> None:
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class PyMuPDFDocument:
+    """
+    Text extraction and rendering through PyMuPDF (fitz)
+    
+    One open handle serves both the viewer and text extraction, so the
+    file is parsed once. PyMuPDF documents are not thread-safe, so page
+    access is serialized with a lock (the viewer prefetches on a thread).
+    """
+    
+    name = "pymupdf"
+    
+    def __init__(self, pdf_path: str):
+        """
+        Open a PDF for text extraction and rendering
+        
+        Args:
+            pdf_path: Path to the PDF file
+        """
+        import fitz
+        
+        self.pdf_path = pdf_path
+        self.document = fitz.open(pdf_path)
+        self.lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self.document)
+    
+    def page_text(self, page_num: int) -> str:
+        """Extract the text of one page"""
+        with self.lock:
+            return self.document[page_num].get_text()
+    
+    def render_page(self, page_num: int, zoom: float = 1.5, image_format: str = "ppm") -> bytes:
+        """
+        Rasterize one page
+        
+        Args:
+            page_num: Zero-based page number
+            zoom: Scale factor (1.0 = 72 dpi)
+            image_format: Any format supported by Pixmap.tobytes, e.g. "png", "jpeg" or "ppm"
+            
+        Returns:
+            Encoded image bytes
+        """
+        import fitz
+        
+        with self.lock:
+            pix = self.document[page_num].get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+        return pix.tobytes(image_format)
+    
+    def close(self) -> None:
+        with self.lock:
+            self.document.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+BACKENDS = {
+    PyPDF2Document.name: PyPDF2Document,
+    PyMuPDFDocument.name: PyMuPDFDocument,
+}
+
+
+def open_pdf(pdf_path: str, backend: str = "pypdf2"):
+    """
+    Open a PDF with the named extraction backend
+    
+    Args:
+        pdf_path: Path to the PDF file
+        backend: One of BACKENDS ("pypdf2" or "pymupdf")
+        
+    Returns:
+        Open document; close it or use it as a context manager
+    """
+    try:
+        document_class = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown PDF backend '{backend}'. Choose from: {', '.join(BACKENDS)}")
+    return document_class(pdf_path)
+
+
+def _extract_page_range(pdf_path: str, backend: str, start: int, end: int) -> List[str]:
+    """Extract pages [start, end) in a worker process (module-level so it pickles)"""
+    with open_pdf(pdf_path, backend) as document:
+        return [document.page_text(i) for i in range(start, end)]
+
+
 class PDFProcessor:
     """Processes PDF files and extracts text with chunking"""
     
-    def __init__(self, chunk_size: int = 500, chunk_overlap: int = 100):
+    def __init__(self, chunk_size: int = 500, chunk_overlap: int = 100, workers: int = 1,
+                 pages_per_task: int = 8, backend: str = "pypdf2"):
         """
         Initialize PDF Processor
         
         Args:
             chunk_size: Number of characters per chunk
             chunk_overlap: Number of overlapping characters between chunks
+            workers: Processes used for page extraction (1 = serial, 0 = all cores)
+            pages_per_task: Pages extracted per worker task in parallel mode
+            backend: Text extraction backend, "pypdf2" or "pymupdf" (much faster)
         """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown PDF backend '{backend}'. Choose from: {', '.join(BACKENDS)}")
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.backend = backend
+        self.workers = workers
+        self.pages_per_task = pages_per_task
+    
+    def iter_pages(self, pdf_path: str, workers: Optional[int] = None, document=None) -> Iterator[str]:
+        """
+        Stream the text of each page, in order
+        
+        In parallel mode, page ranges are extracted by a process pool with at
+        most two tasks per worker in flight, so memory is bounded by a window
+        of pages rather than the whole book.
+        
+        Args:
+            pdf_path: Path to the PDF file
+            workers: Override self.workers for this call
+            document: Already-open document (e.g. the viewer's PyMuPDFDocument)
+                to read serially instead of opening the file again
+            
+        Yields:
+            Text of each page
+        """
+        workers = self.workers if workers is None else workers
+        if workers == 0:
+            workers = os.cpu_count() or 1
+        
+        if document is not None:
+            logger.info(f"Extracting text from {len(document)} pages")
+            for page_num in range(len(document)):
+                yield document.page_text(page_num)
+            return
+        
+        with open_pdf(pdf_path, self.backend) as document:
+            num_pages = len(document)
+            logger.info(f"Extracting text from {num_pages} pages")
+            
+            if workers <= 1 or num_pages <= self.pages_per_task:
+                for page_num in range(num_pages):
+                    yield document.page_text(page_num)
+                return
+        
+        ranges = [
+            (start, min(start + self.pages_per_task, num_pages))
+            for start in range(0, num_pages, self.pages_per_task)
+        ]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            next_range = 0
+            while pending or next_range < len(ranges):
+                while next_range < len(ranges) and len(pending) < 2 * workers:
+                    pending.append(executor.submit(_extract_page_range, pdf_path, self.backend, *ranges[next_range]))
+                    next_range += 1
+                yield from pending.popleft().result()
     
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
+    def extract_text_from_pdf(self, pdf_path: str, document=None) -> str:
         """
         Extract text from a PDF file
         
         Args:
             pdf_path: Path to the PDF file
+            document: Optional already-open document to reuse
             
         Returns:
             Extracted text from the PDF
         """
         try:
-            text = ""
-            with open(pdf_path, 'rb') as pdf_file:
-                pdf_reader = PyPDF2.PdfReader(pdf_file)
-                num_pages = len(pdf_reader.pages)
-                logger.info(f"Extracting text from {num_pages} pages")
-                
-                for page_num in range(num_pages):
-                    page = pdf_reader.pages[page_num]
-                    text += page.extract_text()
-                    text += "\n"
+            with tracer.span("extract", backend=self.backend) as span:
+                # Join once instead of repeated += (quadratic on large books)
+                pages = [page + "\n" for page in self.iter_pages(pdf_path, document=document)]
+                text = "".join(pages)
+                span.set(pages=len(pages), chars=len(text))
+            tracer.increment("pages_extracted", len(pages))
             
             logger.info(f"Successfully extracted {len(text)} characters from PDF")
             return text
@@ -68,29 +256,150 @@ class PDFProcessor:
         chunks = []
         start = 0
         
-        while start < len(text):
-            end = start + self.chunk_size
-            chunk = text[start:end]
-            chunks.append(chunk.strip())
-            
-            # Move start position with overlap
-            start = end - self.chunk_overlap
+        with tracer.span("chunk", chars=len(text)) as span:
+            while start < len(text):
+                end = start + self.chunk_size
+                chunk = text[start:end]
+                chunks.append(chunk.strip())
+                
+                # Move start position with overlap
+                start = end - self.chunk_overlap
+            span.set(chunks=len(chunks))
+        tracer.increment("chunks_created", len(chunks))
         
         logger.info(f"Created {len(chunks)} chunks from text")
         return chunks
     
-    def process_pdf(self, pdf_path: str) -> List[str]:
+    def iter_chunks(self, pages: Iterable[str]) -> Iterator[str]:
+        """
+        Chunk a stream of pages without joining the whole document
+        
+        Produces exactly the chunks chunk_text would for the pages joined
+        with a newline after each, while holding at most about one page
+        plus one chunk of text.
+        
+        Args:
+            pages: Page texts in order
+            
+        Yields:
+            Text chunks
+        """
+        for chunk, _, _ in self.iter_chunk_spans(pages):
+            yield chunk
+    
+    def iter_chunk_spans(self, pages: Iterable[str]) -> Iterator[Tuple[str, int, int]]:
+        """
+        Chunk a stream of pages, also locating each chunk in the document
+        
+        Args:
+            pages: Page texts in order
+            
+        Yields:
+            (chunk, start, end) where chunk is what iter_chunks yields and
+            equals the pages joined with a newline after each, sliced [start:end]
+        """
+        step = self.chunk_size - self.chunk_overlap
+        buffer = ""
+        # Document offset of buffer[0]
+        base = 0
+        start = 0
+        
+        for page in pages:
+            # Drop text every remaining chunk starts after
+            buffer = buffer[start:] + page + "\n"
+            base += start
+            start = 0
+            while start + self.chunk_size <= len(buffer):
+                yield self._stripped_span(buffer, start, base)
+                start += step
+        
+        while start < len(buffer):
+            yield self._stripped_span(buffer, start, base)
+            start += step
+    
+    def _stripped_span(self, buffer: str, start: int, base: int) -> Tuple[str, int, int]:
+        """One chunk with surrounding whitespace stripped, and its document span"""
+        raw = buffer[start:start + self.chunk_size]
+        chunk = raw.strip()
+        if not chunk:
+            return chunk, base + start, base + start
+        offset = base + start + len(raw) - len(raw.lstrip())
+        return chunk, offset, offset + len(chunk)
+    
+    def iter_chunk_batches(self, pages: Iterable[str], batch_size: int) -> Iterator[Tuple[List[str], ChunkSpans]]:
+        """
+        Chunk a stream of pages into batches ready for VectorStore.extend
+        
+        Each batch carries the pages read since the previous batch, so the
+        store can keep every page once and page numbers for each chunk.
+        
+        Args:
+            pages: Page texts in order
+            batch_size: Chunks per batch
+            
+        Yields:
+            (chunk texts, their spans)
+        """
+        new_pages: List[str] = []
+        
+        def recorded() -> Iterator[str]:
+            for page in pages:
+                new_pages.append(page + "\n")
+                yield page
+        
+        texts: List[str] = []
+        starts: List[int] = []
+        ends: List[int] = []
+        for chunk, start, end in self.iter_chunk_spans(recorded()):
+            texts.append(chunk)
+            starts.append(start)
+            ends.append(end)
+            if len(texts) == batch_size:
+                yield texts, ChunkSpans(np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64), new_pages[:])
+                new_pages.clear()
+                texts, starts, ends = [], [], []
+        if texts or new_pages:
+            yield texts, ChunkSpans(np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64), new_pages[:])
+    
+    def process_pdf(self, pdf_path: str, document=None) -> List[str]:
         """
         Complete pipeline: extract and chunk text
         
+        Pages are chunked as they are extracted instead of after the last
+        page is done, so the extract and chunk spans are measured by
+        splitting the interleaved time between the two.
+        
         Args:
             pdf_path: Path to the PDF file
+            document: Optional already-open document to reuse
             
         Returns:
             List of text chunks
         """
-        text = self.extract_text_from_pdf(pdf_path)
-        chunks = self.chunk_text(text)
+        with tracer.span("process_pdf", backend=self.backend) as span:
+            started = time.perf_counter()
+            extract_time = 0.0
+            page_count = 0
+            
+            def timed_pages():
+                nonlocal extract_time, page_count
+                pages = self.iter_pages(pdf_path, document=document)
+                while True:
+                    page_started = time.perf_counter()
+                    page = next(pages, None)
+                    extract_time += time.perf_counter() - page_started
+                    if page is None:
+                        return
+                    page_count += 1
+                    yield page
+            
+            chunks = list(self.iter_chunks(timed_pages()))
+            tracer.record_span("extract", extract_time, backend=self.backend, pages=page_count)
+            tracer.record_span("chunk", time.perf_counter() - started - extract_time, chunks=len(chunks))
+            span.set(pages=page_count, chunks=len(chunks))
+        tracer.increment("pages_extracted", page_count)
+        tracer.increment("chunks_created", len(chunks))
+        logger.info(f"Created {len(chunks)} chunks from PDF")
         return chunks
     
     def save_processed_pdf(self, pdf_path: str, output_dir: str = "data/uploaded_pdfs") -> str:
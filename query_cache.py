@@ -0,0 +1,243 @@
+"""
+Query Cache Module
+In-memory LRU caches for query embeddings and generated answers
+"""
+
+import hashlib
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+import numpy as np
+
+from embedding_cache import normalize_text
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """
+    Thread-safe LRU mapping bounded by entry count, with optional time-to-live
+
+    Used for query embeddings: encoding is deterministic, so entries never
+    go stale and ttl is normally left unset.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None):
+        """
+        Initialize an empty cache
+
+        Args:
+            max_entries: Entries kept before least-recently-used ones are evicted
+            ttl: Seconds an entry stays valid (None = forever)
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value and mark it recently used, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Insert a value, evicting the least-recently-used entry when full"""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic(), value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Entry count, hit/miss counters and hit rate"""
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate}
+
+
+class AnswerCache:
+    """
+    Thread-safe LRU cache of LLM answers with a time-to-live
+
+    Answers are grouped by a context key covering everything the LLM sees
+    besides the question: corpus version, retrieved chunks, system prompt
+    and model (see make_key). Within a context, a lookup matches the
+    normalized question exactly or, when semantic_threshold is set, any
+    cached question whose embedding has at least that cosine similarity.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: Optional[float] = 3600.0,
+                 semantic_threshold: Optional[float] = None):
+        """
+        Initialize an empty cache
+
+        Args:
+            max_entries: Answers kept before least-recently-used ones are evicted
+            ttl: Seconds an answer stays valid (None = forever)
+            semantic_threshold: Minimum cosine similarity between question
+                embeddings for a semantic hit (None = exact matches only)
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.semantic_threshold = semantic_threshold
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        # (context_key, question) -> (stored_at, question_embedding, answer)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Optional[np.ndarray], str]]" = OrderedDict()
+        # context_key -> questions cached under it, for semantic lookups
+        self._questions: Dict[str, Dict[str, None]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(corpus_version: str, chunk_ids: Iterable[str], system_prompt: str, model: str) -> str:
+        """
+        Context key for an answer
+
+        Args:
+            corpus_version: VectorStore.version at retrieval time
+            chunk_ids: Ids of the retrieved chunks, in prompt order
+            system_prompt: System prompt sent to the LLM
+            model: LLM model name
+
+        Returns:
+            Hex digest identifying the context
+        """
+        prompt_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+        parts = [corpus_version, ",".join(chunk_ids), prompt_hash, model]
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return self.ttl is not None and now - stored_at > self.ttl
+
+    def _drop(self, key: Tuple[str, str]) -> None:
+        del self._entries[key]
+        questions = self._questions[key[0]]
+        del questions[key[1]]
+        if not questions:
+            del self._questions[key[0]]
+
+    def get(self, context_key: str, question: str, question_embedding: Optional[np.ndarray] = None) -> Optional[str]:
+        """
+        Look up a cached answer
+
+        Args:
+            context_key: Key from make_key
+            question: User question
+            question_embedding: Normalized embedding of the question, needed
+                for semantic hits
+
+        Returns:
+            Cached answer, or None
+        """
+        now = time.monotonic()
+        key = (context_key, normalize_text(question))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[0], now):
+                self._drop(key)
+                entry = None
+
+            if entry is None and self.semantic_threshold is not None and question_embedding is not None:
+                key = self._nearest(context_key, question_embedding, now)
+                entry = self._entries.get(key) if key is not None else None
+                if entry is not None:
+                    self.semantic_hits += 1
+
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def _nearest(self, context_key: str, question_embedding: np.ndarray, now: float) -> Optional[Tuple[str, str]]:
+        """Most similar live question in a context above the threshold (caller holds the lock)"""
+        keys, vectors = [], []
+        for question in list(self._questions.get(context_key, ())):
+            key = (context_key, question)
+            stored_at, vector, _ = self._entries[key]
+            if self._expired(stored_at, now):
+                self._drop(key)
+            elif vector is not None:
+                keys.append(key)
+                vectors.append(vector)
+        if not vectors:
+            return None
+
+        similarities = np.stack(vectors) @ question_embedding
+        best = int(np.argmax(similarities))
+        return keys[best] if similarities[best] >= self.semantic_threshold else None
+
+    def put(self, context_key: str, question: str, answer: str,
+            question_embedding: Optional[np.ndarray] = None) -> None:
+        """
+        Store an answer, evicting the least-recently-used one when full
+
+        Args:
+            context_key: Key from make_key
+            question: User question
+            answer: Generated answer
+            question_embedding: Normalized embedding of the question
+        """
+        key = (context_key, normalize_text(question))
+        if question_embedding is not None:
+            question_embedding = np.array(question_embedding, dtype=np.float32)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic(), question_embedding, answer)
+            self._questions.setdefault(context_key, {})[key[1]] = None
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._questions.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Entry count, hit/miss counters and hit rate"""
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+        }
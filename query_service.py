@@ -0,0 +1,555 @@
+"""
+Query Service Module
+Headless HTTP API for ingest, retrieve and answer, with micro-batched queries
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import argparse
+import tempfile
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from dotenv import load_dotenv
+
+from embedding_cache import EmbeddingCache
+from index_snapshot import SnapshotDirectory
+from ingestion_jobs import IngestionJob
+from model_registry import DEFAULT_EMBEDDING_MODEL, get_embedding_model
+from pdf_processor import PDFProcessor
+from query_cache import AnswerCache, LRUCache
+from rag_pipeline import RAGPipeline
+from rate_limiter import RateLimiter
+from telemetry import tracer
+from vector_store import RETRIEVAL_MODES
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MAX_TOP_K = 20
+MAX_BODY_BYTES = 100 * 1024 * 1024
+MAX_LINE_BYTES = 8192
+MAX_HEADERS = 100
+# Finished ingestion jobs kept for GET /ingest/<job_id>, oldest forgotten first
+MAX_FINISHED_JOBS = 256
+ROUTES = ("health", "documents", "ingest", "retrieve", "answer")
+# The service's own corpus, kept apart from the app's per-upload snapshots
+SNAPSHOT_TAG = "service"
+
+
+class HTTPError(Exception):
+    """Ends a request with an error status and a JSON {"error": message} body"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class _Query:
+    """A query waiting in the batcher"""
+
+    __slots__ = ("text", "top_k", "future")
+
+    def __init__(self, text: str, top_k: int, future: asyncio.Future):
+        self.text = text
+        self.top_k = top_k
+        self.future = future
+
+
+class QueryBatcher:
+    """
+    Collects concurrent queries for a few milliseconds and retrieves them together
+
+    Requests arriving within max_wait of the first one (and any that
+    queue up while a batch is being searched) are embedded in one model
+    call and scored with one matrix product. Queries restricted to
+    different documents or retrieval modes are searched as separate
+    groups of the batch. Batches run one at a time on a single thread, so
+    queries never wait on each other for the model; ingestion jobs still
+    embed on their own threads alongside them, as Streamlit sessions
+    sharing the cached model already do.
+    """
+
+    def __init__(self, pipeline: RAGPipeline, max_wait: float = 0.005, max_batch: int = 64):
+        """
+        Initialize the batcher (call start() from the event loop)
+
+        Args:
+            pipeline: Pipeline whose model and index serve every query
+            max_wait: Seconds to wait for more queries after the first
+            max_batch: Most queries searched in one batch
+        """
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        self.pipeline = pipeline
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self.batches = 0
+        self.queries = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="query-batch")
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def search(self, query: str, top_k: int, doc_ids: Optional[List[str]] = None,
+                     mode: Optional[str] = None) -> Tuple[List[Tuple[str, float]], Any]:
+        """
+        Retrieve chunks for one query as part of the next batch
+
+        Returns:
+            Tuple of (chunks with scores, query embedding or None)
+        """
+        future = asyncio.get_running_loop().create_future()
+        key = (tuple(doc_ids) if doc_ids is not None else None, mode or self.pipeline.retrieval_mode)
+        self._queue.put_nowait((key, _Query(query, top_k, future)))
+        return await future
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            if self.max_wait > 0 and self._queue.qsize() < self.max_batch - 1:
+                await asyncio.sleep(self.max_wait)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            groups: Dict[tuple, List[_Query]] = {}
+            for key, query in batch:
+                groups.setdefault(key, []).append(query)
+            started = time.perf_counter()
+            for (doc_ids, mode), queries in groups.items():
+                await self._search_group(queries, doc_ids, mode)
+            tracer.record_span("query_batch", time.perf_counter() - started, queries=len(batch), groups=len(groups))
+            tracer.increment("batched_queries", len(batch))
+            self.batches += 1
+            self.queries += len(batch)
+
+    async def _search_group(self, queries: List[_Query], doc_ids: Optional[tuple], mode: str) -> None:
+        """Search queries sharing a document filter and mode, at the largest top_k any of them asked for"""
+        loop = asyncio.get_running_loop()
+        try:
+            results, embeddings = await loop.run_in_executor(
+                self._executor,
+                self.pipeline.retrieve_for_answers,
+                [query.text for query in queries],
+                max(query.top_k for query in queries),
+                list(doc_ids) if doc_ids is not None else None,
+                mode
+            )
+        except Exception as e:
+            logger.error(f"Error searching a batch of {len(queries)} queries: {str(e)}")
+            for query in queries:
+                if not query.future.done():
+                    query.future.set_exception(e)
+            return
+        for i, query in enumerate(queries):
+            # A client that disconnected has its future cancelled
+            if not query.future.done():
+                query.future.set_result((results[i][:query.top_k], None if embeddings is None else embeddings[i]))
+
+
+def _hit_json(hit) -> Dict[str, Any]:
+    """A search result as JSON; pages are 1-based, null when unknown"""
+    text, score = hit
+    page = getattr(hit, "page", -1)
+    return {
+        "text": text,
+        "score": float(score),
+        "doc_id": getattr(hit, "doc_id", None),
+        "page": page + 1 if page >= 0 else None,
+    }
+
+
+class QueryService:
+    """
+    HTTP/1.1 JSON API over one shared RAG pipeline
+
+    Endpoints:
+        GET    /health               corpus size and batching counters
+        GET    /documents            indexed documents
+        DELETE /documents/<doc_id>   remove a document (409 while it is being indexed)
+        POST   /ingest?doc_id=..&name=..   PDF bytes as the body; indexed
+                                     in the background, returns 202 and a job id
+        GET    /ingest/<job_id>      progress of an ingestion job (the last
+                                     MAX_FINISHED_JOBS finished ones are kept)
+        POST   /retrieve             {"query", "top_k", "doc_ids", "mode"}
+        POST   /answer               {"query", "top_k", "doc_ids"}
+
+    Runs on asyncio with only the standard library. Keep-alive
+    connections are supported; chunked request bodies are not.
+    """
+
+    def __init__(self, pipeline: RAGPipeline, processor: PDFProcessor, system_prompt: str,
+                 max_wait: float = 0.005, max_batch: int = 64, answer_workers: int = 8,
+                 upload_dir: str = "data/uploaded_pdfs", snapshot_dir: Optional[str] = None):
+        """
+        Initialize the service
+
+        Args:
+            pipeline: Pipeline shared by every request
+            processor: PDFProcessor used to ingest uploads
+            system_prompt: System prompt for answers
+            max_wait: Seconds queries wait to be batched with others
+            max_batch: Most queries retrieved in one batch
+            answer_workers: LLM calls in flight at once
+            upload_dir: Where uploaded PDFs are stored, by content hash
+            snapshot_dir: Save the corpus here after each ingestion, tagged
+                SNAPSHOT_TAG (None disables)
+        """
+        self.pipeline = pipeline
+        self.processor = processor
+        self.system_prompt = system_prompt
+        self.upload_dir = upload_dir
+        self.snapshot_dir = snapshot_dir
+        self.batcher = QueryBatcher(pipeline, max_wait, max_batch)
+        self.jobs: Dict[str, IngestionJob] = {}
+        self._answer_executor = ThreadPoolExecutor(max_workers=answer_workers, thread_name_prefix="answer")
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8000) -> int:
+        """
+        Start listening
+
+        Returns:
+            The port bound (useful with port 0)
+        """
+        self.batcher.start()
+        self._server = await asyncio.start_server(self._serve_connection, host, port, limit=MAX_LINE_BYTES)
+        port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Query service listening on http://{host}:{port}")
+        return port
+
+    async def serve_forever(self) -> None:
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.batcher.close()
+        self._answer_executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    await self._respond(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    return
+                if request is None:
+                    return
+                method, target, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                started = time.perf_counter()
+                try:
+                    status, payload = await self.handle(method, target, headers, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except Exception as e:
+                    logger.error(f"Error handling {method} {target}: {str(e)}")
+                    status, payload = 500, {"error": str(e)}
+                route = urlsplit(target).path.lstrip("/").partition("/")[0]
+                route = route if route in ROUTES else "other"
+                tracer.record_span("http_request", time.perf_counter() - started, method=method, route=route, status=status)
+                tracer.increment("http_requests", route=route, status=status)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[tuple]:
+        """(method, target, headers, body), or None once the client closes the connection"""
+        line = await self._read_line(reader, 400, "Request line")
+        if not line:
+            return None
+        try:
+            method, target, _ = line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        headers = {}
+        while True:
+            line = await self._read_line(reader, 431, "Header line")
+            if line in (b"\r\n", b"\n", b""):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise HTTPError(431, f"More than {MAX_HEADERS} headers")
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HTTPError(411, "Send a Content-Length instead of a chunked body")
+        length = headers.get("content-length") or "0"
+        if not (length.isascii() and length.isdigit()):
+            raise HTTPError(400, "Content-Length must be a non-negative integer")
+        length = int(length)
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, f"Request body over {MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, headers, body
+
+    async def _read_line(self, reader: asyncio.StreamReader, status: int, what: str) -> bytes:
+        try:
+            return await reader.readline()
+        except ValueError:
+            # The line ran past the stream limit (MAX_LINE_BYTES)
+            raise HTTPError(status, f"{what} over {MAX_LINE_BYTES} bytes")
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def handle(self, method: str, target: str, headers: Dict[str, str], body: bytes) -> Tuple[int, Any]:
+        """
+        Route one request
+
+        Returns:
+            Tuple of (HTTP status, JSON-serializable payload)
+        """
+        url = urlsplit(target)
+        parts = [part for part in url.path.split("/") if part]
+        route = (method, parts[0] if parts else "")
+
+        if route == ("GET", "health"):
+            store = self.pipeline.store
+            return 200, {
+                "status": "ok",
+                "documents": len(store.documents),
+                "chunks": len(store),
+                "corpus_version": store.version,
+                "batches": self.batcher.batches,
+                "batched_queries": self.batcher.queries,
+            }
+        if route == ("GET", "documents") and len(parts) == 1:
+            return 200, {"documents": self.pipeline.list_documents()}
+        if route == ("DELETE", "documents") and len(parts) == 2:
+            if parts[1] not in self.pipeline.store.documents:
+                raise HTTPError(404, f"No document '{parts[1]}'")
+            # Its job would otherwise recreate it with the next batch
+            self._check_not_indexing(parts[1])
+            self.pipeline.remove_document(parts[1])
+            return 200, {"removed": parts[1]}
+        if route == ("POST", "ingest") and len(parts) == 1:
+            return await self._ingest(parse_qs(url.query), body)
+        if route == ("GET", "ingest") and len(parts) == 2:
+            job = self.jobs.get(parts[1])
+            if job is None:
+                raise HTTPError(404, f"No ingestion job '{parts[1]}'")
+            return 200, dict(job.progress(), job_id=parts[1], doc_id=job.doc_id)
+        if route == ("POST", "retrieve") and len(parts) == 1:
+            request = self._query_request(body, allow_mode=True)
+            hits, _ = await self.batcher.search(**request)
+            return 200, {"query": request["query"], "results": [_hit_json(hit) for hit in hits]}
+        if route == ("POST", "answer") and len(parts) == 1:
+            request = self._query_request(body, allow_mode=False)
+            hits, embedding = await self.batcher.search(**request)
+            try:
+                answer = await asyncio.get_running_loop().run_in_executor(
+                    self._answer_executor,
+                    self.pipeline.answer_from_retrieved,
+                    request["query"], hits, self.system_prompt, embedding
+                )
+            except Exception as e:
+                logger.error(f"Error generating answer: {str(e)}")
+                raise HTTPError(502, f"Error generating answer: {str(e)}")
+            return 200, {"query": request["query"], "answer": answer, "sources": [_hit_json(hit) for hit in hits]}
+        if parts and parts[0] in ROUTES:
+            raise HTTPError(405, f"{method} not allowed on /{'/'.join(parts)}")
+        raise HTTPError(404, f"Not found: {url.path}")
+
+    def _query_request(self, body: bytes, allow_mode: bool) -> Dict[str, Any]:
+        """Validate a retrieve/answer body into QueryBatcher.search arguments"""
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "Body must be JSON")
+        if not isinstance(request, dict):
+            raise HTTPError(400, "Body must be a JSON object")
+        query = request.get("query")
+        if not isinstance(query, str) or not query.strip():
+            raise HTTPError(400, "'query' must be a non-empty string")
+        top_k = request.get("top_k", 3)
+        if not isinstance(top_k, int) or not 1 <= top_k <= MAX_TOP_K:
+            raise HTTPError(400, f"'top_k' must be an integer from 1 to {MAX_TOP_K}")
+        doc_ids = request.get("doc_ids")
+        if doc_ids is not None and not (isinstance(doc_ids, list) and all(isinstance(d, str) for d in doc_ids)):
+            raise HTTPError(400, "'doc_ids' must be a list of document ids")
+        mode = request.get("mode") if allow_mode else None
+        if mode is not None and mode not in RETRIEVAL_MODES:
+            raise HTTPError(400, f"'mode' must be one of: {', '.join(RETRIEVAL_MODES)}")
+        return {"query": query, "top_k": top_k, "doc_ids": doc_ids, "mode": mode}
+
+    async def _ingest(self, params: Dict[str, List[str]], body: bytes) -> Tuple[int, Any]:
+        """Store an uploaded PDF by content hash and index it on a background job"""
+        doc_id = (params.get("doc_id") or [""])[0]
+        if not doc_id:
+            raise HTTPError(400, "Pass the document id as ?doc_id=")
+        if not body.startswith(b"%PDF"):
+            raise HTTPError(415, "Body must be a PDF file")
+        self._check_not_indexing(doc_id)
+
+        loop = asyncio.get_running_loop()
+        pdf_path = os.path.join(self.upload_dir, f"{hashlib.sha256(body).hexdigest()[:16]}.pdf")
+        await loop.run_in_executor(None, self._store_upload, pdf_path, body)
+        # Another upload of the same document may have started while this one was written
+        self._check_not_indexing(doc_id)
+
+        name = (params.get("name") or [doc_id])[0]
+        job = IngestionJob(self.pipeline, self.processor, pdf_path, doc_id=doc_id, name=name).start()
+        job_id = uuid.uuid4().hex[:12]
+        self.jobs[job_id] = job
+        self._forget_finished_jobs()
+        loop.create_task(self._after_ingest(job))
+        return 202, {"job_id": job_id, "doc_id": doc_id, "status": f"/ingest/{job_id}"}
+
+    def _check_not_indexing(self, doc_id: str) -> None:
+        if any(job.running and job.doc_id == doc_id for job in self.jobs.values()):
+            raise HTTPError(409, f"Document '{doc_id}' is being indexed")
+
+    def _store_upload(self, pdf_path: str, body: bytes) -> None:
+        if os.path.exists(pdf_path):
+            return
+        os.makedirs(self.upload_dir, exist_ok=True)
+        fd, staging = tempfile.mkstemp(suffix=".tmp", dir=self.upload_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(body)
+            os.replace(staging, pdf_path)
+        finally:
+            if os.path.exists(staging):
+                os.remove(staging)
+
+    def _forget_finished_jobs(self) -> None:
+        finished = [job_id for job_id, job in self.jobs.items() if not job.running]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    async def _after_ingest(self, job: IngestionJob) -> None:
+        """Save a snapshot once a job has finished and no other is running"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, job.wait)
+        if job.state != "done" or not self.snapshot_dir or any(other.running for other in self.jobs.values()):
+            return
+        chunking = {"chunk_size": self.processor.chunk_size, "chunk_overlap": self.processor.chunk_overlap}
+        try:
+            await loop.run_in_executor(None, self._save_snapshot, chunking)
+        except Exception as e:
+            logger.error(f"Error saving index snapshot: {str(e)}")
+
+    def _save_snapshot(self, chunking: Dict[str, int]) -> None:
+        self.pipeline.save_snapshot(self.snapshot_dir, chunking, SNAPSHOT_TAG)
+        SnapshotDirectory(self.snapshot_dir).prune()
+
+
+def create_pipeline() -> RAGPipeline:
+    """Pipeline configured from the same environment variables as the Streamlit app"""
+    requests_per_minute = float(os.getenv("GROQ_REQUESTS_PER_MINUTE", "0"))
+    tokens_per_minute = float(os.getenv("GROQ_TOKENS_PER_MINUTE", "0"))
+    similarity = os.getenv("ANSWER_CACHE_SIMILARITY")
+    return RAGPipeline(
+        # The same directory as the app's: the cache is safe to share between processes
+        embedding_cache=EmbeddingCache(
+            "data/embedding_cache",
+            DEFAULT_EMBEDDING_MODEL,
+            dim=get_embedding_model(DEFAULT_EMBEDDING_MODEL).get_sentence_embedding_dimension()
+        ),
+        query_cache=LRUCache(max_entries=4096),
+        answer_cache=AnswerCache(
+            max_entries=int(os.getenv("ANSWER_CACHE_SIZE", "512")),
+            ttl=float(os.getenv("ANSWER_CACHE_TTL", "3600")),
+            semantic_threshold=float(similarity) if similarity else None
+        ),
+        rate_limiter=(
+            RateLimiter(requests_per_minute or None, tokens_per_minute or None)
+            if requests_per_minute or tokens_per_minute else None
+        ),
+        retrieval_mode=os.getenv("RETRIEVAL_MODE", "dense"),
+        index_type=os.getenv("VECTOR_INDEX", "exact")
+    )
+
+
+def load_system_prompt(path: str = "prompts/tutor_prompt.txt") -> str:
+    try:
+        with open(path, "r") as f:
+            return f.read()
+    except FileNotFoundError:
+        logger.warning(f"System prompt not found at {path}")
+        return "You are a helpful AI tutor. Answer questions based on the provided course material."
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless HTTP API for the AI Study Assistant")
+    parser.add_argument("--host", default=os.getenv("SERVICE_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVICE_PORT", "8000")))
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="How long queries wait to be batched")
+    parser.add_argument("--max-batch", type=int, default=64, help="Most queries retrieved in one batch")
+    parser.add_argument("--answer-workers", type=int, default=8, help="LLM calls in flight at once")
+    args = parser.parse_args()
+
+    load_dotenv()
+    snapshot_dir = os.getenv("SERVICE_SNAPSHOT_DIR", "data/service_snapshots")
+    processor = PDFProcessor(backend="pymupdf")
+    pipeline = create_pipeline()
+    # Start from the corpus a previous run of the service saved; the app's
+    # per-upload snapshots belong to its users and are never picked up here
+    if snapshot_dir:
+        try:
+            pipeline.load_snapshot(
+                snapshot_dir,
+                chunking={"chunk_size": processor.chunk_size, "chunk_overlap": processor.chunk_overlap},
+                tag=SNAPSHOT_TAG
+            )
+        except FileNotFoundError:
+            pass
+        except (ValueError, OSError) as e:
+            logger.warning(f"Ignoring index snapshot: {str(e)}")
+
+    service = QueryService(
+        pipeline,
+        processor,
+        load_system_prompt(),
+        max_wait=args.max_wait_ms / 1000,
+        max_batch=args.max_batch,
+        answer_workers=args.answer_workers,
+        snapshot_dir=snapshot_dir or None
+    )
+
+    async def run():
+        await service.start(args.host, args.port)
+        try:
+            await service.serve_forever()
+        finally:
+            await service.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
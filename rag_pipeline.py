@@ -4,43 +4,124 @@ Handles embeddings, vector store, and retrieval
 """
 
 import os
+import json
+import time
+import uuid
+import hashlib
 import logging
-from typing import List, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Tuple, Optional
 import numpy as np
-from groq import Groq
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+
+from context_packer import estimate_tokens, pack_context
+from embedding_cache import EmbeddingCache, normalize_text, text_key
+from chunk_store import ChunkSpans
+from embedding_pool import EmbeddingPool
+from index_snapshot import SNAPSHOT_FORMAT, SnapshotDirectory
+from model_registry import DEFAULT_EMBEDDING_MODEL, get_embedding_model
+from query_cache import AnswerCache, LRUCache
+from rate_limiter import RateLimiter
+from telemetry import tracer
+from vector_store import RETRIEVAL_MODES, VectorStore
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+MAX_ANSWER_TOKENS = 1000
+NO_CONTEXT_ANSWER = "I couldn't find relevant information in the PDF."
+
 
 class RAGPipeline:
     """Handles retrieval and augmented generation with LLM"""
     
-    def __init__(self, api_key: Optional[str] = None, model: str = "llama-3.3-70b-versatile"):
+    def __init__(self, api_key: Optional[str] = None, model: str = "llama-3.3-70b-versatile",
+                 batch_size: int = 64, embedding_model_name: str = DEFAULT_EMBEDDING_MODEL,
+                 embedding_cache: Optional[EmbeddingCache] = None, index_type: str = "exact",
+                 index_params: Optional[Dict[str, Any]] = None, query_cache: Optional[LRUCache] = None,
+                 answer_cache: Optional[AnswerCache] = None, rate_limiter: Optional[RateLimiter] = None,
+                 context_token_budget: Optional[int] = 3000, retrieval_mode: str = "dense",
+                 embedding_pool: Optional[EmbeddingPool] = None):
         """
         Initialize RAG Pipeline with Groq (Free!)
         
         Args:
             api_key: Groq API key (defaults to GROQ_API_KEY env var)
             model: LLM model to use (default: llama-3.3-70b-versatile)
+            batch_size: Number of chunks encoded per model call during ingestion
+            embedding_model_name: sentence-transformers model used for embeddings
+            embedding_cache: Optional persistent cache checked before encoding chunks
+            index_type: "exact" for brute-force search, "ivf" for approximate
+                search over large corpora, or "int8" / "binary" to keep
+                compressed vectors in memory and full precision on disk
+            index_params: Extra index settings, e.g. {"n_lists": 1024, "n_probe": 16} for "ivf"
+                or {"rescore_factor": 10} for "binary"
+            query_cache: LRU of query embeddings (defaults to a private 1024-entry cache)
+            answer_cache: Optional cache of generated answers, so repeated
+                questions over the same context skip the LLM
+            rate_limiter: Optional client-side limit on LLM requests and tokens per minute
+            context_token_budget: Maximum estimated tokens of retrieved context
+                per prompt, after overlapping chunks are merged (None = unlimited)
+            retrieval_mode: "dense" (embeddings), "lexical" (BM25 keywords, no
+                query embedding) or "hybrid" (BM25 candidates reranked by embeddings)
+            embedding_pool: Optional worker processes used to embed large
+                ingestions; small ones are still encoded in-process
         """
+        if embedding_cache is not None and embedding_cache.model_name != embedding_model_name:
+            raise ValueError(
+                f"Embedding cache is for '{embedding_cache.model_name}', not '{embedding_model_name}'"
+            )
+        if embedding_pool is not None and embedding_pool.model_name != embedding_model_name:
+            raise ValueError(
+                f"Embedding pool runs '{embedding_pool.model_name}', not '{embedding_model_name}'"
+            )
+        if retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode '{retrieval_mode}'. Choose from: {', '.join(RETRIEVAL_MODES)}")
+        
         self.api_key = api_key or os.getenv("GROQ_API_KEY")
         self.model = model
-        self.client = Groq(api_key=self.api_key)
+        self.batch_size = batch_size
+        self.embedding_model_name = embedding_model_name
+        self.embedding_cache = embedding_cache
+        self.embedding_pool = embedding_pool
+        self.query_cache = query_cache if query_cache is not None else LRUCache(max_entries=1024)
+        self.answer_cache = answer_cache
+        self.rate_limiter = rate_limiter
+        self.context_token_budget = context_token_budget
+        self.retrieval_mode = retrieval_mode
+        self._client = None
+        # Timing of the most recent LLM call (see generate_answer / generate_answer_stream)
+        self.last_generation_stats: Dict[str, float] = {}
+        # Token accounting of the most recent context packing (see pack_context)
+        self.last_context_stats: Dict[str, int] = {}
+        # Ingestion jobs writing to the store (see IngestionJob); cancelled by replace_store
+        self.ingestion_jobs = set()
+        
+        # Use local embeddings (free, no API needed!), shared by every pipeline in the process
+        self.embedding_model = get_embedding_model(embedding_model_name)
         
-        # Use local embeddings (free, no API needed!)
-        logger.info("Loading local embedding model...")
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-        logger.info("Embedding model loaded successfully")
+        self.embedding_dim = self.embedding_model.get_sentence_embedding_dimension()
+        if embedding_cache is not None and embedding_cache.dim != self.embedding_dim:
+            raise ValueError(f"Embedding cache stores {embedding_cache.dim}-dim vectors, model produces {self.embedding_dim}")
         
-        self.chunks = []
-        self.embeddings = []
+        self.index_type = index_type
+        self.store = VectorStore(self.embedding_dim, index_type, index_params)
         
         if not self.api_key:
             logger.warning("GROQ_API_KEY not set. LLM generation may fail.")
     
+    @property
+    def client(self):
+        """Groq client, created on first use so importing this module stays cheap"""
+        if self._client is None:
+            from groq import Groq
+            
+            self._client = Groq(api_key=self.api_key)
+        return self._client
+    
+    @client.setter
+    def client(self, client) -> None:
+        self._client = client
+    
     def get_embedding(self, text: str) -> List[float]:
         """
         Get embedding for text using local model (FREE!)
@@ -59,85 +140,416 @@ class RAGPipeline:
             logger.error(f"Error getting embedding: {str(e)}")
             raise
     
-    def ingest_documents(self, chunks: List[str]) -> None:
+    @property
+    def index(self):
+        """Search index over every stored chunk, including not-yet-compacted removed ones"""
+        return self.store.index
+    
+    @property
+    def chunks(self) -> List[str]:
+        """Texts of all live chunks, across documents"""
+        return self.store.live_texts()
+    
+    @property
+    def embeddings(self) -> np.ndarray:
+        """(n_chunks, dim) float32 matrix of L2-normalized vectors for live chunks"""
+        return self.store.live_vectors()
+    
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Encode queries in a single model call
+        
+        Queries already in the query-embedding cache are not re-encoded;
+        only the rest are sent to the model.
+        
+        Args:
+            queries: Query strings
+            
+        Returns:
+            Array of shape (len(queries), embedding_dim), rows L2-normalized
+        """
+        keys = [(self.embedding_model_name, normalize_text(query)) for query in queries]
+        matrix = np.empty((len(queries), self.embedding_dim), dtype=np.float32)
+        pending = []
+        for i, key in enumerate(keys):
+            vector = self.query_cache.get(key)
+            if vector is None:
+                pending.append(i)
+            else:
+                matrix[i] = vector
+        
+        tracer.increment("cache_hits", len(queries) - len(pending), cache="query_embedding")
+        tracer.increment("cache_misses", len(pending), cache="query_embedding")
+        if not pending:
+            return matrix
+        
+        try:
+            with tracer.span("embed_query", queries=len(pending)):
+                vectors = self.embedding_model.encode(
+                    [queries[i] for i in pending],
+                    batch_size=len(pending),
+                    convert_to_numpy=True,
+                    normalize_embeddings=True,
+                    show_progress_bar=False
+                )
+        except Exception as e:
+            logger.error(f"Error getting query embeddings: {str(e)}")
+            raise
+        
+        matrix[pending] = vectors
+        for i in pending:
+            self.query_cache.put(keys[i], matrix[i].copy())
+        return matrix
+    
+    def embed_texts(self, texts: List[str], batch_size: Optional[int] = None,
+                    progress_callback: Optional[Callable[[int, int], None]] = None) -> np.ndarray:
         """
-        Ingest document chunks and create embeddings
+        Encode texts in batches into one pre-normalized float32 matrix
+        
+        When an embedding cache is configured, cached vectors are reused and
+        only the misses are sent to the model. With an embedding pool and
+        enough misses, they are encoded across its worker processes instead.
+        
+        Args:
+            texts: Texts to embed
+            batch_size: Texts per model call (defaults to self.batch_size)
+            progress_callback: Called as progress_callback(done, total) after each batch
+            
+        Returns:
+            Array of shape (len(texts), embedding_dim), rows L2-normalized
+        """
+        batch_size = batch_size or self.batch_size
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        
+        total = len(texts)
+        with tracer.span("embed", chunks=total) as span:
+            if self.embedding_cache is not None:
+                matrix, hit_mask = self.embedding_cache.get_many(texts)
+                pending = np.flatnonzero(~hit_mask)
+                logger.info(f"Embedding cache hits: {total - len(pending)}/{total} chunks")
+                tracer.increment("cache_hits", total - len(pending), cache="embedding")
+                tracer.increment("cache_misses", len(pending), cache="embedding")
+            else:
+                matrix = np.empty((total, self.embedding_dim), dtype=np.float32)
+                pending = np.arange(total)
+            
+            done = total - len(pending)
+            if done and progress_callback is not None:
+                progress_callback(done, total)
+            
+            if self.embedding_pool is not None and self.embedding_pool.worthwhile(len(pending)):
+                batch = [texts[i] for i in pending]
+                offset = done
+                vectors = self.embedding_pool.encode(
+                    batch,
+                    progress_callback and (lambda encoded, _: progress_callback(offset + encoded, total))
+                )
+                tracer.increment("chunks_embedded", len(batch))
+                matrix[pending] = vectors
+                if self.embedding_cache is not None:
+                    self.embedding_cache.put_many(batch, vectors)
+                logger.info(f"Processed {total}/{total} chunks on {self.embedding_pool.processes} processes")
+                span.set(encoded=len(pending), processes=self.embedding_pool.processes)
+                return matrix
+            
+            for start in range(0, len(pending), batch_size):
+                rows = pending[start:start + batch_size]
+                batch = [texts[i] for i in rows]
+                with tracer.span("embed_batch", size=len(batch)):
+                    vectors = self.embedding_model.encode(
+                        batch,
+                        batch_size=len(batch),
+                        convert_to_numpy=True,
+                        normalize_embeddings=True,
+                        show_progress_bar=False
+                    )
+                tracer.increment("chunks_embedded", len(batch))
+                matrix[rows] = vectors
+                if self.embedding_cache is not None:
+                    self.embedding_cache.put_many(batch, vectors)
+            
+                done += len(batch)
+                logger.info(f"Processed {done}/{total} chunks")
+                if progress_callback is not None:
+                    progress_callback(done, total)
+            span.set(encoded=len(pending))
+        
+        return matrix
+    
+    def ingest_documents(self, chunks: List[str], batch_size: Optional[int] = None,
+                         progress_callback: Optional[Callable[[int, int], None]] = None) -> None:
+        """
+        Ingest document chunks and create embeddings, replacing the whole corpus
         
         Args:
             chunks: List of text chunks to ingest
+            batch_size: Chunks per model call (defaults to self.batch_size)
+            progress_callback: Called as progress_callback(done, total) after each batch
+        """
+        self._cancel_ingestion_jobs()
+        self.store.clear()
+        self.add_document(chunks, doc_id="default", batch_size=batch_size, progress_callback=progress_callback)
+    
+    def add_document(self, chunks: List[str], name: Optional[str] = None, doc_id: Optional[str] = None,
+                     batch_size: Optional[int] = None,
+                     progress_callback: Optional[Callable[[int, int], None]] = None,
+                     spans: Optional[ChunkSpans] = None) -> str:
         """
-        self.chunks = chunks
-        self.embeddings = []
+        Add one document to the corpus, embedding only its own chunks
+        
+        Args:
+            chunks: Text chunks of the document
+            name: Display name (defaults to the document id)
+            doc_id: Document id; an existing document with this id is replaced
+            batch_size: Chunks per model call (defaults to self.batch_size)
+            progress_callback: Called as progress_callback(done, total) after each batch
+            spans: Where the chunks sit in the document's pages (see
+                PDFProcessor.iter_chunk_batches), so results carry page numbers
+            
+        Returns:
+            Id of the added document
+        """
+        doc_id = doc_id or uuid.uuid4().hex[:12]
         
         logger.info(f"Creating embeddings for {len(chunks)} chunks...")
-        for i, chunk in enumerate(chunks):
-            try:
-                embedding = self.get_embedding(chunk)
-                self.embeddings.append(embedding)
-                
-                if (i + 1) % 10 == 0:
-                    logger.info(f"Processed {i + 1}/{len(chunks)} chunks")
+        try:
+            embeddings = self.embed_texts(chunks, batch_size, progress_callback)
+        except Exception as e:
+            logger.error(f"Error embedding chunks: {str(e)}")
+            raise
+        
+        self.store.add(doc_id, list(chunks), embeddings, name=name, spans=spans)
+        
+        logger.info(f"Successfully created {len(embeddings)} embeddings")
+        return doc_id
+    
+    def remove_document(self, doc_id: str) -> None:
+        """
+        Remove a document from the corpus
+        
+        Args:
+            doc_id: Id returned by add_document
+        """
+        self.store.remove(doc_id)
+    
+    def list_documents(self) -> List[Dict[str, Any]]:
+        """
+        List documents in the corpus
+        
+        Returns:
+            One dict per document with id, name, num_chunks and added_at
+        """
+        return self.store.list_documents()
+    
+    def save_snapshot(self, root: str, chunking: Optional[Dict[str, Any]] = None,
+                      tag: Optional[str] = None) -> str:
+        """
+        Save the corpus as a versioned snapshot under root
+        
+        The snapshot holds the chunk texts, their embeddings, the BM25
+        postings, the document list, the embedding model id and the
+        chunking parameters. Its version is derived from all of those, so
+        saving an unchanged corpus again reuses the existing snapshot.
+        
+        Args:
+            root: Snapshot directory (see index_snapshot.SnapshotDirectory)
+            chunking: Parameters the chunks were made with, e.g.
+                {"chunk_size": 500, "chunk_overlap": 100}; checked on load
+            tag: Also publish the snapshot under this tag, so it can be
+                loaded by a key the caller knows (e.g. its documents' hashes)
             
-            except Exception as e:
-                logger.error(f"Error embedding chunk {i}: {str(e)}")
-                raise
+        Returns:
+            Version of the saved snapshot
+        """
+        snapshots = SnapshotDirectory(root)
+        chunking = dict(chunking or {})
+        with tracer.span("snapshot_save", chunks=len(self.store)) as span:
+            key = json.dumps(
+                [SNAPSHOT_FORMAT, self.embedding_model_name, self.embedding_dim, chunking, self.store.version],
+                sort_keys=True
+            )
+            version = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+            manifest = {
+                "embedding_model": self.embedding_model_name,
+                "embedding_dim": self.embedding_dim,
+                "chunking": chunking,
+                "corpus_version": self.store.version,
+                "num_documents": len(self.store.documents),
+                "num_chunks": len(self.store),
+            }
+            span.set(version=version, reused=snapshots.exists(version))
+            snapshots.write(version, manifest, self.store.save, tag=tag)
+        return version
+    
+    def replace_store(self, store: VectorStore) -> None:
+        """
+        Swap in another corpus
+        
+        Running ingestion jobs are cancelled and waited for first, since
+        the rest of their batches would otherwise land in the old store.
         
-        logger.info(f"Successfully created {len(self.embeddings)} embeddings")
+        Args:
+            store: The new store
+        """
+        self._cancel_ingestion_jobs()
+        self.store = store
+    
+    def _cancel_ingestion_jobs(self) -> None:
+        """Cancel running ingestion jobs and wait until they have cleaned up"""
+        for job in list(self.ingestion_jobs):
+            logger.warning(f"Cancelling ingestion of '{job.doc_id}': the corpus is being replaced")
+            job.cancel()
+            job.wait()
     
-    def retrieve_relevant_chunks(self, query: str, top_k: int = 3) -> List[Tuple[str, float]]:
+    def load_snapshot(self, root: str, version: Optional[str] = None,
+                      chunking: Optional[Dict[str, Any]] = None, tag: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Replace the corpus with a saved snapshot
+        
+        Embeddings and BM25 postings are memory-mapped read-only, so loading
+        is near-instant and every process serving the same snapshot shares
+        one copy of the vectors through the OS page cache. The store keeps
+        this pipeline's index type and settings.
+        
+        Args:
+            root: Snapshot directory
+            version: Snapshot version
+            chunking: Expected chunking parameters; a snapshot chunked
+                differently is rejected
+            tag: Load the version published under this tag (when no version is given)
+            
+        Returns:
+            The snapshot's manifest
+            
+        Raises:
+            FileNotFoundError: If there is no such snapshot or tag
+            ValueError: If the snapshot was made with another format,
+                embedding model or chunking
+        """
+        snapshots = SnapshotDirectory(root)
+        if version is None:
+            if tag is None:
+                raise ValueError("Pass the snapshot version or tag to load")
+            version = snapshots.tagged(tag)
+            if version is None:
+                raise FileNotFoundError(f"No index snapshot tagged '{tag}' in {root}")
+        manifest = snapshots.manifest(version)
+        if manifest["embedding_model"] != self.embedding_model_name or manifest["embedding_dim"] != self.embedding_dim:
+            raise ValueError(
+                f"Snapshot {version} was embedded with '{manifest['embedding_model']}' "
+                f"({manifest['embedding_dim']} dims), not '{self.embedding_model_name}'"
+            )
+        if chunking is not None and manifest["chunking"] != chunking:
+            raise ValueError(f"Snapshot {version} was chunked with {manifest['chunking']}, not {chunking}")
+        
+        with tracer.span("snapshot_load", version=version, chunks=manifest["num_chunks"]):
+            self.replace_store(VectorStore.load(snapshots.path(version), **self.store.settings))
+        return manifest
+    
+    def retrieve_relevant_chunks(self, query: str, top_k: int = 3, doc_ids: Optional[List[str]] = None,
+                                 mode: Optional[str] = None) -> List[Tuple[str, float]]:
         """
         Retrieve most relevant chunks for a query
         
         Args:
             query: User query
             top_k: Number of top chunks to retrieve
+            doc_ids: Only search these documents (default: all)
+            mode: Retrieval mode for this call (default: the pipeline's retrieval_mode)
             
         Returns:
-            List of (chunk, similarity_score) tuples
+            List of (chunk, similarity_score) tuples; each is a ChunkHit whose
+            doc_id and page say where the chunk came from
         """
-        if not self.embeddings:
-            logger.error("No embeddings available. Ingest documents first.")
-            return []
-        
-        # Get query embedding
-        query_embedding = self.get_embedding(query)
-        query_embedding = np.array(query_embedding).reshape(1, -1)
+        return self.retrieve_relevant_chunks_batch([query], top_k, doc_ids, mode)[0]
+    
+    def retrieve_relevant_chunks_batch(self, queries: List[str], top_k: int = 3,
+                                       doc_ids: Optional[List[str]] = None,
+                                       mode: Optional[str] = None) -> List[List[Tuple[str, float]]]:
+        """
+        Retrieve most relevant chunks for several queries at once
         
-        # Calculate similarities
-        embeddings_array = np.array(self.embeddings)
-        similarities = cosine_similarity(query_embedding, embeddings_array)[0]
+        Queries are embedded in one model call and scored against the
+        index with one matrix product.
         
-        # Get top k indices
-        top_indices = np.argsort(similarities)[::-1][:top_k]
+        Args:
+            queries: User queries
+            top_k: Number of top chunks to retrieve per query
+            doc_ids: Only search these documents (default: all)
+            mode: Retrieval mode for this call (default: the pipeline's retrieval_mode)
+            
+        Returns:
+            One list of (chunk, similarity_score) tuples per query; scores are
+            BM25 scores rather than similarities in lexical mode
+        """
+        if len(self.store) == 0:
+            logger.error("No embeddings available. Ingest documents first.")
+            return [[] for _ in queries]
         
-        # Return chunks with scores
-        results = [
-            (self.chunks[idx], float(similarities[idx]))
-            for idx in top_indices
-        ]
+        results, _ = self._search(queries, top_k, doc_ids, mode)
         
-        logger.info(f"Retrieved {len(results)} relevant chunks")
+        logger.info(f"Retrieved {sum(len(r) for r in results)} relevant chunks for {len(queries)} queries")
         return results
     
-    def generate_answer(self, query: str, context_chunks: List[str], system_prompt: str) -> str:
+    def retrieve_for_answers(self, queries: List[str], top_k: int = 3, doc_ids: Optional[List[str]] = None,
+                             mode: Optional[str] = None) -> Tuple[List[List[Tuple[str, float]]], Optional[np.ndarray]]:
         """
-        Generate answer using LLM with context
+        Retrieve chunks for several queries, also returning their embeddings
+        
+        Like retrieve_relevant_chunks_batch, for callers that answer the
+        queries later with answer_from_retrieved: passing each query's
+        embedding along lets the answer cache match reworded questions.
         
         Args:
-            query: User queryGroq LLM (FREE!)
+            queries: User queries
+            top_k: Number of top chunks to retrieve per query
+            doc_ids: Only search these documents (default: all)
+            mode: Retrieval mode for this call (default: the pipeline's retrieval_mode)
+            
+        Returns:
+            Tuple of (one list of chunks with scores per query, query
+            embeddings or None in lexical mode or when the corpus is empty)
+        """
+        if len(self.store) == 0:
+            logger.error("No embeddings available. Ingest documents first.")
+            return [[] for _ in queries], None
+        return self._search(list(queries), top_k, doc_ids, mode)
+    
+    def answer_from_retrieved(self, query: str, retrieved: List[Tuple[str, float]], system_prompt: str,
+                              query_embedding: Optional[np.ndarray] = None) -> str:
+        """
+        Answer a question from chunks already retrieved for it
         
         Args:
             query: User query
-            context_chunks: Relevant chunks from retrieval
+            retrieved: Chunks with scores, e.g. from retrieve_for_answers
             system_prompt: System prompt for the AI
+            query_embedding: The query's embedding, for the answer cache
             
         Returns:
-            Generated answer
+            The answer (a fixed reply when nothing was retrieved)
         """
+        if not retrieved:
+            return NO_CONTEXT_ANSWER
+        with tracer.span("answer", top_k=len(retrieved)):
+            return self._answer_from_context(query, query_embedding, retrieved, system_prompt)
+    
+    def _search(self, queries: List[str], top_k: int, doc_ids: Optional[List[str]],
+                mode: Optional[str] = None) -> Tuple[List[List[Tuple[str, float]]], Optional[np.ndarray]]:
+        """Search the store, returning results and the query embeddings (None in lexical mode)"""
+        mode = mode or self.retrieval_mode
+        # Keyword search needs no embedding, so lexical mode skips the model entirely
+        query_embeddings = self.embed_queries(queries) if mode != "lexical" else None
+        results = self.store.search(query_embeddings, top_k, doc_ids, query_texts=queries, mode=mode)
+        return results, query_embeddings
+    
+    def _build_messages(self, query: str, context_chunks: List[str], system_prompt: str) -> List[Dict[str, str]]:
+        """Chat messages for a query and its retrieved context"""
         # Combine context
         context = "\n\n".join(context_chunks)
         
-        messages = [
+        return [
             {
                 "role": "system",
                 "content": system_prompt
@@ -147,45 +559,349 @@ class RAGPipeline:
                 "content": f"Context from the PDF:\n\n{context}\n\nQuestion: {query}"
             }
         ]
+    
+    def _record_generation(self, started: float, first_token: Optional[float], tokens: int,
+                           cached: bool = False, prompt_tokens: Optional[int] = None) -> None:
+        """Store time-to-first-token and throughput of the last LLM call, and trace it"""
+        finished = time.perf_counter()
+        if first_token is None:
+            # Without streaming the first token arrives with the last, so
+            # throughput is measured over the whole call
+            first_token = finished
+            generation_time = finished - started
+        else:
+            generation_time = finished - first_token
+        self.last_generation_stats = {
+            "time_to_first_token": first_token - started,
+            "total_time": finished - started,
+            "tokens": tokens,
+            "tokens_per_second": tokens / generation_time if generation_time > 0 else 0.0,
+            "cached": cached,
+        }
+        if cached:
+            return
+        
+        tracer.record_span(
+            "llm_call",
+            finished - started,
+            model=self.model,
+            time_to_first_token=first_token - started,
+            completion_tokens=tokens,
+            prompt_tokens=prompt_tokens
+        )
+        tracer.increment("llm_requests", model=self.model)
+        tracer.increment("llm_tokens", tokens, kind="completion")
+        if prompt_tokens:
+            tracer.increment("llm_tokens", prompt_tokens, kind="prompt")
+    
+    def _retrieve_for_answer(self, query: str, top_k: int,
+                             doc_ids: Optional[List[str]]) -> Tuple[List[Tuple[str, float]], Optional[np.ndarray]]:
+        """Retrieve chunks for one query, also returning its embedding (if any) for the answer cache"""
+        if len(self.store) == 0:
+            logger.error("No embeddings available. Ingest documents first.")
+            return [], None
+        
+        results, query_embeddings = self._search([query], top_k, doc_ids)
+        logger.info(f"Retrieved {len(results[0])} relevant chunks")
+        return results[0], None if query_embeddings is None else query_embeddings[0]
+    
+    def _pack_context(self, retrieved: List[Tuple[str, float]]) -> List[str]:
+        """Merge overlapping retrieved chunks and fit them to the context token budget"""
+        with tracer.span("pack_context", chunks=len(retrieved)) as span:
+            passages, stats = pack_context([chunk for chunk, _ in retrieved], self.context_token_budget)
+            span.set(**stats)
+        tracer.increment("context_tokens_saved", stats["tokens_saved"])
+        self.last_context_stats = stats
+        logger.info(
+            f"Packed {len(retrieved)} chunks into {len(passages)} passages "
+            f"({stats['output_tokens']} tokens, {stats['tokens_saved']} saved)"
+        )
+        return passages
+    
+    def _answer_cache_key(self, context_chunks: List[str], system_prompt: str) -> str:
+        """Answer cache key for a prompt built from these (packed) chunks"""
+        chunk_ids = [text_key(chunk) for chunk in context_chunks]
+        return AnswerCache.make_key(self.store.version, chunk_ids, system_prompt, self.model)
+    
+    def _cached_answer(self, cache_key: str, query: str, query_embedding: Optional[np.ndarray]) -> Optional[str]:
+        """Look up an answer, recording a zero-token generation on a hit"""
+        started = time.perf_counter()
+        answer = self.answer_cache.get(cache_key, query, query_embedding)
+        tracer.increment("cache_hits" if answer is not None else "cache_misses", cache="answer")
+        if answer is not None:
+            self._record_generation(started, None, 0, cached=True)
+            logger.info(f"Answer served from cache (hit rate {self.answer_cache.hit_rate:.0%})")
+        return answer
+    
+    def _reserve_quota(self, messages: List[Dict[str, str]]) -> int:
+        """Wait for the rate limiter to admit one LLM call; returns the tokens reserved"""
+        if self.rate_limiter is None:
+            return 0
+        # About four characters per token, plus the largest possible completion
+        reserved = sum(estimate_tokens(message["content"]) for message in messages) + MAX_ANSWER_TOKENS
+        waited = self.rate_limiter.acquire(reserved)
+        tracer.increment("rate_limit_wait_seconds", waited)
+        if waited > 0.05:
+            logger.info(f"Waited {waited:.1f}s for the LLM rate limit")
+        return reserved
+    
+    def _settle_quota(self, reserved: int, used: int) -> None:
+        """Refund the part of a reservation the LLM call did not use"""
+        if self.rate_limiter is not None and reserved:
+            self.rate_limiter.settle(reserved, used)
+    
+    def generate_answer(self, query: str, context_chunks: List[str], system_prompt: str) -> str:
+        """
+        Generate answer using LLM with context
+        
+        Args:
+            query: User queryGroq LLM (FREE!)
+        
+        Args:
+            query: User query
+            context_chunks: Relevant chunks from retrieval
+            system_prompt: System prompt for the AI
+            
+        Returns:
+            Generated answer
+        """
+        messages = self._build_messages(query, context_chunks, system_prompt)
+        reserved = self._reserve_quota(messages)
+        # Until usage is reported, a call (even a failed one) is charged its prompt
+        used = reserved - MAX_ANSWER_TOKENS
         
         try:
+            started = time.perf_counter()
             # Using Groq's free API (14,400 requests/day!)
             response = self.client.chat.completions.create(
                 model=self.model,
                 messages=messages,
                 temperature=0.7,
-                max_tokens=1000
+                max_tokens=MAX_ANSWER_TOKENS
             )
             
             answer = response.choices[0].message.content
+            usage = getattr(response, "usage", None)
+            self._record_generation(
+                started,
+                None,
+                getattr(usage, "completion_tokens", 0) or 0,
+                prompt_tokens=getattr(usage, "prompt_tokens", None)
+            )
+            used = getattr(usage, "total_tokens", None) or reserved
             logger.info("Successfully generated answer with Groq")
             return answer
         
         except Exception as e:
+            tracer.increment("llm_errors", model=self.model)
             logger.error(f"Error generating answer: {str(e)}")
             raise
+        
+        finally:
+            self._settle_quota(reserved, used)
     
-    def answer_question(self, query: str, system_prompt: str, top_k: int = 3) -> Tuple[str, List[Tuple[str, float]]]:
+    def generate_answer_stream(self, query: str, context_chunks: List[str], system_prompt: str) -> Iterator[str]:
+        """
+        Generate answer using LLM with context, yielding text as it arrives
+        
+        Time-to-first-token and tokens per second are stored in
+        last_generation_stats once the stream is exhausted. A stream that
+        fails or is closed early is charged to the rate limiter for its
+        prompt and the tokens received so far.
+        
+        Args:
+            query: User query
+            context_chunks: Relevant chunks from retrieval
+            system_prompt: System prompt for the AI
+            
+        Yields:
+            Answer text fragments (roughly one token each)
+        """
+        messages = self._build_messages(query, context_chunks, system_prompt)
+        reserved = self._reserve_quota(messages)
+        first_token = None
+        tokens = 0
+        
+        try:
+            started = time.perf_counter()
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=MAX_ANSWER_TOKENS,
+                stream=True
+            )
+            
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                if first_token is None:
+                    first_token = time.perf_counter()
+                tokens += 1
+                yield delta
+        
+        except Exception as e:
+            tracer.increment("llm_errors", model=self.model)
+            logger.error(f"Error generating answer: {str(e)}")
+            raise
+        
+        finally:
+            # Also runs when the consumer closes the stream early (GeneratorExit)
+            self._settle_quota(reserved, reserved - MAX_ANSWER_TOKENS + tokens)
+        
+        self._record_generation(started, first_token, tokens)
+        stats = self.last_generation_stats
+        logger.info(
+            f"Streamed answer with Groq: first token after {stats['time_to_first_token']:.2f}s, "
+            f"{stats['tokens_per_second']:.1f} tokens/s"
+        )
+    
+    def answer_question(self, query: str, system_prompt: str, top_k: int = 3,
+                        doc_ids: Optional[List[str]] = None) -> Tuple[str, List[Tuple[str, float]]]:
         """
         Complete RAG pipeline: retrieve and generate
         
+        With an answer cache, a question already answered over the same
+        context is served without calling the LLM.
+        
         Args:
             query: User query
             system_prompt: System prompt for the AI
             top_k: Number of chunks to retrieve
+            doc_ids: Only search these documents (default: all)
             
         Returns:
             Tuple of (answer, retrieved_chunks_with_scores)
         """
-        # Retrieve relevant chunks
-        retrieved = self.retrieve_relevant_chunks(query, top_k)
-        
-        if not retrieved:
-            return "I couldn't find relevant information in the PDF.", []
+        with tracer.span("answer", top_k=top_k):
+            # Retrieve relevant chunks
+            retrieved, query_embedding = self._retrieve_for_answer(query, top_k, doc_ids)
+            
+            if not retrieved:
+                return NO_CONTEXT_ANSWER, []
+            
+            return self._answer_from_context(query, query_embedding, retrieved, system_prompt), retrieved
+    
+    def _answer_from_context(self, query: str, query_embedding: Optional[np.ndarray],
+                             retrieved: List[Tuple[str, float]], system_prompt: str) -> str:
+        """Answer from already retrieved chunks, through the answer cache when there is one"""
+        context_chunks = self._pack_context(retrieved)
         
-        context_chunks = [chunk for chunk, _ in retrieved]
+        if self.answer_cache is not None:
+            cache_key = self._answer_cache_key(context_chunks, system_prompt)
+            answer = self._cached_answer(cache_key, query, query_embedding)
+            if answer is not None:
+                return answer
         
         # Generate answer
         answer = self.generate_answer(query, context_chunks, system_prompt)
         
-        return answer, retrieved
+        if self.answer_cache is not None:
+            self.answer_cache.put(cache_key, query, answer, query_embedding)
+        
+        return answer
+    
+    def answer_questions(self, queries: List[str], system_prompt: str, top_k: int = 3,
+                         doc_ids: Optional[List[str]] = None, max_workers: int = 4) -> List[Dict[str, Any]]:
+        """
+        Answer many questions, e.g. to build a practice-exam answer key
+        
+        All queries are embedded in one model call and scored with one
+        matrix product; LLM calls then run concurrently on a thread pool,
+        throttled by the rate limiter when one is configured. A failed LLM
+        call fails only its own item.
+        
+        Args:
+            queries: User queries
+            system_prompt: System prompt for the AI
+            top_k: Number of chunks to retrieve per query
+            doc_ids: Only search these documents (default: all)
+            max_workers: LLM calls in flight at once
+            
+        Returns:
+            One dict per query, in input order, with question, answer,
+            retrieved (chunks with scores) and error (None on success)
+        """
+        results = [{"question": query, "answer": None, "retrieved": [], "error": None} for query in queries]
+        if not queries:
+            return results
+        
+        if len(self.store) == 0:
+            logger.error("No embeddings available. Ingest documents first.")
+            for result in results:
+                result["answer"] = NO_CONTEXT_ANSWER
+            return results
+        
+        with tracer.span("answer_batch", questions=len(queries)) as batch_span:
+            retrieved_batch, query_embeddings = self._search(list(queries), top_k, doc_ids)
+            logger.info(f"Retrieved {sum(len(r) for r in retrieved_batch)} relevant chunks for {len(queries)} queries")
+            
+            # Create the client up front rather than racing to create it on the worker threads
+            self.client
+            
+            def answer(i: int) -> str:
+                if not retrieved_batch[i]:
+                    return NO_CONTEXT_ANSWER
+                # Worker threads do not inherit the caller's active span
+                with tracer.span("answer_item", parent=batch_span, index=i):
+                    query_embedding = None if query_embeddings is None else query_embeddings[i]
+                    return self._answer_from_context(queries[i], query_embedding, retrieved_batch[i], system_prompt)
+            
+            with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="answer-batch") as executor:
+                futures = [executor.submit(answer, i) for i in range(len(queries))]
+                for result, retrieved, future in zip(results, retrieved_batch, futures):
+                    result["retrieved"] = retrieved
+                    try:
+                        result["answer"] = future.result()
+                    except Exception as e:
+                        result["error"] = str(e)
+        
+        failed = sum(result["error"] is not None for result in results)
+        logger.info(f"Answered {len(queries) - failed}/{len(queries)} questions")
+        return results
+    
+    def answer_question_stream(self, query: str, system_prompt: str, top_k: int = 3,
+                               doc_ids: Optional[List[str]] = None) -> Tuple[Iterator[str], List[Tuple[str, float]]]:
+        """
+        Complete RAG pipeline with a streamed answer
+        
+        Retrieval runs before this returns, so sources can be shown while
+        the answer is still being generated. A cached answer is returned as
+        a single fragment; a generated one is cached once fully streamed.
+        
+        Args:
+            query: User query
+            system_prompt: System prompt for the AI
+            top_k: Number of chunks to retrieve
+            doc_ids: Only search these documents (default: all)
+            
+        Returns:
+            Tuple of (answer_fragment_iterator, retrieved_chunks_with_scores)
+        """
+        retrieved, query_embedding = self._retrieve_for_answer(query, top_k, doc_ids)
+        
+        if not retrieved:
+            return iter([NO_CONTEXT_ANSWER]), []
+        
+        context_chunks = self._pack_context(retrieved)
+        
+        if self.answer_cache is None:
+            return self.generate_answer_stream(query, context_chunks, system_prompt), retrieved
+        
+        cache_key = self._answer_cache_key(context_chunks, system_prompt)
+        answer = self._cached_answer(cache_key, query, query_embedding)
+        if answer is not None:
+            return iter([answer]), retrieved
+        
+        stream = self.generate_answer_stream(query, context_chunks, system_prompt)
+        return self._cache_stream(stream, cache_key, query, query_embedding), retrieved
+    
+    def _cache_stream(self, stream: Iterator[str], cache_key: str, query: str,
+                      query_embedding: Optional[np.ndarray]) -> Iterator[str]:
+        """Pass fragments through, caching the answer if the stream completes"""
+        fragments = []
+        for fragment in stream:
+            fragments.append(fragment)
+            yield fragment
+        self.answer_cache.put(cache_key, query, "".join(fragments), query_embedding)
@@ -0,0 +1,117 @@
+"""
+Rate Limiter Module
+Client-side token buckets for LLM requests/minute and tokens/minute quotas
+"""
+
+import time
+import threading
+import logging
+from typing import Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Bucket holding up to `capacity` units, refilled continuously
+
+    Not thread-safe on its own; RateLimiter serializes access.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        """
+        Initialize a full bucket
+
+        Args:
+            capacity: Maximum units held (the allowed burst)
+            refill_per_second: Units added back per second
+        """
+        if capacity <= 0 or refill_per_second <= 0:
+            raise ValueError("capacity and refill_per_second must be positive")
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.level = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available (0 if they are now)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.level) / self.refill_per_second)
+
+    def take(self, amount: float) -> None:
+        self.level -= min(amount, self.capacity)
+
+    def give_back(self, amount: float) -> None:
+        """Return (or, if negative, further charge) units after the real cost is known"""
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter for an API quota in requests and tokens per minute
+
+    Each call reserves one request and an estimate of its tokens up front,
+    blocking until both buckets allow it, then settles the estimate against
+    the tokens the API actually reports. Buckets start full, so a burst of
+    up to one minute's quota goes through immediately.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        """
+        Initialize the limiter
+
+        Args:
+            requests_per_minute: Request quota (None = unlimited)
+            tokens_per_minute: Token quota, prompt plus completion (None = unlimited)
+        """
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60) if tokens_per_minute else None
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 0) -> float:
+        """
+        Block until one request of about `tokens` tokens fits the quota
+
+        Args:
+            tokens: Estimated tokens for the request
+
+        Returns:
+            Seconds spent waiting
+        """
+        started = time.monotonic()
+        while True:
+            with self._lock:
+                wait = max(
+                    self.requests.wait_time(1) if self.requests else 0.0,
+                    self.tokens.wait_time(tokens) if self.tokens else 0.0,
+                )
+                if wait <= 0:
+                    if self.requests:
+                        self.requests.take(1)
+                    if self.tokens:
+                        self.tokens.take(tokens)
+                    waited = time.monotonic() - started
+                    self.waited += waited
+                    return waited
+            time.sleep(wait)
+
+    def settle(self, reserved: int, used: int) -> None:
+        """
+        Correct the token bucket once a request's real usage is known
+
+        Args:
+            reserved: Tokens passed to acquire
+            used: Tokens the API reported
+        """
+        if self.tokens is not None and used != reserved:
+            with self._lock:
+                self.tokens.give_back(min(reserved, self.tokens.capacity) - used)
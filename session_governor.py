@@ -0,0 +1,276 @@
+"""
+Session Governor Module
+Server-wide memory budget for per-session indexes and page images
+"""
+
+import os
+import time
+import shutil
+import tempfile
+import threading
+import weakref
+import logging
+from typing import Any, Dict, Hashable, List, Optional
+
+from index_snapshot import SnapshotDirectory
+from page_renderer import PageCache
+from telemetry import tracer
+from vector_store import VectorStore
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class _Session:
+    """What the governor tracks about one session"""
+
+    def __init__(self, pipeline):
+        self.pipeline = weakref.ref(pipeline)
+        self.document_key: Optional[Hashable] = None
+        self.pinned = False
+        self.last_active = time.monotonic()
+        self.evicted = False
+        # Spilled snapshot holding this session's corpus, valid while the
+        # store's version is still spilled_corpus
+        self.spilled_version: Optional[str] = None
+        self.spilled_corpus: Optional[str] = None
+
+
+class SessionGovernor:
+    """
+    Keeps the heavy state of all sessions in one process under a byte budget
+
+    Each session's RAG pipeline (vectors, BM25 postings, chunk texts) and
+    the cached page images of the document it is viewing are accounted
+    to it. When the total exceeds max_bytes, or a session has been idle
+    for idle_seconds, the least recently active sessions are evicted: the
+    pipeline's corpus is saved as a snapshot in a spill directory and its
+    store replaced by an empty one, and page images nobody else is viewing
+    are dropped from the shared cache. The next touch() of an evicted
+    session reloads its corpus (memory-mapped) before the session uses it;
+    pages are simply rendered again.
+
+    Pipelines are held by weak reference, so a session that ends is
+    forgotten, and its spilled snapshot deleted, without being told.
+    Sessions active in the last min_idle_seconds and pinned sessions
+    (e.g. with an ingestion job running) are never evicted.
+    """
+
+    def __init__(self, max_bytes: int, page_cache: Optional[PageCache] = None,
+                 spill_dir: Optional[str] = None, min_idle_seconds: float = 30.0,
+                 idle_seconds: Optional[float] = None):
+        """
+        Initialize the governor
+
+        Args:
+            max_bytes: Budget for all sessions' indexes plus cached page images
+            page_cache: Shared page image cache to account and trim
+            spill_dir: Directory for evicted corpora (a private temporary
+                directory is created inside it; defaults to the system temp dir)
+            min_idle_seconds: A session is only evicted after being idle this long
+            idle_seconds: Evict sessions idle this long even under budget (None = never)
+        """
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+        self.max_bytes = max_bytes
+        self.page_cache = page_cache
+        self.min_idle_seconds = min_idle_seconds
+        self.idle_seconds = idle_seconds
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+        self.spill_root = tempfile.mkdtemp(prefix="session-spill-", dir=spill_dir or None)
+        self.evictions = 0
+        self.restores = 0
+        self._over_budget = False
+        self._sessions: Dict[str, _Session] = {}
+        self._lock = threading.RLock()
+
+    def touch(self, session_id: str, pipeline=None, document_key: Optional[Hashable] = None,
+              pinned: bool = False) -> bool:
+        """
+        Mark a session active, restoring its corpus if it was evicted
+
+        Call at the start of every request (Streamlit rerun) of the session,
+        before it uses its pipeline. Budget enforcement runs afterwards.
+
+        Args:
+            session_id: Session identifier
+            pipeline: The session's RAGPipeline (None if it has none yet)
+            document_key: Page cache document key of the PDF in its viewer
+            pinned: Never evict the session while set
+
+        Returns:
+            True if the session's corpus was restored from disk
+        """
+        restored = False
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if pipeline is None:
+                if session is not None:
+                    self._forget(session_id)
+            else:
+                if session is None or session.pipeline() is not pipeline:
+                    if session is not None:
+                        self._forget(session_id)
+                    session = self._sessions[session_id] = _Session(pipeline)
+                session.document_key = document_key
+                session.pinned = pinned
+                session.last_active = time.monotonic()
+                if session.evicted:
+                    self._restore(session_id, session, pipeline)
+                    restored = True
+            self.enforce()
+        return restored
+
+    def forget(self, session_id: str) -> None:
+        """Stop tracking a session and delete anything it spilled"""
+        with self._lock:
+            self._forget(session_id)
+
+    def _forget(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+        self._collect()
+
+    def _session_bytes(self, session: _Session, images: Dict[Hashable, int]) -> Dict[str, int]:
+        pipeline = session.pipeline()
+        index = 0 if pipeline is None or session.evicted else pipeline.store.nbytes
+        return {"index": index, "images": images.get(session.document_key, 0)}
+
+    def usage(self) -> Dict[str, Any]:
+        """
+        Current memory use
+
+        Returns:
+            Dictionary with total_bytes, max_bytes, evictions, restores and
+            sessions, a list of per-session dicts (id, index_bytes,
+            image_bytes, idle_seconds, evicted, pinned), most recently active first.
+            Page images of a document viewed by several sessions are listed
+            under each but counted once in total_bytes.
+        """
+        with self._lock:
+            images = self.page_cache.document_bytes() if self.page_cache is not None else {}
+            now = time.monotonic()
+            sessions = []
+            for session_id, session in self._live_sessions():
+                used = self._session_bytes(session, images)
+                sessions.append({
+                    "id": session_id,
+                    "index_bytes": used["index"],
+                    "image_bytes": used["images"],
+                    "idle_seconds": now - session.last_active,
+                    "evicted": session.evicted,
+                    "pinned": session.pinned,
+                })
+            sessions.sort(key=lambda s: s["idle_seconds"])
+            total = sum(s["index_bytes"] for s in sessions) + sum(images.values())
+            return {
+                "total_bytes": total,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "restores": self.restores,
+                "sessions": sessions,
+            }
+
+    def enforce(self) -> List[str]:
+        """
+        Evict idle sessions until the budget is met
+
+        Page images of documents no resident session is viewing go first,
+        then sessions in least-recently-active order.
+
+        Returns:
+            Ids of the sessions evicted
+        """
+        with self._lock:
+            now = time.monotonic()
+            sessions = self._live_sessions()
+            images = self.page_cache.document_bytes() if self.page_cache is not None else {}
+            index_bytes = {session_id: self._session_bytes(session, images)["index"] for session_id, session in sessions}
+            total = sum(index_bytes.values()) + sum(images.values())
+
+            viewed = {session.document_key for _, session in sessions if not session.evicted}
+            for document_key in [key for key in images if key not in viewed]:
+                if total <= self.max_bytes:
+                    break
+                total -= self.page_cache.discard_document(document_key)
+                images.pop(document_key)
+
+            evicted = []
+            for session_id, session in sorted(sessions, key=lambda item: item[1].last_active):
+                idle = now - session.last_active
+                if session.evicted or session.pinned or idle < self.min_idle_seconds:
+                    continue
+                expired = self.idle_seconds is not None and idle >= self.idle_seconds
+                if total <= self.max_bytes and not expired:
+                    continue
+                total -= self._evict(session_id, session, index_bytes[session_id])
+                viewed = {other.document_key for _, other in sessions if not other.evicted}
+                if session.document_key in images and session.document_key not in viewed:
+                    total -= self.page_cache.discard_document(session.document_key)
+                    images.pop(session.document_key)
+                evicted.append(session_id)
+
+            # Warned once per excursion over budget, not on every request
+            if total > self.max_bytes and not self._over_budget:
+                logger.warning(
+                    f"Sessions use {total / 2**20:.0f} MiB of a {self.max_bytes / 2**20:.0f} MiB budget; "
+                    f"the rest are active or pinned"
+                )
+            self._over_budget = total > self.max_bytes
+            if evicted:
+                self._collect()
+            return evicted
+
+    def _live_sessions(self) -> List[tuple]:
+        """(id, session) pairs, dropping sessions whose pipeline was garbage collected"""
+        ended = [session_id for session_id, session in self._sessions.items() if session.pipeline() is None]
+        for session_id in ended:
+            del self._sessions[session_id]
+        if ended:
+            logger.info(f"Forgot {len(ended)} ended sessions")
+            self._collect()
+        return list(self._sessions.items())
+
+    def _evict(self, session_id: str, session: _Session, nbytes: int) -> int:
+        """Spill a session's corpus to disk and empty its store; returns bytes freed"""
+        pipeline = session.pipeline()
+        store = pipeline.store
+        with tracer.span("session_evict", chunks=len(store), bytes=nbytes) as span:
+            if len(store) == 0:
+                session.spilled_version = session.spilled_corpus = None
+            elif store.version != session.spilled_corpus:
+                session.spilled_version = pipeline.save_snapshot(self.spill_root)
+                session.spilled_corpus = store.version
+                span.set(written=True)
+            # else: an unchanged corpus restored from a spill is still on disk
+            pipeline.replace_store(VectorStore(store.dim, **store.settings))
+            session.evicted = True
+        self.evictions += 1
+        tracer.increment("sessions_evicted")
+        logger.info(f"Evicted session {session_id}: {nbytes / 2**20:.1f} MiB spilled")
+        return nbytes
+
+    def _restore(self, session_id: str, session: _Session, pipeline) -> None:
+        """Reload an evicted session's corpus"""
+        session.evicted = False
+        if session.spilled_version is None:
+            return
+        with tracer.span("session_restore", version=session.spilled_version):
+            pipeline.load_snapshot(self.spill_root, session.spilled_version)
+        self.restores += 1
+        tracer.increment("sessions_restored")
+        logger.info(f"Restored session {session_id} from snapshot {session.spilled_version}")
+
+    def _collect(self) -> None:
+        """Delete spilled snapshots no tracked session can restore from"""
+        snapshots = SnapshotDirectory(self.spill_root)
+        referenced = {session.spilled_version for session in self._sessions.values()}
+        for version in snapshots.versions():
+            if version not in referenced:
+                shutil.rmtree(snapshots.path(version), ignore_errors=True)
+
+    def close(self) -> None:
+        """Delete the spill directory; evicted sessions can no longer be restored"""
+        with self._lock:
+            self._sessions.clear()
+            shutil.rmtree(self.spill_root, ignore_errors=True)
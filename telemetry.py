@@ -0,0 +1,243 @@
+"""
+Telemetry Module
+Lightweight spans and counters with pluggable exporters
+"""
+
+import os
+import json
+import time
+import uuid
+import threading
+import logging
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = "study_assistant"
+
+
+class Span:
+    """One timed operation, nested under the span that was active when it started"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "duration", "attributes")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.trace_id = parent.trace_id if parent is not None else self.span_id
+        self.parent_id = parent.span_id if parent is not None else None
+        self.start = time.time()
+        self.duration: Optional[float] = None
+        self.attributes = dict(attributes or {})
+
+    def set(self, **attributes) -> None:
+        """Add attributes, e.g. sizes only known once the work is done"""
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration": self.duration,
+            "attributes": self.attributes,
+        }
+
+
+class Tracer:
+    """
+    Records spans and counters and hands finished spans to exporters
+
+    The active span is tracked per thread. Work handed to another thread
+    passes its parent explicitly (span(..., parent=...)). With no exporters
+    registered a span costs two clock reads, so instrumentation stays on.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._exporters: List[Any] = []
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+
+    def add_exporter(self, exporter) -> None:
+        """Register an object with an export(span) method"""
+        with self._lock:
+            self._exporters = self._exporters + [exporter]
+
+    def remove_exporter(self, exporter) -> None:
+        with self._lock:
+            self._exporters = [e for e in self._exporters if e is not exporter]
+
+    def current_span(self) -> Optional[Span]:
+        """Innermost open span on this thread"""
+        stack = getattr(self._local, "stack", None)
+        return stack[-1] if stack else None
+
+    @contextmanager
+    def span(self, name: str, parent: Optional[Span] = None, **attributes) -> Iterator[Span]:
+        """
+        Time a block of work
+
+        Args:
+            name: Stage name, e.g. "embed_batch"
+            parent: Parent span (default: the active span on this thread)
+            **attributes: Details recorded with the span
+
+        Yields:
+            The open span, for adding attributes
+        """
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        span = Span(name, parent if parent is not None else (stack[-1] if stack else None), attributes)
+        stack.append(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except Exception as e:
+            span.set(error=type(e).__name__)
+            raise
+        finally:
+            span.duration = time.perf_counter() - started
+            stack.pop()
+            self._export(span)
+
+    def record_span(self, name: str, duration: float, parent: Optional[Span] = None, **attributes) -> Span:
+        """
+        Record a span measured elsewhere, e.g. across the yields of a generator
+
+        Args:
+            name: Stage name
+            duration: Seconds taken, ending now
+            parent: Parent span (default: the active span on this thread)
+            **attributes: Details recorded with the span
+
+        Returns:
+            The finished span
+        """
+        span = Span(name, parent if parent is not None else self.current_span(), attributes)
+        span.start = time.time() - duration
+        span.duration = duration
+        self._export(span)
+        return span
+
+    def _export(self, span: Span) -> None:
+        for exporter in self._exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                logger.error(f"Span exporter {type(exporter).__name__} failed: {str(e)}")
+
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        """
+        Add to a counter
+
+        Args:
+            name: Counter name without prefix or _total suffix, e.g. "chunks_created"
+            value: Amount to add
+            **labels: Label values, e.g. cache="query"
+        """
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def counters(self) -> Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float]:
+        """Snapshot of every counter keyed by (name, sorted label pairs)"""
+        with self._lock:
+            return dict(self._counters)
+
+
+class InMemoryExporter:
+    """Keeps the most recent spans, e.g. for the app's debug panel"""
+
+    def __init__(self, max_spans: int = 5000):
+        self._spans: "deque[Span]" = deque(maxlen=max_spans)
+
+    def export(self, span: Span) -> None:
+        self._spans.append(span)
+
+    def spans(self) -> List[Span]:
+        return list(self._spans)
+
+    def trace(self, trace_id: str) -> List[Span]:
+        """Spans of one trace in start order, root first"""
+        return sorted((s for s in list(self._spans) if s.trace_id == trace_id), key=lambda s: s.start)
+
+
+class JSONLinesExporter:
+    """Appends each finished span to a file as one JSON object per line"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class PrometheusExporter:
+    """
+    Aggregates span durations and renders them, with the tracer's counters,
+    in the Prometheus text exposition format
+    """
+
+    def __init__(self, tracer: Optional[Tracer] = None):
+        self.tracer = tracer if tracer is not None else _default_tracer
+        self._durations: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            count_and_sum = self._durations.setdefault(span.name, [0, 0.0])
+            count_and_sum[0] += 1
+            count_and_sum[1] += span.duration
+
+    def render(self) -> str:
+        """Current metrics as Prometheus text"""
+        lines = []
+        by_name: Dict[str, List[Tuple[Tuple[Tuple[str, str], ...], float]]] = {}
+        for (name, labels), value in sorted(self.tracer.counters().items()):
+            by_name.setdefault(name, []).append((labels, value))
+        for name, series in by_name.items():
+            metric = f"{METRIC_PREFIX}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for labels, value in series:
+                lines.append(f"{metric}{_format_labels(labels)} {value:g}")
+
+        metric = f"{METRIC_PREFIX}_span_duration_seconds"
+        with self._lock:
+            durations = sorted(self._durations.items())
+        if durations:
+            lines.append(f"# TYPE {metric} summary")
+            for name, (count, total) in durations:
+                labels = _format_labels((("span", name),))
+                lines.append(f"{metric}_count{labels} {count}")
+                lines.append(f"{metric}_sum{labels} {total:.6f}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+# Process-wide tracer used by every module
+tracer = _default_tracer = Tracer()
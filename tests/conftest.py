@@ -0,0 +1,38 @@
+"""
+Shared test fixtures
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import model_registry
+
+STUB_EMBEDDING_DIM = 8
+
+
+class StubEmbedder:
+    """Stands in for the sentence-transformers model where embeddings are not under test"""
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return STUB_EMBEDDING_DIM
+
+    def encode(self, texts, **kwargs) -> np.ndarray:
+        """Deterministic unit vectors seeded by each text"""
+        vectors = np.stack([
+            np.random.default_rng(list(text.encode("utf-8"))).standard_normal(STUB_EMBEDDING_DIM)
+            for text in texts
+        ]).astype(np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def stub_embedder(monkeypatch) -> str:
+    """Register StubEmbedder with the model registry; returns its model name"""
+    monkeypatch.setitem(model_registry._models, "stub-embedder", StubEmbedder())
+    return "stub-embedder"
@@ -0,0 +1,84 @@
+"""
+Chunking Tests
+The streaming chunker against chunk_text, and the pages chunks are filed under
+"""
+
+import bisect
+
+import numpy as np
+import pytest
+
+from chunk_store import ChunkStore
+from pdf_processor import PDFProcessor
+
+
+def words(page: int, count: int) -> str:
+    return " ".join(f"p{page}w{i}" for i in range(count))
+
+
+PAGE_SETS = {
+    "long pages": [words(p, 120) for p in range(5)],
+    "short pages": [words(p, 3) for p in range(12)],
+    "mixed with blanks": [words(0, 80), "", "   ", words(3, 5), "\n\n", words(5, 200), words(6, 1)],
+    "single page": [words(0, 50)],
+    "no text": ["", ""],
+}
+SETTINGS = [(500, 100), (120, 30), (64, 0), (37, 36)]
+
+
+def page_of(pages, start: int, end: int) -> int:
+    """Page holding the middle of a span, with pages joined by a newline after each"""
+    page_starts = np.cumsum([0] + [len(page) + 1 for page in pages[:-1]])
+    return bisect.bisect_right(page_starts, start + (end - start) // 2) - 1
+
+
+@pytest.mark.parametrize("chunk_size, chunk_overlap", SETTINGS)
+@pytest.mark.parametrize("name", PAGE_SETS)
+def test_streamed_chunks_match_chunk_text(name, chunk_size, chunk_overlap):
+    pages = PAGE_SETS[name]
+    processor = PDFProcessor(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    document = "".join(page + "\n" for page in pages)
+    expected = processor.chunk_text(document)
+
+    assert list(processor.iter_chunks(pages)) == expected
+    spans = list(processor.iter_chunk_spans(iter(pages)))
+    assert [chunk for chunk, _, _ in spans] == expected
+    for chunk, start, end in spans:
+        assert document[start:end] == chunk
+
+
+@pytest.mark.parametrize("batch_size", [1, 3, 64])
+@pytest.mark.parametrize("chunk_size, chunk_overlap", SETTINGS)
+@pytest.mark.parametrize("name", PAGE_SETS)
+def test_batches_store_chunks_under_their_pages(name, chunk_size, chunk_overlap, batch_size):
+    pages = PAGE_SETS[name]
+    processor = PDFProcessor(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    spans = list(processor.iter_chunk_spans(pages))
+
+    store = ChunkStore()
+    stored_pages = []
+    for texts, batch_spans in processor.iter_chunk_batches(pages, batch_size):
+        assert len(texts) <= batch_size
+        store.append_spans(0, batch_spans)
+        stored_pages.extend(batch_spans.pages)
+
+    assert stored_pages == [page + "\n" for page in pages]
+    assert store.get_many(range(len(store))) == [chunk for chunk, _, _ in spans]
+    assert list(store.pages[:len(store)]) == [page_of(pages, start, end) for _, start, end in spans]
+
+
+@pytest.mark.parametrize("first_page, expected", [
+    # Chunks start every 40 characters, so one spans offsets 80-130 across the break
+    ("a" * 90, ("a" * 10 + "\n" + "b" * 39, 1)),
+    ("a" * 115, ("a" * 35 + "\n" + "b" * 14, 0)),
+])
+def test_chunk_straddling_a_page_break_goes_to_the_page_with_more_of_it(first_page, expected):
+    pages = [first_page, "b" * 90]
+    processor = PDFProcessor(chunk_size=50, chunk_overlap=10)
+    store = ChunkStore()
+    for _, spans in processor.iter_chunk_batches(pages, batch_size=2):
+        store.append_spans(0, spans)
+
+    chunks = store.get_many(range(len(store)))
+    straddling = [(chunk, int(page)) for chunk, page in zip(chunks, store.pages) if "a" in chunk and "b" in chunk]
+    assert straddling == [expected]
@@ -0,0 +1,69 @@
+"""
+Embedding Cache Tests
+Two cache instances sharing a directory, as the app and the query service do
+"""
+
+import threading
+
+import numpy as np
+
+from embedding_cache import EmbeddingCache
+
+DIM = 8
+
+
+def vectors_for(texts):
+    rng = np.random.default_rng(abs(hash(tuple(texts))) % 2**32)
+    return rng.standard_normal((len(texts), DIM)).astype(np.float32)
+
+
+def test_instances_sharing_a_directory_see_each_others_vectors(tmp_path):
+    first = EmbeddingCache(str(tmp_path), "model", DIM)
+    second = EmbeddingCache(str(tmp_path), "model", DIM)
+
+    texts_a = [f"alpha {i}" for i in range(1500)]
+    first.put_many(texts_a, vectors_for(texts_a))
+    # second mapped the file before first grew it
+    texts_b = [f"beta {i}" for i in range(3000)]
+    second.put_many(texts_b, vectors_for(texts_b))
+
+    for cache in (first, second):
+        for texts in (texts_a, texts_b):
+            vectors, hits = cache.get_many(texts)
+            assert hits.all()
+            np.testing.assert_array_equal(vectors, vectors_for(texts))
+    assert len(first) == len(texts_a) + len(texts_b)
+
+
+def test_concurrent_writers_never_share_a_slot(tmp_path):
+    caches = [EmbeddingCache(str(tmp_path), "model", DIM) for _ in range(4)]
+    batches = [[[f"writer {w} batch {b} text {i}" for i in range(200)] for b in range(5)] for w in range(4)]
+    errors = []
+
+    def write(cache, writer_batches):
+        try:
+            for texts in writer_batches:
+                cache.put_many(texts, vectors_for(texts))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=args) for args in zip(caches, batches)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    reader = EmbeddingCache(str(tmp_path), "model", DIM)
+    for writer_batches in batches:
+        for texts in writer_batches:
+            vectors, hits = reader.get_many(texts)
+            assert hits.all()
+            np.testing.assert_array_equal(vectors, vectors_for(texts))
+
+
+def test_hit_and_miss_counters(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), "model", DIM)
+    cache.put_many(["known"], vectors_for(["known"]))
+    cache.get_many(["known", "unknown"])
+    assert (cache.hits, cache.misses) == (1, 1)
@@ -0,0 +1,96 @@
+"""
+Ingestion Job Tests
+Background indexing against a store that is replaced mid-job
+"""
+
+import threading
+
+import pytest
+
+from ingestion_jobs import IngestionJob
+from pdf_processor import PDFProcessor
+from rag_pipeline import RAGPipeline
+from vector_store import VectorStore
+
+PAGE = " ".join(f"Sentence {i} about cell biology." for i in range(40))
+
+
+class GatedDocument:
+    """Open document whose pages after the first are only readable once `gate` is set"""
+
+    def __init__(self, pages: int):
+        self.pages = pages
+        self.gate = threading.Event()
+
+    def __len__(self) -> int:
+        return self.pages
+
+    def page_text(self, page_num: int) -> str:
+        if page_num > 0:
+            self.gate.wait(10)
+        return PAGE
+
+
+@pytest.fixture
+def pipeline(stub_embedder) -> RAGPipeline:
+    return RAGPipeline(api_key="test", embedding_model_name=stub_embedder, batch_size=2)
+
+
+def start_job(pipeline: RAGPipeline, document: GatedDocument) -> IngestionJob:
+    processor = PDFProcessor(chunk_size=200, chunk_overlap=20)
+    job = IngestionJob(pipeline, processor, "book.pdf", "book", document=document).start()
+    # Wait for the first page's batches to be indexed
+    for _ in range(1000):
+        if job.chunks_indexed or not job.running:
+            break
+        threading.Event().wait(0.01)
+    assert job.running and job.chunks_indexed > 0
+    return job
+
+
+def test_job_runs_to_completion(pipeline):
+    document = GatedDocument(3)
+    document.gate.set()
+    job = IngestionJob(pipeline, PDFProcessor(chunk_size=200, chunk_overlap=20), "book.pdf", "book",
+                       document=document).start()
+
+    assert job.wait(10)
+    assert job.state == "done"
+    assert len(pipeline.store) == job.chunks_indexed > 0
+    assert set(pipeline.store.chunks.pages.tolist()) == {0, 1, 2}
+    assert job not in pipeline.ingestion_jobs
+
+
+def test_replace_store_cancels_running_jobs(pipeline):
+    document = GatedDocument(3)
+    job = start_job(pipeline, document)
+    old_store = pipeline.store
+    new_store = VectorStore(pipeline.embedding_dim)
+
+    swap = threading.Thread(target=pipeline.replace_store, args=(new_store,))
+    swap.start()
+    document.gate.set()
+    swap.join(10)
+
+    assert not swap.is_alive()
+    assert job.state == "cancelled"
+    assert pipeline.store is new_store
+    assert len(new_store) == 0 and "book" not in new_store.documents
+    # The partly indexed document is cleaned out of the store it was written to
+    assert "book" not in old_store.documents
+    assert job not in pipeline.ingestion_jobs
+
+
+def test_job_fails_when_store_is_swapped_directly(pipeline):
+    document = GatedDocument(3)
+    job = start_job(pipeline, document)
+    old_store = pipeline.store
+    pipeline.store = VectorStore(pipeline.embedding_dim)
+
+    document.gate.set()
+    assert job.wait(10)
+
+    assert job.state == "failed"
+    assert "replaced" in job.error
+    assert len(pipeline.store) == 0
+    assert "book" not in old_store.documents
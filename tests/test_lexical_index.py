@@ -0,0 +1,46 @@
+"""
+Lexical Index Tests
+Tokenization and BM25 search beyond ASCII text
+"""
+
+import pytest
+
+from lexical_index import BM25Index, tokenize
+
+
+@pytest.mark.parametrize("text, terms", [
+    ("Photosynthesis in the Chloroplast", ["photosynthesis", "chloroplast"]),
+    ("MATH-2410 and H2O+", ["math-2410", "math", "2410", "h2o"]),
+    ("Café crème", ["café", "crème"]),
+    ("Die Straße", ["die", "strasse"]),
+    ("Теорема Пифагора", ["теорема", "пифагора"]),
+    # Case folding also maps the final sigma
+    ("Ὀδυσσεύς", ["ὀδυσσεύσ"]),
+    ("東京大学 研究", ["東京大学", "研究"]),
+    ("__init__ method", ["__init__", "init", "method"]),
+])
+def test_tokenize(text, terms):
+    assert tokenize(text) == terms
+
+
+def test_tokenize_normalizes_unicode_forms():
+    # Combining diaeresis and an "fi" ligature, as PDF extraction often produces them
+    assert tokenize("nai\u0308ve \ufb01nite") == tokenize("na\u00efve finite") == ["na\u00efve", "finite"]
+
+
+def test_tokenize_case_folds_beyond_ascii():
+    assert tokenize("ÉCOLE Σοφία") == tokenize("école σοφία")
+
+
+def test_search_finds_non_ascii_terms():
+    index = BM25Index()
+    index.add([
+        "Le théorème de Pythagore relie les côtés d'un triangle",
+        "Теорема Пифагора о прямоугольном треугольнике",
+        "The ribosome builds proteins",
+    ])
+
+    for query, row in [("théorème", 0), ("THÉORÈME", 0), ("Пифагора", 1), ("пифагора", 1), ("ribosome", 2)]:
+        (rows, scores), = index.search([query], top_k=3)
+        assert rows.tolist() == [row], query
+        assert scores[0] > 0
@@ -0,0 +1,88 @@
+"""
+Rate Limit Tests
+The LLM token reservation is settled however a call ends
+"""
+
+import pytest
+
+from benchmarks.fake_llm import FakeGroq
+from context_packer import estimate_tokens
+from rag_pipeline import MAX_ANSWER_TOKENS, RAGPipeline
+from rate_limiter import RateLimiter
+
+CONTEXT = ["Mitochondria produce most of the cell's energy."]
+QUERY = "What do mitochondria do?"
+SYSTEM_PROMPT = "You are a tutor."
+
+
+class FailingGroq(FakeGroq):
+    """Rejects requests outright, or fails streams after `fail_after` tokens"""
+
+    def __init__(self, fail_after=None):
+        super().__init__(first_token_delay=0, token_delay=0, answer_tokens=20)
+        self.fail_after = fail_after
+
+    def _create(self, *args, stream=False, **kwargs):
+        if self.fail_after is None:
+            raise RuntimeError("429 Too Many Requests")
+        return self._failing(super()._create(*args, stream=stream, **kwargs))
+
+    def _failing(self, chunks):
+        for i, chunk in enumerate(chunks):
+            if i == self.fail_after:
+                raise ConnectionError("stream interrupted")
+            yield chunk
+
+
+@pytest.fixture
+def pipeline(stub_embedder) -> RAGPipeline:
+    limiter = RateLimiter(tokens_per_minute=100_000)
+    # Freeze the bucket so its level shows exactly what was charged
+    limiter.tokens.refill_per_second = 1e-9
+    pipeline = RAGPipeline(api_key="test", embedding_model_name=stub_embedder, rate_limiter=limiter)
+    pipeline.client = FakeGroq(first_token_delay=0, token_delay=0, answer_tokens=20)
+    return pipeline
+
+
+def charged(pipeline: RAGPipeline) -> float:
+    bucket = pipeline.rate_limiter.tokens
+    return bucket.capacity - bucket.level
+
+
+def prompt_estimate(pipeline: RAGPipeline) -> int:
+    messages = pipeline._build_messages(QUERY, CONTEXT, SYSTEM_PROMPT)
+    return sum(estimate_tokens(message["content"]) for message in messages)
+
+
+def test_blocking_call_is_charged_reported_usage(pipeline):
+    pipeline.generate_answer(QUERY, CONTEXT, SYSTEM_PROMPT)
+    prompt_tokens = sum(len(m["content"].split()) for m in pipeline._build_messages(QUERY, CONTEXT, SYSTEM_PROMPT))
+    assert charged(pipeline) == pytest.approx(prompt_tokens + 20)
+
+
+def test_failed_blocking_call_refunds_the_completion_reservation(pipeline):
+    pipeline.client = FailingGroq()
+    with pytest.raises(RuntimeError):
+        pipeline.generate_answer(QUERY, CONTEXT, SYSTEM_PROMPT)
+    assert charged(pipeline) == pytest.approx(prompt_estimate(pipeline))
+    assert charged(pipeline) < MAX_ANSWER_TOKENS
+
+
+def test_stream_closed_early_is_charged_tokens_received(pipeline):
+    stream = pipeline.generate_answer_stream(QUERY, CONTEXT, SYSTEM_PROMPT)
+    for _ in range(3):
+        next(stream)
+    stream.close()
+    assert charged(pipeline) == pytest.approx(prompt_estimate(pipeline) + 3)
+
+
+def test_stream_failing_partway_is_charged_tokens_received(pipeline):
+    pipeline.client = FailingGroq(fail_after=5)
+    with pytest.raises(ConnectionError):
+        list(pipeline.generate_answer_stream(QUERY, CONTEXT, SYSTEM_PROMPT))
+    assert charged(pipeline) == pytest.approx(prompt_estimate(pipeline) + 5)
+
+
+def test_completed_stream_is_charged_tokens_received(pipeline):
+    list(pipeline.generate_answer_stream(QUERY, CONTEXT, SYSTEM_PROMPT))
+    assert charged(pipeline) == pytest.approx(prompt_estimate(pipeline) + 20)
@@ -0,0 +1,89 @@
+"""
+Session Governor Tests
+Evicting idle sessions to disk and restoring them on their next request
+"""
+
+import os
+import time
+
+import pytest
+
+from pdf_processor import PDFProcessor
+from rag_pipeline import RAGPipeline
+from session_governor import SessionGovernor
+
+PAGES = [f"Page {p}: " + " ".join(f"cell{p} membrane{p} protein{p} {i}." for i in range(30)) for p in range(4)]
+QUERIES = ["cell1 membrane1", "protein3", "Page 0"]
+
+
+@pytest.fixture
+def pipeline(stub_embedder) -> RAGPipeline:
+    pipeline = RAGPipeline(api_key="test", embedding_model_name=stub_embedder, retrieval_mode="hybrid")
+    processor = PDFProcessor(chunk_size=200, chunk_overlap=20)
+    for texts, spans in processor.iter_chunk_batches(PAGES, batch_size=8):
+        pipeline.store.extend("biology", texts, pipeline.embed_texts(texts), name="Biology", spans=spans)
+    pipeline.add_document(["Ribosomes build proteins."], name="Notes", doc_id="notes")
+    return pipeline
+
+
+@pytest.fixture
+def governor(tmp_path):
+    governor = SessionGovernor(2**30, spill_dir=str(tmp_path), min_idle_seconds=0, idle_seconds=0.05)
+    yield governor
+    governor.close()
+
+
+def corpus(pipeline: RAGPipeline):
+    store = pipeline.store
+    results = [
+        [(hit.text, round(hit.score, 5), hit.doc_id, hit.page) for hit in hits]
+        for hits in pipeline.retrieve_relevant_chunks_batch(QUERIES, top_k=4)
+    ]
+    return store.list_documents(), store.live_texts(), store.chunks.pages.tolist(), results
+
+
+def test_evicted_session_is_restored_on_next_touch(pipeline, governor):
+    before = corpus(pipeline)
+    assert not governor.touch("a", pipeline)
+
+    time.sleep(0.1)
+    assert governor.enforce() == ["a"]
+    assert len(pipeline.store) == 0
+    assert governor.usage()["sessions"][0]["evicted"]
+    assert os.listdir(governor.spill_root)
+
+    assert governor.touch("a", pipeline)
+    assert corpus(pipeline) == before
+    assert governor.usage()["sessions"][0]["index_bytes"] == pipeline.store.nbytes > 0
+    assert (governor.evictions, governor.restores) == (1, 1)
+
+
+def test_unchanged_corpus_is_not_spilled_again(pipeline, governor):
+    governor.touch("a", pipeline)
+    time.sleep(0.1)
+    governor.enforce()
+    governor.touch("a", pipeline)
+    spilled = os.listdir(governor.spill_root)
+
+    time.sleep(0.1)
+    governor.enforce()
+    assert os.listdir(governor.spill_root) == spilled
+    assert governor.touch("a", pipeline)
+    assert len(pipeline.store) > 0
+
+
+def test_pinned_session_is_never_evicted(pipeline, governor):
+    governor.touch("a", pipeline, pinned=True)
+    time.sleep(0.1)
+    assert governor.enforce() == []
+    assert len(pipeline.store) > 0
+
+
+def test_close_removes_spill_directory(pipeline, governor):
+    governor.touch("a", pipeline)
+    time.sleep(0.1)
+    governor.enforce()
+    assert os.path.isdir(governor.spill_root)
+
+    governor.close()
+    assert not os.path.exists(governor.spill_root)
@@ -0,0 +1,87 @@
+"""
+Streaming Tests
+Answers generated through RAGPipeline with the fake Groq client
+"""
+
+import time
+
+import numpy as np
+import pytest
+
+from benchmarks.fake_llm import FakeGroq
+from rag_pipeline import RAGPipeline
+from vector_index import normalize_rows
+
+FIRST_TOKEN_DELAY = 0.05
+TOKEN_DELAY = 0.005
+ANSWER_TOKENS = 20
+CONTEXT = ["Mitochondria produce most of the cell's energy.", "Ribosomes build proteins."]
+
+
+@pytest.fixture
+def pipeline(stub_embedder) -> RAGPipeline:
+    # Lexical retrieval never calls the embedding model
+    pipeline = RAGPipeline(api_key="test", embedding_model_name=stub_embedder, retrieval_mode="lexical")
+    pipeline.client = FakeGroq(FIRST_TOKEN_DELAY, TOKEN_DELAY, ANSWER_TOKENS)
+    vectors = np.random.default_rng(0).standard_normal((len(CONTEXT), pipeline.embedding_dim))
+    pipeline.store.add("biology", CONTEXT, normalize_rows(vectors.astype(np.float32)))
+    return pipeline
+
+
+def expected_answer(pipeline: RAGPipeline, query: str, context_chunks) -> str:
+    messages = pipeline._build_messages(query, context_chunks, "You are a tutor.")
+    return "".join(FakeGroq(0, 0, ANSWER_TOKENS)._tokens(messages, ANSWER_TOKENS))
+
+
+def test_stream_yields_fragments_as_they_arrive(pipeline):
+    stream = pipeline.generate_answer_stream("What do mitochondria do?", CONTEXT, "You are a tutor.")
+    assert pipeline.client.calls == 0
+
+    started = time.perf_counter()
+    arrivals = []
+    fragments = []
+    for fragment in stream:
+        arrivals.append(time.perf_counter() - started)
+        fragments.append(fragment)
+
+    assert len(fragments) == ANSWER_TOKENS
+    assert "".join(fragments) == expected_answer(pipeline, "What do mitochondria do?", CONTEXT)
+    assert arrivals[0] >= FIRST_TOKEN_DELAY
+    # The first fragment is handed over long before the last one is generated
+    assert arrivals[-1] - arrivals[0] >= 0.8 * TOKEN_DELAY * (ANSWER_TOKENS - 1)
+
+
+def test_stream_records_generation_stats(pipeline):
+    stream = pipeline.generate_answer_stream("What do mitochondria do?", CONTEXT, "You are a tutor.")
+    next(stream)
+    assert pipeline.last_generation_stats == {}
+
+    list(stream)
+    stats = pipeline.last_generation_stats
+    assert stats["tokens"] == ANSWER_TOKENS
+    assert stats["cached"] is False
+    assert FIRST_TOKEN_DELAY <= stats["time_to_first_token"] < stats["total_time"]
+    generation_time = stats["total_time"] - stats["time_to_first_token"]
+    assert stats["tokens_per_second"] == pytest.approx(ANSWER_TOKENS / generation_time)
+
+
+def test_answer_question_stream_returns_sources_before_generating(pipeline):
+    stream, retrieved = pipeline.answer_question_stream("mitochondria energy", "You are a tutor.", top_k=1)
+    assert pipeline.client.calls == 0
+    assert "Mitochondria" in retrieved[0][0]
+
+    answer = "".join(stream)
+    assert pipeline.client.calls == 1
+    assert answer == expected_answer(pipeline, "mitochondria energy", pipeline._pack_context(retrieved))
+    assert pipeline.last_generation_stats["tokens"] == ANSWER_TOKENS
+
+
+def test_blocking_answer_reports_throughput_over_the_whole_call(pipeline):
+    answer = pipeline.generate_answer("What do mitochondria do?", CONTEXT, "You are a tutor.")
+    assert answer == expected_answer(pipeline, "What do mitochondria do?", CONTEXT)
+
+    stats = pipeline.last_generation_stats
+    assert stats["tokens"] == ANSWER_TOKENS
+    # Without streaming the first token arrives with the last one
+    assert stats["time_to_first_token"] == pytest.approx(stats["total_time"])
+    assert stats["tokens_per_second"] == pytest.approx(ANSWER_TOKENS / stats["total_time"])
@@ -0,0 +1,155 @@
+"""
+Vector Store Tests
+Tombstones, background compaction racing writers, and save/load
+"""
+
+import threading
+
+import numpy as np
+import pytest
+
+import vector_store
+from pdf_processor import PDFProcessor
+from vector_index import INDEX_TYPES, normalize_rows
+from vector_store import VectorStore
+
+DIM = 32
+
+
+def unit_vectors(n: int, seed: int) -> np.ndarray:
+    return normalize_rows(np.random.default_rng(seed).standard_normal((n, DIM)).astype(np.float32))
+
+
+def texts(prefix: str, n: int):
+    return [f"{prefix} chunk {i}" for i in range(n)]
+
+
+def assert_finds_itself(store: VectorStore, chunk_texts, vectors, doc_id: str) -> None:
+    for text, hits in zip(chunk_texts, store.search(vectors, top_k=1)):
+        assert hits[0].text == text
+        assert hits[0].doc_id == doc_id
+        assert hits[0].score == pytest.approx(1.0, abs=1e-5)
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+@pytest.mark.parametrize("compact_threshold", [1.0, 0.0])
+def test_removed_rows_never_come_back(index_type, compact_threshold):
+    store = VectorStore(DIM, index_type, compact_threshold=compact_threshold, background_compaction=False)
+    vectors_a, vectors_b = unit_vectors(40, 1), unit_vectors(40, 2)
+    store.add("a", texts("alpha", 40), vectors_a)
+    store.add("b", texts("beta", 40), vectors_b)
+    store.remove("a")
+    assert store.dead_count == (40 if compact_threshold == 1.0 else 0)
+
+    for hits in store.search(vectors_a, top_k=80):
+        assert hits and all(hit.doc_id == "b" for hit in hits)
+    assert store.search(vectors_a, top_k=5, doc_ids=["a"]) == [[] for _ in range(40)]
+    lexical = store.search(None, top_k=80, query_texts=["alpha chunk"], mode="lexical")
+    assert all(hit.doc_id == "b" for hit in lexical[0])
+    assert store.live_texts() == texts("beta", 40)
+
+    # Re-adding the id brings back the new content only
+    store.add("a", ["alpha again"], unit_vectors(1, 3))
+    assert [hit.text for hit in store.search(vectors_a[:1], top_k=80)[0] if hit.doc_id == "a"] == ["alpha again"]
+
+
+@pytest.fixture
+def gated_compaction(monkeypatch):
+    """Hold background compaction inside its rebuild until the test releases it"""
+    started, release = threading.Event(), threading.Event()
+    create_index = vector_store.create_index
+
+    def gated_create_index(*args, **kwargs):
+        index = create_index(*args, **kwargs)
+        build = index.build
+
+        def gated_build(*build_args, **build_kwargs):
+            started.set()
+            assert release.wait(10)
+            build(*build_args, **build_kwargs)
+        index.build = gated_build
+        return index
+
+    def install():
+        # Only indexes created from now on (i.e. by compaction) are gated
+        monkeypatch.setattr(vector_store, "create_index", gated_create_index)
+        return started, release
+    return install
+
+
+def test_compaction_keeps_rows_added_and_removed_meanwhile(gated_compaction):
+    store = VectorStore(DIM, compact_threshold=0.2)
+    vectors = {doc_id: unit_vectors(30, seed) for seed, doc_id in enumerate("abcde")}
+    for doc_id in "abc":
+        store.add(doc_id, texts(doc_id, 30), vectors[doc_id])
+    started, release = gated_compaction()
+
+    store.remove("a")
+    assert started.wait(10)
+    # While the rebuild runs: grow a document, add one and remove one
+    store.extend("b", texts("b more", 30), vectors["d"])
+    store.add("e", texts("e", 30), vectors["e"])
+    store.remove("c")
+    release.set()
+    store.wait_for_compaction(10)
+
+    assert store.live_texts() == texts("b", 30) + texts("b more", 30) + texts("e", 30)
+    assert store.dead_count == 30
+    assert_finds_itself(store, texts("b", 30), vectors["b"], "b")
+    assert_finds_itself(store, texts("b more", 30), vectors["d"], "b")
+    assert_finds_itself(store, texts("e", 30), vectors["e"], "e")
+    for removed in "ac":
+        assert all(hit.doc_id not in ("a", "c") for hits in store.search(vectors[removed], top_k=90) for hit in hits)
+    lexical = store.search(None, top_k=3, query_texts=["e chunk 7"], mode="lexical")
+    assert lexical[0][0].text == "e chunk 7"
+
+
+def test_compaction_started_before_clear_is_discarded(gated_compaction):
+    store = VectorStore(DIM, compact_threshold=0.2)
+    store.add("a", texts("a", 30), unit_vectors(30, 1))
+    store.add("b", texts("b", 30), unit_vectors(30, 2))
+    started, release = gated_compaction()
+
+    store.remove("a")
+    assert started.wait(10)
+    store.clear()
+    store.add("c", texts("c", 10), unit_vectors(10, 3))
+    release.set()
+    store.wait_for_compaction(10)
+
+    assert store.live_texts() == texts("c", 10)
+    assert [doc["id"] for doc in store.list_documents()] == ["c"]
+
+
+def test_save_and_load_round_trip_documents_and_spans(tmp_path):
+    processor = PDFProcessor(chunk_size=120, chunk_overlap=20)
+    pages = [f"Page {p} " + " ".join(f"word{p}_{i}" for i in range(40)) for p in range(6)]
+    store = VectorStore(DIM, background_compaction=False)
+    store.add("old", texts("old", 5), unit_vectors(5, 9))
+    offset = 0
+    for batch_texts, spans in processor.iter_chunk_batches(pages, batch_size=4):
+        store.extend("book", batch_texts, unit_vectors(len(batch_texts), 10 + offset), name="Biology", spans=spans)
+        offset += 1
+    store.add("notes", texts("notes", 5), unit_vectors(5, 8))
+    # Tombstoned rows are compacted away by save
+    store.remove("old")
+
+    store.save(str(tmp_path))
+    loaded = VectorStore.load(str(tmp_path), background_compaction=False)
+
+    assert loaded.list_documents() == store.list_documents()
+    assert loaded.live_texts() == store.live_texts()
+    assert loaded.version == store.version
+    np.testing.assert_array_equal(loaded.live_vectors(), store.live_vectors())
+    n = len(store.chunks)
+    np.testing.assert_array_equal(loaded.chunks.pages[:n], store.chunks.pages[:n])
+    np.testing.assert_array_equal(loaded.chunks.doc_numbers[:n], store.chunks.doc_numbers[:n])
+    assert set(loaded.chunks.pages[:n]) == {-1, *range(len(pages))}
+    queries = store.live_vectors()
+    for before, after in zip(store.search(queries, top_k=2), loaded.search(queries, top_k=2)):
+        assert [(h.text, h.doc_id, h.page) for h in before] == [(h.text, h.doc_id, h.page) for h in after]
+
+    # A loaded document can keep growing, and hashes like one added whole
+    loaded.extend("notes", texts("notes more", 2), unit_vectors(2, 7))
+    store.extend("notes", texts("notes more", 2), unit_vectors(2, 7))
+    assert loaded.version == store.version
@@ -0,0 +1,796 @@
+"""
+Vector Index Module
+In-memory cosine similarity search over normalized embeddings
+"""
+
+import os
+import tempfile
+import threading
+import logging
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize rows as float32, leaving zero rows untouched
+
+    Args:
+        vectors: Array of shape (n, dim) or (dim,)
+
+    Returns:
+        Contiguous float32 array of shape (n, dim)
+    """
+    vectors = np.array(vectors, dtype=np.float32, copy=True, ndmin=2)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vectors /= norms
+    return vectors
+
+
+def _prepare(vectors: np.ndarray, dim: int, normalized: bool) -> np.ndarray:
+    """Validate shape and normalize unless the caller already did"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim != 2 or vectors.shape[1] != dim:
+        raise ValueError(f"Expected vectors of shape (n, {dim}), got {vectors.shape}")
+    return vectors if normalized else normalize_rows(vectors)
+
+
+def _prepare_queries(queries: np.ndarray, normalized: bool) -> np.ndarray:
+    """Promote a single query to a batch and normalize unless already done"""
+    queries = np.asarray(queries, dtype=np.float32)
+    if queries.ndim == 1:
+        queries = queries[np.newaxis, :]
+    return queries if normalized else normalize_rows(queries)
+
+
+def top_k_rows(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Select the k highest scores in each row, sorted descending
+
+    Args:
+        scores: Array of shape (n_queries, n); -inf marks excluded entries
+        k: Number of entries to keep, at most n
+
+    Returns:
+        Tuple of (scores, indices) of shape (n_queries, k); excluded
+        entries that still made the cut have index -1
+    """
+    if k < scores.shape[1]:
+        candidates = np.argpartition(scores, -k, axis=1)[:, -k:]
+    else:
+        candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+
+    order = np.argsort(-candidate_scores, axis=1)
+    indices = np.take_along_axis(candidates, order, axis=1).astype(np.int64)
+    top_scores = np.take_along_axis(candidate_scores, order, axis=1)
+    indices[np.isneginf(top_scores)] = -1
+    return top_scores, indices
+
+
+class VectorIndex:
+    """
+    Exact top-k cosine search
+
+    Vectors are normalized once when added, so a query is scored with a
+    single matrix product and the top k are selected with argpartition
+    instead of sorting every score. Storage grows geometrically so
+    appending a document only copies its own vectors, and each thread
+    reuses its score buffer between calls of the same shape.
+    """
+
+    def __init__(self, dim: int):
+        """
+        Initialize an empty index
+
+        Args:
+            dim: Embedding dimension
+        """
+        self.dim = dim
+        self._buffer = np.empty((0, dim), dtype=np.float32)
+        self._size = 0
+        self._local = threading.local()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Indexed vectors in insertion order (a view, not a copy)"""
+        return self._buffer[:self._size]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the stored vectors"""
+        return self.vectors.nbytes
+
+    def get_vectors(self, ids: np.ndarray) -> np.ndarray:
+        """Vectors of the given row ids, shape (len(ids), dim)"""
+        return self._buffer[:self._size][ids]
+
+    def build(self, vectors: np.ndarray, normalized: bool = False) -> None:
+        """
+        Replace the indexed vectors
+
+        Args:
+            vectors: Array of shape (n, dim)
+            normalized: Skip normalization when rows are already unit length
+        """
+        self._buffer = np.ascontiguousarray(_prepare(vectors, self.dim, normalized))
+        self._size = len(self._buffer)
+
+    def add(self, vectors: np.ndarray, normalized: bool = False) -> np.ndarray:
+        """
+        Append vectors without touching existing ones
+
+        Args:
+            vectors: Array of shape (m, dim)
+            normalized: Skip normalization when rows are already unit length
+
+        Returns:
+            Row ids assigned to the new vectors
+        """
+        vectors = _prepare(vectors, self.dim, normalized)
+        start, end = self._size, self._size + len(vectors)
+        if end > len(self._buffer):
+            grown = np.empty((max(end, 2 * len(self._buffer), 1024), self.dim), dtype=np.float32)
+            grown[:start] = self._buffer[:start]
+            self._buffer = grown
+        self._buffer[start:end] = vectors
+        self._size = end
+        return np.arange(start, end)
+
+    def score(self, queries: np.ndarray) -> np.ndarray:
+        """
+        Cosine similarity of each query against every indexed vector
+
+        Args:
+            queries: Normalized array of shape (n_queries, dim)
+
+        Returns:
+            Array of shape (n_queries, n_vectors); reused by this thread's next call
+        """
+        vectors = self.vectors
+        shape = (len(queries), len(vectors))
+        scores = getattr(self._local, "scores", None)
+        if scores is None or scores.shape != shape:
+            scores = self._local.scores = np.empty(shape, dtype=np.float32)
+        return np.matmul(queries, vectors.T, out=scores)
+
+    def search(self, queries: np.ndarray, top_k: int = 3, normalized: bool = False,
+               mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the top_k most similar vectors for one or more queries
+
+        Args:
+            queries: Array of shape (dim,) or (n_queries, dim)
+            top_k: Number of results per query
+            normalized: Skip normalization when queries are already unit length
+            mask: Optional boolean array over row ids; False rows are skipped
+
+        Returns:
+            Tuple of (scores, indices), each of shape (n_queries, k) with
+            k = min(top_k, len(self)), sorted by descending score. Slots
+            that only masked rows could fill have index -1.
+        """
+        queries = _prepare_queries(queries, normalized)
+
+        k = min(top_k, len(self))
+        if k <= 0:
+            return np.empty((len(queries), 0), dtype=np.float32), np.empty((len(queries), 0), dtype=np.int64)
+
+        scores = self.score(queries)
+        if mask is not None:
+            scores[:, ~mask[:scores.shape[1]]] = -np.inf
+        return top_k_rows(scores, k)
+
+
+def nearest_centroid(vectors: np.ndarray, centroids: np.ndarray, block_size: int = 8192) -> np.ndarray:
+    """
+    Index of the most similar centroid for each normalized vector
+
+    Args:
+        vectors: Normalized array of shape (n, dim)
+        centroids: Normalized array of shape (n_centroids, dim)
+        block_size: Rows scored per matrix product, bounding temporary memory
+
+    Returns:
+        int64 array of shape (n,)
+    """
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), block_size):
+        block = vectors[start:start + block_size] @ centroids.T
+        assignments[start:start + len(block)] = block.argmax(axis=1)
+    return assignments
+
+
+def spherical_kmeans(vectors: np.ndarray, n_clusters: int, n_iter: int,
+                     rng: np.random.Generator) -> np.ndarray:
+    """
+    Cluster normalized vectors by cosine similarity (Lloyd's algorithm)
+
+    Args:
+        vectors: Normalized array of shape (n, dim)
+        n_clusters: Number of clusters
+        n_iter: Number of assignment/update rounds
+        rng: Random generator for initialization and empty-cluster restarts
+
+    Returns:
+        Normalized centroids of shape (n_clusters, dim)
+    """
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace=False)].copy()
+    for _ in range(n_iter):
+        assignments = nearest_centroid(vectors, centroids)
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=n_clusters)
+        empty = counts == 0
+        sums = np.zeros_like(centroids)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        sums[~empty] = np.add.reduceat(vectors[order], starts[~empty], axis=0)
+        # Restart empty clusters on random points so no cell is wasted
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+class IVFIndex:
+    """
+    Approximate top-k cosine search with an inverted file (IVF)
+
+    Vectors are clustered with k-means into n_lists cells and stored
+    contiguously by cell. A query is compared against the cell centroids
+    first and only the n_probe closest cells are scored exactly, so
+    raising n_probe trades latency for recall.
+
+    Vectors added after the build go to an unsorted tail that is always
+    scored exactly; the tail is folded into the cells once it outgrows
+    tail_fraction of the index, reusing the trained centroids.
+    """
+
+    def __init__(self, dim: int, n_lists: Optional[int] = None, n_probe: int = 8,
+                 train_size: int = 50_000, n_iter: int = 10, min_train_size: int = 1024,
+                 tail_fraction: float = 0.1, seed: int = 0):
+        """
+        Initialize an empty index
+
+        Args:
+            dim: Embedding dimension
+            n_lists: Number of k-means cells (defaults to ~4 * sqrt(n) at build time)
+            n_probe: Cells scored per query; higher means better recall, slower search
+            train_size: Maximum number of vectors sampled to train k-means
+            n_iter: k-means iterations
+            min_train_size: Below this many vectors the index is searched exactly
+            tail_fraction: Fold appended vectors into cells past this share of the index
+            seed: Random seed for sampling and k-means
+        """
+        if n_probe < 1:
+            raise ValueError("n_probe must be at least 1")
+        self.dim = dim
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.train_size = train_size
+        self.n_iter = n_iter
+        self.min_train_size = min_train_size
+        self.tail_fraction = tail_fraction
+        self.seed = seed
+        self._reset()
+
+    def _reset(self) -> None:
+        self.centroids = np.empty((0, self.dim), dtype=np.float32)
+        self._sorted_vectors = np.empty((0, self.dim), dtype=np.float32)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._positions = np.empty(0, dtype=np.int64)
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._tail = VectorIndex(self.dim)
+
+    def __len__(self) -> int:
+        return len(self._ids) + len(self._tail)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Indexed vectors in insertion order (materialized on access)"""
+        vectors = np.empty((len(self), self.dim), dtype=np.float32)
+        vectors[self._ids] = self._sorted_vectors
+        vectors[len(self._ids):] = self._tail.vectors
+        return vectors
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the cells, their vectors and the tail"""
+        return (self.centroids.nbytes + self._sorted_vectors.nbytes + self._ids.nbytes
+                + self._positions.nbytes + self._offsets.nbytes + self._tail.nbytes)
+
+    def get_vectors(self, ids: np.ndarray) -> np.ndarray:
+        """Vectors of the given row ids, shape (len(ids), dim), without materializing the rest"""
+        ids = np.asarray(ids, dtype=np.int64)
+        n_main = len(self._ids)
+        in_cells = ids < n_main
+        vectors = np.empty((len(ids), self.dim), dtype=np.float32)
+        vectors[in_cells] = self._sorted_vectors[self._positions[ids[in_cells]]]
+        vectors[~in_cells] = self._tail.get_vectors(ids[~in_cells] - n_main)
+        return vectors
+
+    def build(self, vectors: np.ndarray, normalized: bool = False) -> None:
+        """
+        Train the coarse quantizer and assign every vector to a cell
+
+        Args:
+            vectors: Array of shape (n, dim)
+            normalized: Skip normalization when rows are already unit length
+        """
+        vectors = _prepare(vectors, self.dim, normalized)
+        self._reset()
+
+        n = len(vectors)
+        if n < self.min_train_size:
+            # Too few vectors for useful cells; exact search over the tail is cheaper
+            self._tail.build(vectors, normalized=True)
+            return
+
+        n_lists = self.n_lists or int(4 * np.sqrt(n))
+        rng = np.random.default_rng(self.seed)
+        sample = vectors if n <= self.train_size else vectors[rng.choice(n, self.train_size, replace=False)]
+        n_lists = max(1, min(n_lists, len(sample)))
+        self.centroids = spherical_kmeans(sample, n_lists, self.n_iter, rng)
+        self._layout(vectors, np.arange(n), nearest_centroid(vectors, self.centroids))
+
+        logger.info(f"Built IVF index: {n} vectors in {n_lists} lists")
+
+    def _layout(self, vectors: np.ndarray, ids: np.ndarray, assignments: np.ndarray) -> None:
+        """Store vectors contiguously by cell"""
+        order = np.argsort(assignments, kind="stable")
+        self._ids = ids[order]
+        # Cells always hold row ids 0..n-1, so positions invert the permutation
+        self._positions = np.empty(len(ids), dtype=np.int64)
+        self._positions[self._ids] = np.arange(len(ids))
+        self._sorted_vectors = np.ascontiguousarray(vectors[order])
+        self._offsets = np.zeros(len(self.centroids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignments, minlength=len(self.centroids)), out=self._offsets[1:])
+
+    def add(self, vectors: np.ndarray, normalized: bool = False) -> np.ndarray:
+        """
+        Append vectors to the exactly-scored tail
+
+        Args:
+            vectors: Array of shape (m, dim)
+            normalized: Skip normalization when rows are already unit length
+
+        Returns:
+            Row ids assigned to the new vectors
+        """
+        vectors = _prepare(vectors, self.dim, normalized)
+        start = len(self)
+        self._tail.add(vectors, normalized=True)
+        ids = np.arange(start, start + len(vectors))
+
+        if len(self.centroids) == 0:
+            if len(self) >= self.min_train_size:
+                self.build(self.vectors, normalized=True)
+        elif len(self._tail) > self.tail_fraction * len(self._ids):
+            tail = self._tail.vectors
+            tail_ids = np.arange(len(self._ids), len(self))
+            all_vectors = np.concatenate([self._sorted_vectors, tail])
+            all_ids = np.concatenate([self._ids, tail_ids])
+            assignments = np.concatenate([
+                np.repeat(np.arange(len(self.centroids)), np.diff(self._offsets)),
+                nearest_centroid(tail, self.centroids)
+            ])
+            self._layout(all_vectors, all_ids, assignments)
+            self._tail = VectorIndex(self.dim)
+        return ids
+
+    def search(self, queries: np.ndarray, top_k: int = 3, normalized: bool = False,
+               mask: Optional[np.ndarray] = None,
+               n_probe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find approximately the top_k most similar vectors per query
+
+        Args:
+            queries: Array of shape (dim,) or (n_queries, dim)
+            top_k: Number of results per query
+            normalized: Skip normalization when queries are already unit length
+            mask: Optional boolean array over row ids; False rows are skipped
+            n_probe: Override the number of cells scored for this call
+
+        Returns:
+            Tuple of (scores, indices), each of shape (n_queries, k) with
+            k = min(top_k, len(self)), sorted by descending score. When the
+            probed cells hold fewer than k eligible vectors, missing slots
+            have index -1 and score -inf.
+        """
+        queries = _prepare_queries(queries, normalized)
+
+        k = min(top_k, len(self))
+        scores = np.full((len(queries), max(k, 0)), -np.inf, dtype=np.float32)
+        indices = np.full((len(queries), max(k, 0)), -1, dtype=np.int64)
+        if k <= 0:
+            return scores, indices
+
+        n_main = len(self._ids)
+        if len(self._tail):
+            tail_mask = None if mask is None else mask[n_main:len(self)]
+            tail_scores, tail_indices = self._tail.search(queries, k, normalized=True, mask=tail_mask)
+            found = tail_scores.shape[1]
+            scores[:, :found] = tail_scores
+            indices[:, :found] = np.where(tail_indices >= 0, tail_indices + n_main, -1)
+        if n_main == 0:
+            return scores, indices
+
+        n_lists = len(self.centroids)
+        n_probe = min(n_probe or self.n_probe, n_lists)
+        centroid_scores = queries @ self.centroids.T
+        if n_probe < n_lists:
+            probes = np.argpartition(centroid_scores, -n_probe, axis=1)[:, -n_probe:]
+        else:
+            probes = np.broadcast_to(np.arange(n_lists), centroid_scores.shape)
+
+        for row, (query, cells) in enumerate(zip(queries, probes)):
+            # Cells are contiguous, so score each slice in place without gathering rows
+            spans = [(a, b) for a, b in zip(self._offsets[cells], self._offsets[cells + 1]) if b > a]
+            if not spans:
+                continue
+            positions = np.concatenate([np.arange(a, b) for a, b in spans])
+            candidate_scores = np.concatenate([self._sorted_vectors[a:b] @ query for a, b in spans])
+            candidate_ids = self._ids[positions]
+            if mask is not None:
+                candidate_scores[~mask[candidate_ids]] = -np.inf
+
+            # Merge with the tail results already in this row
+            merged_scores = np.concatenate([scores[row], candidate_scores])
+            merged_ids = np.concatenate([indices[row], candidate_ids])
+            row_scores, best = top_k_rows(merged_scores[np.newaxis, :], k)
+            scores[row] = row_scores[0]
+            indices[row] = np.where(best[0] >= 0, merged_ids[np.maximum(best[0], 0)], -1)
+
+        return scores, indices
+
+
+class FloatVectorFile:
+    """
+    Append-only float32 matrix kept on disk and memory-mapped for reads
+
+    Reading a few rows only pages those rows in, so full-precision vectors
+    cost disk space rather than process memory. The file is private to
+    this object and deleted by close().
+    """
+
+    def __init__(self, dim: int, directory: Optional[str] = None):
+        """
+        Create an empty file
+
+        Args:
+            dim: Vector dimension
+            directory: Where to create the file (default: the system temp directory)
+        """
+        self.dim = dim
+        fd, self.path = tempfile.mkstemp(prefix="vectors-", suffix=".f32", dir=directory)
+        os.close(fd)
+        self._size = 0
+        self._map: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, vectors: np.ndarray) -> None:
+        with open(self.path, "ab") as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        self._size += len(vectors)
+        self._map = None
+
+    def truncate(self) -> None:
+        open(self.path, "wb").close()
+        self._size = 0
+        self._map = None
+
+    def view(self) -> np.ndarray:
+        """All rows as a read-only memory map (remapped after appends)"""
+        if self._size == 0:
+            return np.empty((0, self.dim), dtype=np.float32)
+        if self._map is None or len(self._map) != self._size:
+            self._map = np.memmap(self.path, dtype=np.float32, mode="r", shape=(self._size, self.dim))
+        return self._map
+
+    def close(self) -> None:
+        self._map = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def __del__(self):
+        self.close()
+
+
+def _popcount_table() -> np.ndarray:
+    return np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+_POPCOUNT = None if hasattr(np, "bitwise_count") else _popcount_table()
+
+
+def hamming_distances(codes: np.ndarray, query_code: np.ndarray) -> np.ndarray:
+    """
+    Number of differing bits between each packed code and a query code
+
+    Args:
+        codes: uint64 array of shape (n, words)
+        query_code: uint64 array of shape (words,)
+
+    Returns:
+        int32 array of shape (n,)
+    """
+    diff = np.bitwise_xor(codes, query_code)
+    if _POPCOUNT is None:
+        return np.bitwise_count(diff).sum(axis=1, dtype=np.int32)
+    return _POPCOUNT[diff.view(np.uint8)].sum(axis=1, dtype=np.int32)
+
+
+class QuantizedIndex(ABC):
+    """
+    Exhaustive search over compressed vectors, with optional exact rescoring
+
+    Subclasses keep a compact code per vector in memory and score every
+    code against the query. Full-precision vectors go to a FloatVectorFile
+    on disk; with rescore on, the rescore_factor * top_k best approximate
+    matches are rescored exactly from it, which reads only those rows.
+    """
+
+    def __init__(self, dim: int, rescore: bool = True, rescore_factor: int = 4,
+                 vector_dir: Optional[str] = None, block_size: int = 1024):
+        """
+        Initialize an empty index
+
+        Args:
+            dim: Embedding dimension
+            rescore: Rerank approximate candidates with the float vectors
+            rescore_factor: Candidates rescored per requested result
+            vector_dir: Directory for the float vector file (default: system temp)
+            block_size: Codes decoded per step; blocks that fit in CPU cache are fastest
+        """
+        if rescore_factor < 1:
+            raise ValueError("rescore_factor must be at least 1")
+        self.dim = dim
+        self.rescore = rescore
+        self.rescore_factor = rescore_factor
+        self.block_size = block_size
+        self._floats = FloatVectorFile(dim, vector_dir)
+        self._size = 0
+        self._reset_codes()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Full-precision vectors in insertion order (memory-mapped from disk)"""
+        return self._floats.view()
+
+    @property
+    @abstractmethod
+    def nbytes(self) -> int:
+        """Process memory held by the codes (the float file is not counted)"""
+
+    def get_vectors(self, ids: np.ndarray) -> np.ndarray:
+        """Full-precision vectors of the given row ids, shape (len(ids), dim)"""
+        return self._floats.view()[np.asarray(ids, dtype=np.int64)]
+
+    def build(self, vectors: np.ndarray, normalized: bool = False) -> None:
+        """
+        Replace the indexed vectors
+
+        Args:
+            vectors: Array of shape (n, dim)
+            normalized: Skip normalization when rows are already unit length
+        """
+        self._floats.truncate()
+        self._size = 0
+        self._reset_codes()
+        self.add(vectors, normalized)
+
+    def add(self, vectors: np.ndarray, normalized: bool = False) -> np.ndarray:
+        """
+        Append vectors without touching existing ones
+
+        Args:
+            vectors: Array of shape (m, dim)
+            normalized: Skip normalization when rows are already unit length
+
+        Returns:
+            Row ids assigned to the new vectors
+        """
+        vectors = _prepare(vectors, self.dim, normalized)
+        start, end = self._size, self._size + len(vectors)
+        self._append_codes(vectors, start, end)
+        self._floats.append(vectors)
+        self._size = end
+        return np.arange(start, end)
+
+    def close(self) -> None:
+        """Delete the float vector file"""
+        self._floats.close()
+
+    @abstractmethod
+    def _reset_codes(self) -> None:
+        """Drop every code"""
+
+    @abstractmethod
+    def _append_codes(self, vectors: np.ndarray, start: int, end: int) -> None:
+        """Encode normalized vectors as rows start..end"""
+
+    @abstractmethod
+    def _approximate_scores(self, queries: np.ndarray) -> np.ndarray:
+        """Estimated cosine similarity, shape (n_queries, len(self))"""
+
+    def search(self, queries: np.ndarray, top_k: int = 3, normalized: bool = False,
+               mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the top_k most similar vectors for one or more queries
+
+        Args:
+            queries: Array of shape (dim,) or (n_queries, dim)
+            top_k: Number of results per query
+            normalized: Skip normalization when queries are already unit length
+            mask: Optional boolean array over row ids; False rows are skipped
+
+        Returns:
+            Tuple of (scores, indices), each of shape (n_queries, k) with
+            k = min(top_k, len(self)), sorted by descending score. Scores
+            are exact when rescoring, estimates otherwise. Slots that only
+            masked rows could fill have index -1.
+        """
+        queries = _prepare_queries(queries, normalized)
+
+        k = min(top_k, len(self))
+        if k <= 0:
+            return np.empty((len(queries), 0), dtype=np.float32), np.empty((len(queries), 0), dtype=np.int64)
+
+        scores = self._approximate_scores(queries)
+        if mask is not None:
+            scores[:, ~mask[:scores.shape[1]]] = -np.inf
+        if not self.rescore:
+            return top_k_rows(scores, k)
+
+        candidate_scores, candidates = top_k_rows(scores, min(len(self), k * self.rescore_factor))
+        valid = candidates >= 0
+        floats = self._floats.view()
+        exact = np.full(candidates.shape, -np.inf, dtype=np.float32)
+        for row, query in enumerate(queries):
+            rows = candidates[row, valid[row]]
+            # Sorted reads touch the memory-mapped file in order
+            order = np.argsort(rows)
+            exact_row = np.empty(len(rows), dtype=np.float32)
+            exact_row[order] = floats[rows[order]] @ query
+            exact[row, valid[row]] = exact_row
+        top_scores, best = top_k_rows(exact, k)
+        indices = np.where(best >= 0, np.take_along_axis(candidates, np.maximum(best, 0), axis=1), -1)
+        return top_scores, indices
+
+
+class Int8Index(QuantizedIndex):
+    """
+    Vectors scalar-quantized to int8 with one float scale per vector
+
+    Each vector is scaled so its largest component maps to 127, which
+    needs no training and lets later appends use the same scheme. Memory
+    is dim + 4 bytes per vector, about a quarter of float32.
+    """
+
+    @property
+    def nbytes(self) -> int:
+        return self._codes[:self._size].nbytes + self._scales[:self._size].nbytes
+
+    def _reset_codes(self) -> None:
+        self._codes = np.empty((0, self.dim), dtype=np.int8)
+        self._scales = np.empty(0, dtype=np.float32)
+
+    def _append_codes(self, vectors: np.ndarray, start: int, end: int) -> None:
+        if end > len(self._codes):
+            capacity = max(end, 2 * len(self._codes), 1024)
+            codes = np.empty((capacity, self.dim), dtype=np.int8)
+            codes[:start] = self._codes[:start]
+            scales = np.empty(capacity, dtype=np.float32)
+            scales[:start] = self._scales[:start]
+            self._codes, self._scales = codes, scales
+
+        peaks = np.abs(vectors).max(axis=1)
+        peaks[peaks == 0] = 1.0
+        scales = peaks / 127
+        self._codes[start:end] = np.rint(vectors / scales[:, np.newaxis])
+        self._scales[start:end] = scales
+
+    def _approximate_scores(self, queries: np.ndarray) -> np.ndarray:
+        scores = np.empty((len(queries), self._size), dtype=np.float32)
+        for start in range(0, self._size, self.block_size):
+            end = min(start + self.block_size, self._size)
+            block = self._codes[start:end].astype(np.float32)
+            np.matmul(queries, block.T, out=scores[:, start:end])
+            scores[:, start:end] *= self._scales[start:end]
+        return scores
+
+
+class BinaryIndex(QuantizedIndex):
+    """
+    Vectors reduced to their sign bits, compared by Hamming distance
+
+    dim / 8 bytes per vector (48 for MiniLM's 384 dimensions), 1/32 of
+    float32. Estimates are coarse, so keep rescoring on unless recall
+    matters less than the disk reads.
+    """
+
+    def __init__(self, dim: int, rescore: bool = True, rescore_factor: int = 40, **params):
+        """
+        Initialize an empty index
+
+        Args:
+            dim: Embedding dimension
+            rescore: Rerank approximate candidates with the float vectors
+            rescore_factor: Candidates rescored per requested result
+            **params: vector_dir / block_size, as for QuantizedIndex
+        """
+        self._words = (dim + 63) // 64
+        super().__init__(dim, rescore, rescore_factor, **params)
+
+    @property
+    def nbytes(self) -> int:
+        return self._codes[:self._size].nbytes
+
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        bits = np.packbits(vectors > 0, axis=1)
+        padded = np.zeros((len(vectors), self._words * 8), dtype=np.uint8)
+        padded[:, :bits.shape[1]] = bits
+        return padded.view(np.uint64)
+
+    def _reset_codes(self) -> None:
+        self._codes = np.empty((0, self._words), dtype=np.uint64)
+
+    def _append_codes(self, vectors: np.ndarray, start: int, end: int) -> None:
+        if end > len(self._codes):
+            codes = np.empty((max(end, 2 * len(self._codes), 1024), self._words), dtype=np.uint64)
+            codes[:start] = self._codes[:start]
+            self._codes = codes
+        self._codes[start:end] = self._encode(vectors)
+
+    def _approximate_scores(self, queries: np.ndarray) -> np.ndarray:
+        # Fraction of agreeing signs mapped to [-1, 1], a rough stand-in for cosine
+        query_codes = self._encode(queries)
+        scores = np.empty((len(queries), self._size), dtype=np.float32)
+        for row, query_code in enumerate(query_codes):
+            for start in range(0, self._size, self.block_size):
+                end = min(start + self.block_size, self._size)
+                scores[row, start:end] = hamming_distances(self._codes[start:end], query_code)
+        scores *= -2.0 / self.dim
+        scores += 1.0
+        return scores
+
+
+INDEX_TYPES = {
+    "exact": VectorIndex,
+    "ivf": IVFIndex,
+    "int8": Int8Index,
+    "binary": BinaryIndex,
+}
+
+
+def create_index(index_type: str, dim: int, **params):
+    """
+    Build an empty index by name
+
+    Args:
+        index_type: One of INDEX_TYPES ("exact", "ivf", "int8" or "binary")
+        dim: Embedding dimension
+        **params: Extra constructor arguments, e.g. n_lists / n_probe for "ivf"
+            or rescore / rescore_factor for "int8" and "binary"
+
+    Returns:
+        Index instance
+    """
+    try:
+        index_class = INDEX_TYPES[index_type]
+    except KeyError:
+        raise ValueError(f"Unknown index type '{index_type}'. Choose from: {', '.join(INDEX_TYPES)}")
+    return index_class(dim, **params)
@@ -0,0 +1,499 @@
+"""
+Vector Store Module
+Append-only multi-document chunk store with tombstones and compaction
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+from chunk_store import ChunkHit, ChunkSpans, ChunkStore
+from lexical_index import BM25Index, count_terms
+from telemetry import tracer
+from vector_index import create_index
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# "dense" ranks by embedding similarity, "lexical" by BM25 keyword match, and
+# "hybrid" rescores the BM25 candidates by embedding similarity
+RETRIEVAL_MODES = ("dense", "lexical", "hybrid")
+
+# Reciprocal rank fusion constant; larger values weigh top ranks less heavily
+RRF_K = 60
+
+
+def _grow(array: np.ndarray, size: int) -> np.ndarray:
+    """Return array with capacity for at least `size` items, doubling when full"""
+    if size <= len(array):
+        return array
+    grown = np.zeros(max(size, 2 * len(array), 1024), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+def _ranks(scores: np.ndarray) -> np.ndarray:
+    """0-based rank of each score, highest first; tied scores share the best rank"""
+    descending = np.sort(-scores)
+    return np.searchsorted(descending, -scores, side="left")
+
+
+class VectorStore:
+    """
+    Chunks and embeddings for many documents behind one index
+
+    Adding a document appends its rows; removing one only marks its rows
+    dead (a tombstone) so neither operation touches other documents. Once
+    dead rows exceed compact_threshold of the store, a background thread
+    rebuilds the index without them and swaps it in.
+
+    A BM25 index over the chunk texts shares the vector index's row ids,
+    so search can rank by keywords, by embeddings or by both. Chunk texts
+    are kept as spans of each document's text in a ChunkStore, which also
+    records the page every chunk is on.
+    """
+
+    def __init__(self, dim: int, index_type: str = "exact", index_params: Optional[Dict[str, Any]] = None,
+                 compact_threshold: float = 0.25, background_compaction: bool = True,
+                 hybrid_candidates: int = 100):
+        """
+        Initialize an empty store
+
+        Args:
+            dim: Embedding dimension
+            index_type: Index used for search (see vector_index.INDEX_TYPES)
+            index_params: Extra index settings
+            compact_threshold: Fraction of dead rows that triggers compaction
+            background_compaction: Compact on a background thread instead of inline
+            hybrid_candidates: BM25 matches rescored per query in hybrid search
+        """
+        self.dim = dim
+        self.index_type = index_type
+        self.index_params = dict(index_params or {})
+        self.compact_threshold = compact_threshold
+        self.background_compaction = background_compaction
+        self.hybrid_candidates = hybrid_candidates
+
+        self._lock = threading.RLock()
+        self._compaction_thread: Optional[threading.Thread] = None
+        self.clear()
+
+    def clear(self) -> None:
+        """Drop every document"""
+        with self._lock:
+            self.index = create_index(self.index_type, self.dim, **self.index_params)
+            self.lexical = BM25Index()
+            self.chunks = ChunkStore()
+            self._alive = np.zeros(0, dtype=bool)
+            self.documents: Dict[str, Dict[str, Any]] = {}
+            self._next_doc_number = 0
+            self._dead = 0
+            self._version: Optional[str] = None
+            # Bumped on clear() so an in-flight compaction knows its snapshot is void
+            self._generation = getattr(self, "_generation", 0) + 1
+
+    def __len__(self) -> int:
+        """Number of live chunks"""
+        return len(self.chunks) - self._dead
+
+    @property
+    def version(self) -> str:
+        """
+        Fingerprint of the live corpus content
+
+        Derived from the chunk texts of every document, so it changes when a
+        document is added, removed or replaced with different content, and is
+        the same for any store holding the same documents.
+        """
+        with self._lock:
+            if self._version is None:
+                digest = hashlib.sha256()
+                for fingerprint in sorted(doc["fingerprint"] for doc in self.documents.values()):
+                    digest.update(fingerprint.encode("ascii"))
+                self._version = digest.hexdigest()[:16]
+            return self._version
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory of the index, BM25 postings and chunk texts (mapped arrays included)"""
+        with self._lock:
+            return self.index.nbytes + self.lexical.nbytes + self.chunks.nbytes + self._alive.nbytes
+
+    @property
+    def settings(self) -> Dict[str, Any]:
+        """Constructor arguments other than dim, to create a store configured like this one"""
+        return {
+            "index_type": self.index_type,
+            "index_params": self.index_params,
+            "compact_threshold": self.compact_threshold,
+            "background_compaction": self.background_compaction,
+            "hybrid_candidates": self.hybrid_candidates,
+        }
+
+    @property
+    def dead_count(self) -> int:
+        """Rows tombstoned but not yet compacted away"""
+        return self._dead
+
+    def live_texts(self) -> List[str]:
+        """Texts of live chunks in insertion order"""
+        with self._lock:
+            return self.chunks.get_many(np.flatnonzero(self._alive[:len(self.chunks)]))
+
+    def live_vectors(self) -> np.ndarray:
+        """Embeddings of live chunks in insertion order"""
+        with self._lock:
+            return self.index.vectors[np.flatnonzero(self._alive[:len(self.chunks)])]
+
+    def add(self, doc_id: str, texts: List[str], vectors: np.ndarray, name: Optional[str] = None,
+            spans: Optional[ChunkSpans] = None) -> None:
+        """
+        Append a document, replacing any document with the same id
+
+        Args:
+            doc_id: Document identifier
+            texts: Chunk texts
+            vectors: Normalized embeddings of shape (len(texts), dim)
+            name: Display name (defaults to doc_id)
+            spans: Where the chunks sit in the document's pages; without
+                them each chunk is stored on its own and has no page number
+        """
+        if len(texts) != len(vectors):
+            raise ValueError("texts and vectors must have the same length")
+
+        with self._lock:
+            if doc_id in self.documents:
+                self.remove(doc_id)
+            self.extend(doc_id, texts, vectors, name=name, spans=spans)
+
+        logger.info(f"Added document '{doc_id}' with {len(texts)} chunks")
+
+    def extend(self, doc_id: str, texts: List[str], vectors: np.ndarray, name: Optional[str] = None,
+               spans: Optional[ChunkSpans] = None) -> None:
+        """
+        Append chunks to a document, creating it if needed
+
+        Used to index a document in batches while it is still being
+        processed; its chunks are searchable as soon as each batch lands.
+        The fingerprint comes out the same as adding all chunks at once.
+
+        Args:
+            doc_id: Document identifier
+            texts: Chunk texts
+            vectors: Normalized embeddings of shape (len(texts), dim)
+            name: Display name when the document is created (defaults to doc_id)
+            spans: Where the chunks sit in the document's pages, with the
+                pages not passed in an earlier batch (see ChunkStore.append_spans)
+        """
+        if len(texts) != len(vectors):
+            raise ValueError("texts and vectors must have the same length")
+        if spans is not None and len(spans.starts) != len(texts):
+            raise ValueError("spans must have one entry per text")
+        # Tokenize before taking the lock; only the posting append runs under it
+        term_counts = count_terms(texts)
+
+        with self._lock:
+            doc = self.documents.get(doc_id)
+            if doc is not None and doc["digest"] is None:
+                doc["digest"] = self._rehash(doc["number"])
+            if doc is None:
+                doc = self.documents[doc_id] = {
+                    "id": doc_id,
+                    "name": name or doc_id,
+                    "num_chunks": 0,
+                    "added_at": time.time(),
+                    "number": self._next_doc_number,
+                    "digest": hashlib.sha256(),
+                }
+                self._next_doc_number += 1
+            if spans is not None and spans.pages:
+                # Pages can arrive before the chunks that point into them
+                self.chunks.append_spans(doc["number"], spans._replace(starts=spans.starts[:0], ends=spans.ends[:0]))
+                spans = spans._replace(pages=[])
+            if not len(texts):
+                doc["fingerprint"] = doc["digest"].hexdigest()
+                self._version = None
+                return
+
+            rows = self.index.add(vectors, normalized=True)
+            self.lexical.add_counts(term_counts)
+            if spans is not None:
+                self.chunks.append_spans(doc["number"], spans)
+            else:
+                self.chunks.append_texts(doc["number"], texts)
+            self._alive = _grow(self._alive, len(self.chunks))
+            self._alive[rows] = True
+
+            # Hashes "\0".join(all chunks) incrementally
+            doc["digest"].update(("\0" if doc["num_chunks"] else "").encode("utf-8"))
+            doc["digest"].update("\0".join(texts).encode("utf-8"))
+            doc["fingerprint"] = doc["digest"].hexdigest()
+            doc["num_chunks"] += len(texts)
+            self._version = None
+
+    def _rehash(self, number: int):
+        """Digest of a document's live chunks, for documents loaded without one"""
+        n = len(self.chunks)
+        rows = np.flatnonzero(self._alive[:n] & (self.chunks.doc_numbers == number))
+        return hashlib.sha256("\0".join(self.chunks.get_many(rows)).encode("utf-8"))
+
+    def remove(self, doc_id: str) -> int:
+        """
+        Tombstone every chunk of a document
+
+        Args:
+            doc_id: Document identifier
+
+        Returns:
+            Number of chunks removed
+        """
+        with self._lock:
+            if doc_id not in self.documents:
+                raise KeyError(f"Unknown document '{doc_id}'")
+            number = self.documents.pop(doc_id)["number"]
+
+            n = len(self.chunks)
+            rows = np.flatnonzero(self._alive[:n] & (self.chunks.doc_numbers == number))
+            self._alive[rows] = False
+            self._dead += len(rows)
+            self._version = None
+
+        logger.info(f"Removed document '{doc_id}' ({len(rows)} chunks)")
+        self.maybe_compact()
+        return len(rows)
+
+    def list_documents(self) -> List[Dict[str, Any]]:
+        """Documents in the order they were added"""
+        with self._lock:
+            return [
+                {key: value for key, value in doc.items() if key not in ("number", "fingerprint", "digest")}
+                for doc in sorted(self.documents.values(), key=lambda d: d["number"])
+            ]
+
+    def _mask(self, doc_ids: Optional[Iterable[str]]) -> Optional[np.ndarray]:
+        """Boolean row mask for live rows of the given documents (None means all rows)"""
+        n = len(self.chunks)
+        if doc_ids is None:
+            return self._alive[:n] if self._dead else None
+        numbers = [self.documents[d]["number"] for d in doc_ids if d in self.documents]
+        return self._alive[:n] & np.isin(self.chunks.doc_numbers, numbers)
+
+    def search(self, queries: Optional[np.ndarray], top_k: int = 3,
+               doc_ids: Optional[Iterable[str]] = None, query_texts: Optional[List[str]] = None,
+               mode: str = "dense", candidates: Optional[int] = None) -> List[List[ChunkHit]]:
+        """
+        Find the most relevant live chunks
+
+        Args:
+            queries: Normalized array of shape (n_queries, dim); unused (may be None) in lexical mode
+            top_k: Number of results per query
+            doc_ids: Restrict results to these documents (default: all)
+            query_texts: Query strings, required for lexical and hybrid mode
+            mode: One of RETRIEVAL_MODES
+            candidates: BM25 matches rescored per query in hybrid mode (default: hybrid_candidates)
+
+        Returns:
+            One list of (chunk_text, score) pairs per query, as ChunkHits
+            that also carry the chunk's doc_id and page. The score is the
+            cosine similarity in dense and hybrid mode and the BM25 score in
+            lexical mode; hybrid results are ordered by fused rank.
+        """
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode '{mode}'. Choose from: {', '.join(RETRIEVAL_MODES)}")
+        if mode != "dense" and query_texts is None:
+            raise ValueError(f"{mode} search needs query_texts")
+        n_queries = len(queries) if mode != "lexical" else len(query_texts)
+
+        # Rows are resolved to texts under the lock so a compaction swap cannot renumber them
+        with tracer.span("search", queries=n_queries, top_k=top_k, index=self.index_type, mode=mode), self._lock:
+            mask = self._mask(doc_ids)
+            if mode == "dense":
+                scores, indices = self.index.search(queries, top_k, normalized=True, mask=mask)
+                hits = [list(zip(row_indices, row_scores)) for row_indices, row_scores in zip(indices, scores)]
+            elif mode == "lexical":
+                hits = [list(zip(rows, scores)) for rows, scores in self.lexical.search(query_texts, top_k, mask)]
+            else:
+                hits = self._hybrid_search(queries, query_texts, top_k, mask, candidates or self.hybrid_candidates)
+            doc_ids_by_number = {doc["number"]: doc["id"] for doc in self.documents.values()}
+            doc_numbers, pages = self.chunks.doc_numbers, self.chunks.pages
+            return [
+                [
+                    ChunkHit(self.chunks[row], float(score), doc_ids_by_number.get(int(doc_numbers[row])), int(pages[row]))
+                    for row, score in row_hits if row >= 0
+                ]
+                for row_hits in hits
+            ]
+
+    def _hybrid_search(self, queries: np.ndarray, query_texts: List[str], top_k: int,
+                       mask: Optional[np.ndarray], candidates: int) -> List[List[Tuple[int, float]]]:
+        """
+        Rescore each query's BM25 candidates by cosine and fuse both rankings
+
+        Only the candidates' vectors are read, so the cost per query is set
+        by `candidates` rather than the corpus size. Queries with fewer than
+        top_k keyword matches are topped up from a dense search.
+        """
+        hits: List[List[Tuple[int, float]]] = []
+        short = []
+        for i, (query, (rows, bm25)) in enumerate(zip(queries, self.lexical.search(query_texts, candidates, mask))):
+            if len(rows):
+                cosine = self.index.get_vectors(rows) @ query
+                fused = 1 / (RRF_K + 1 + _ranks(bm25)) + 1 / (RRF_K + 1 + _ranks(cosine))
+                best = np.argsort(-fused, kind="stable")[:top_k]
+                hits.append(list(zip(rows[best], cosine[best])))
+            else:
+                hits.append([])
+            if len(hits[-1]) < top_k:
+                short.append(i)
+
+        if short:
+            scores, indices = self.index.search(queries[short], top_k, normalized=True, mask=mask)
+            for i, row_indices, row_scores in zip(short, indices, scores):
+                seen = {row for row, _ in hits[i]}
+                extra = [(row, score) for row, score in zip(row_indices, row_scores) if row >= 0 and row not in seen]
+                hits[i] = hits[i] + extra[:top_k - len(hits[i])]
+        return hits
+
+    def maybe_compact(self) -> None:
+        """Start compaction when the dead-row fraction passes the threshold"""
+        with self._lock:
+            if not len(self.chunks) or self._dead / len(self.chunks) < self.compact_threshold:
+                return
+            if self._compaction_thread is not None and self._compaction_thread.is_alive():
+                return
+            if not self.background_compaction:
+                self.compact()
+                return
+            self._compaction_thread = threading.Thread(target=self.compact, name="vector-store-compaction", daemon=True)
+            self._compaction_thread.start()
+
+    def compact(self) -> None:
+        """
+        Rebuild the vector and BM25 indexes without tombstoned rows
+
+        The expensive rebuild runs outside the lock against a snapshot, so
+        searches and adds continue meanwhile; rows appended or removed
+        during the rebuild are reconciled before the swap.
+        """
+        with self._lock:
+            generation = self._generation
+            snapshot = len(self.chunks)
+            keep = np.flatnonzero(self._alive[:snapshot])
+            vectors = self.index.vectors[keep]
+            kept_texts = self.chunks.get_many(keep)
+            dropped = snapshot - len(keep)
+
+        new_index = create_index(self.index_type, self.dim, **self.index_params)
+        new_index.build(vectors, normalized=True)
+        new_lexical = BM25Index()
+        new_lexical.add(kept_texts)
+
+        with self._lock:
+            if generation != self._generation:
+                return
+            end = len(self.chunks)
+            if end > snapshot:
+                new_index.add(self.index.get_vectors(np.arange(snapshot, end)), normalized=True)
+                new_lexical.add(self.chunks.get_many(range(snapshot, end)))
+            rows = np.concatenate([keep, np.arange(snapshot, end)])
+
+            self.index = new_index
+            self.lexical = new_lexical
+            # Documents being indexed keep their pages even before their first chunk
+            self.chunks = self.chunks.take(rows, [doc["number"] for doc in self.documents.values()])
+            self._alive = self._alive[rows].copy()
+            self._dead = int(len(rows) - self._alive.sum())
+
+        logger.info(f"Compacted vector store: dropped {dropped} dead rows, {len(self)} live")
+
+    def save(self, directory: str) -> None:
+        """
+        Write the live chunks, embeddings and BM25 postings to a directory
+
+        Tombstoned rows are compacted away first, so the files hold live
+        rows only. Writers and searches wait while the files are written.
+
+        Args:
+            directory: Existing, empty directory
+        """
+        self.wait_for_compaction()
+        with self._lock:
+            if self._dead:
+                # Void a compaction that started since the wait, then compact inline
+                self._generation += 1
+                self.compact()
+            n = len(self.chunks)
+
+            np.save(os.path.join(directory, "vectors.npy"), self.index.get_vectors(np.arange(n)))
+            self.chunks.save(directory)
+            self.lexical.save(directory)
+
+            metadata = {
+                "dim": self.dim,
+                "num_chunks": n,
+                "bm25": {"k1": self.lexical.k1, "b": self.lexical.b},
+                "documents": [
+                    {key: value for key, value in doc.items() if key != "digest"}
+                    for doc in sorted(self.documents.values(), key=lambda d: d["number"])
+                ],
+            }
+            with open(os.path.join(directory, "store.json"), "w", encoding="utf-8") as f:
+                json.dump(metadata, f)
+
+    @classmethod
+    def load(cls, directory: str, index_type: str = "exact", index_params: Optional[Dict[str, Any]] = None,
+             mmap: bool = True, **params) -> "VectorStore":
+        """
+        Open a store written by save()
+
+        With mmap, the embeddings and BM25 postings are mapped read-only, so
+        every process that opens the same files shares one copy through the
+        OS page cache and the load does not read them up front. The "exact"
+        index searches the mapped vectors directly; other index types are
+        built from them (no re-embedding, but their own build cost). The
+        files are never written: adding chunks later copies the arrays it
+        grows into private memory.
+
+        Args:
+            directory: Directory written by save()
+            index_type: Index used for search (see vector_index.INDEX_TYPES)
+            index_params: Extra index settings
+            mmap: Map the arrays instead of reading them into memory
+            **params: Other VectorStore settings, e.g. hybrid_candidates
+
+        Returns:
+            The loaded store
+        """
+        with open(os.path.join(directory, "store.json"), encoding="utf-8") as f:
+            metadata = json.load(f)
+        mode = "r" if mmap else None
+        store = cls(metadata["dim"], index_type, index_params, **params)
+
+        vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode=mode)
+        chunks = ChunkStore.load(directory)
+        if len(chunks) != len(vectors) or len(chunks) != metadata["num_chunks"]:
+            raise ValueError(f"Store at {directory} is inconsistent: {len(chunks)} chunks, {len(vectors)} vectors")
+
+        with store._lock:
+            store.index.build(vectors, normalized=True)
+            store.lexical = BM25Index.load(directory, mmap=mmap, **metadata["bm25"])
+            store.chunks = chunks
+            store._alive = np.ones(len(chunks), dtype=bool)
+            for doc in metadata["documents"]:
+                # The running hash cannot be restored; it is recomputed if the document is extended
+                store.documents[doc["id"]] = dict(doc, digest=None)
+            store._next_doc_number = max((doc["number"] for doc in metadata["documents"]), default=-1) + 1
+
+        logger.info(f"Loaded vector store from {directory}: {len(metadata['documents'])} documents, {len(chunks)} chunks")
+        return store
+
+    def wait_for_compaction(self, timeout: Optional[float] = None) -> None:
+        """Block until a running background compaction finishes"""
+        thread = self._compaction_thread
+        if thread is not None:
+            thread.join(timeout)
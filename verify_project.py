@@ -27,6 +27,11 @@ def verify_project():
             ".gitignore",
             ".streamlit/config.toml",
         ],
+        "Benchmarks": [
+            "benchmarks/run_suite.py",
+            "benchmarks/fake_llm.py",
+            "benchmarks/synthetic.py",
+        ],
         "Prompts": [
             "prompts/tutor_prompt.txt",
         ],
@@ -98,6 +103,14 @@ def verify_project():
     print("3. streamlit run app.py")
     print()
     
+    print("=" * 70)
+    print("⏱️  PERFORMANCE CHECK")
+    print("=" * 70)
+    print("Offline, no API key needed (synthetic PDFs + fake LLM):")
+    print("   python benchmarks/run_suite.py --json baseline.json")
+    print("   python benchmarks/run_suite.py --compare baseline.json")
+    print()
+    
     print("=" * 70)
     print("📚 READING RECOMMENDATIONS")
     print("=" * 70)